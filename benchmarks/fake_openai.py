@@ -0,0 +1,292 @@
+# fake_openai.py
+"""Local OpenAI-compatible stand-in for load tests: canned completions, tool calls and embeddings.
+
+    python -m benchmarks.fake_openai --port 8011 --latency-ms 400 --jitter-ms 150
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=fake streamlit run src/interface/app.py
+
+Replies follow simple rules so multi-agent flows run end to end without a real model:
+- a user turn that mentions an order, a review or a product calls the matching tool the request
+  offers (a toolkit handler, a transfer to the right team member, or the knowledge base search);
+- a turn that ends with tool results is answered from those results;
+- phidata's reasoning step gets a single final-answer step, and JSON-mode requests get `{"answer": ...}`.
+
+Every response waits `latency_ms` (+ up to `jitter_ms`); streamed replies are then paced at
+`tokens_per_second`. Usage is reported at ~4 characters per token.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fakes import FakeEmbedder
+
+ORDER_ID_PATTERN = re.compile(r"\bORD\d{6}\b")
+PRODUCT_PATTERN = re.compile(r"\b((?:[A-Z][a-z]+ ){1,2})Mattress\b")
+SIZE_PATTERN = re.compile(r"\b(California King|Twin XL|Twin|Full|Queen|King)\b")
+ADDRESS_PATTERN = re.compile(r"\b\d+ [A-Za-z ]+(?:Street|St|Avenue|Ave|Road|Rd|Lane|Ln|Drive|Dr)\b[^.?!]*")
+STATUS_INTENT = re.compile(r"\b(status|where is|track)\b", re.IGNORECASE)
+ORDER_INTENT = re.compile(r"\b(order|buy|purchase|ship)\b", re.IGNORECASE)
+REVIEW_INTENT = re.compile(r"\b(reviews?|ratings?|customers say|reviewers)\b", re.IGNORECASE)
+PRICE_INTENT = re.compile(r"\b(price|cost|how much)\b", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class FakeChatPolicy:
+    """Decides what the fake model answers for a chat completions request body."""
+
+    def reply(self, body: dict) -> Dict[str, Any]:
+        """{"content": str | None, "tool_calls": [...]} for the request."""
+        messages = body.get("messages") or []
+        json_mode = (body.get("response_format") or {}).get("type") in ("json_object", "json_schema")
+        if any("reasoning_steps" in _text(m) for m in messages if m.get("role") in ("system", "developer")):
+            return {"content": self._reasoning(messages), "tool_calls": []}
+
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        question = _text(messages[last_user]) if last_user >= 0 else ""
+        if messages and messages[-1].get("role") == "tool":
+            results = []
+            for message in reversed(messages):
+                if message.get("role") != "tool":
+                    break
+                results.insert(0, _text(message))
+            answer = "Here is what I found: " + " ".join(results)[:400]
+        elif not any(m.get("role") == "tool" for m in messages[last_user + 1:]):
+            # No tool has run for this question yet (phidata may have appended reasoning messages after it)
+            tool_call = self._choose_tool(question, body.get("tools") or [])
+            if tool_call is not None:
+                return {"content": None, "tool_calls": [tool_call]}
+            answer = f"Happy to help with that! {question[:120]}"
+        else:
+            answer = "To sum up: I have everything I need, and I'm happy to help with anything else."
+        return {"content": json.dumps({"answer": answer}) if json_mode else answer, "tool_calls": []}
+
+    @staticmethod
+    def _reasoning(messages: List[dict]) -> str:
+        question = next((_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+        return json.dumps({"reasoning_steps": [{
+            "title": "Understand the request",
+            "action": f"I will answer: {question[:80]}",
+            "result": "I know which team member or tool to use.",
+            "reasoning": "The request is clear.",
+            "next_action": "final_answer",
+            "confidence": 0.9,
+        }]})
+
+    def _choose_tool(self, text: str, tools: List[dict]) -> Optional[dict]:
+        available = {tool["function"]["name"]: tool["function"] for tool in tools if tool.get("type") == "function"}
+        product = PRODUCT_PATTERN.search(text)
+        size = SIZE_PATTERN.search(text)
+        address = ADDRESS_PATTERN.search(text)
+        order_id = ORDER_ID_PATTERN.search(text)
+        fields = {
+            "product_name": f"{product.group(1).strip()} Mattress" if product else "Dream Sleep Mattress",
+            "size": size.group(1) if size else "Queen",
+        }
+
+        if order_id and STATUS_INTENT.search(text):
+            candidates = [("handle_get_status", {"order_id": order_id.group(0)}), ("transfer_task_to_orders_agent", None)]
+        elif ORDER_INTENT.search(text):
+            if address:
+                arguments = {**fields, "shipping_address": address.group(0).strip(), "payment_method": "cash"}
+                candidates = [("handle_create_order", arguments), ("transfer_task_to_orders_agent", None)]
+            else:
+                candidates = [("handle_summarize_order_details", fields), ("transfer_task_to_orders_agent", None)]
+        elif REVIEW_INTENT.search(text):
+            candidates = [("handle_get_review_summary", fields), ("transfer_task_to_product_reviews_agent", None)]
+        elif PRICE_INTENT.search(text):
+            candidates = [("handle_get_product_price", fields), ("transfer_task_to_product_details_agent", None)]
+        else:
+            candidates = [("handle_get_product_specs", fields), ("transfer_task_to_product_details_agent", None)]
+        candidates.append(("search_knowledge_base", None))
+
+        for name, arguments in candidates:
+            if name not in available:
+                continue
+            properties = (available[name].get("parameters") or {}).get("properties") or {}
+            if name.startswith("transfer_task_to_"):
+                arguments = {"task_description": text, "expected_output": "A short answer for the customer.", "additional_information": ""}
+            elif name == "search_knowledge_base":
+                arguments = {"query": text}
+            elif "args" in properties:
+                arguments = {"args": arguments}
+            return {"id": f"call_{uuid4().hex[:12]}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+        return None
+
+
+class FakeOpenAIStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"chat_completions": 0, "streamed": 0, "tool_calls": 0, "embeddings": 0, "embedded_texts": 0}
+
+    def add(self, **increments: int):
+        with self._lock:
+            for key, value in increments.items():
+                self.counts[key] += value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def create_fake_openai_app(
+    latency_ms: float = 300.0,
+    jitter_ms: float = 100.0,
+    tokens_per_second: float = 0.0,
+    embedding_latency_ms: float = 20.0,
+    seed: int = 0,
+) -> FastAPI:
+    """FastAPI app serving /v1/chat/completions (streamed or not), /v1/embeddings and /stats."""
+    app = FastAPI(title="Fake OpenAI")
+    policy = FakeChatPolicy()
+    stats = FakeOpenAIStats()
+    rng = random.Random(seed)
+    embedders: Dict[int, FakeEmbedder] = {}
+    app.state.stats = stats
+
+    async def wait(base_ms: float):
+        delay = base_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.snapshot()
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions") or 1536
+        embedder = embedders.setdefault(dimensions, FakeEmbedder(dimensions=dimensions))
+        await asyncio.sleep(embedding_latency_ms / 1000)
+        stats.add(embeddings=1, embedded_texts=len(texts))
+        tokens = sum(estimate_tokens(text) for text in texts)
+        return {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [{"object": "embedding", "index": i, "embedding": embedder.get_embedding(text)} for i, text in enumerate(texts)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        reply = policy.reply(body)
+        prompt_tokens = sum(estimate_tokens(_text(m)) for m in body.get("messages") or [])
+        content = reply["content"]
+        completion_tokens = estimate_tokens(content or json.dumps(reply["tool_calls"]))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        stats.add(chat_completions=1, tool_calls=len(reply["tool_calls"]), streamed=1 if body.get("stream") else 0)
+        completion_id = f"chatcmpl-{uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o")
+        finish_reason = "tool_calls" if reply["tool_calls"] else "stop"
+        await wait(latency_ms)
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": content}
+            if reply["tool_calls"]:
+                message["tool_calls"] = reply["tool_calls"]
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        def chunk(delta: dict, finish: Optional[str] = None, chunk_usage: Optional[dict] = None) -> str:
+            choices = [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish}]
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": choices}
+            if chunk_usage:
+                data["usage"] = chunk_usage
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            if reply["tool_calls"]:
+                yield chunk({"tool_calls": [{"index": i, **call} for i, call in enumerate(reply["tool_calls"])]})
+            else:
+                for token in re.findall(r"\S+\s*", content):
+                    if tokens_per_second:
+                        await asyncio.sleep(1 / tokens_per_second)
+                    yield chunk({"content": token})
+            yield chunk({}, finish=finish_reason)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+class FakeOpenAIServer:
+    """Runs the fake app with uvicorn on a background thread: `with FakeOpenAIServer(port=0) as server: server.base_url`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **app_options: Any):
+        import uvicorn
+
+        self.app = create_fake_openai_app(**app_options)
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.host = host
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Fake OpenAI server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stream pacing (0 = no pacing).")
+    args = parser.parse_args()
+    app = create_fake_openai_app(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_second=args.tokens_per_second)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
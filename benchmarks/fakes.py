@@ -0,0 +1,36 @@
+# fakes.py
+"""Offline stand-ins for the OpenAI services the benchmarks would otherwise call."""
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from phi.embedder import Embedder
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class FakeEmbedder(Embedder):
+    """Deterministic hashed bag-of-words embeddings: the same text gives the same vector on every run.
+
+    Texts sharing words get similar vectors, so retrieval returns sensible results. `latency_ms`
+    simulates the round trip of an embeddings API call.
+    """
+
+    dimensions: int = 256
+    latency_ms: float = 0.0
+    calls: int = 0
+
+    def get_embedding(self, text: str) -> List[float]:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        vector = [0.0] * self.dimensions
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
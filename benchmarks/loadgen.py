@@ -0,0 +1,372 @@
+# loadgen.py
+"""Replay scripted multi-turn conversations against the full Frodo agent stack with N concurrent sessions.
+
+Each simulated customer gets its own agent team from the agent pool (exactly as a Streamlit or API
+session would) and plays one of the SCRIPTS: product questions, review questions, order placement
+or order status checks. Turns run on a bounded worker pool like the API server's threadpool, so the
+report separates time spent waiting for a worker (queueing delay) from the turn itself. Sampled
+turns are traced, and span durations are summarized by name (agent runs, tool calls, embeddings,
+orders DB statements) to show where the time goes.
+
+The OpenAI API is replaced by the local fake server in benchmarks/fake_openai.py (latency-injected
+canned completions, tool calls and embeddings) unless --base-url points somewhere else. Knowledge
+bases use the local vector store and agent sessions a temporary SQLite file, so nothing but this
+process is needed:
+
+    python -m benchmarks.loadgen --sessions 20 --turn-workers 8 --latency-ms 400
+    python -m benchmarks.loadgen --sessions 50 --duration 120 --think-time-ms 2000 --output load.json
+"""
+import argparse
+import asyncio
+import copy
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.common import environment, latency_summary, write_results
+from src.agents.main_agent import FrodoApp, component
+from src.agents.turns import record_turn
+from src.config import load_settings
+
+SCRIPTS = {
+    "product": [
+        "What sizes does the Dream Sleep Mattress come in?",
+        "How much is the King size Luxury Cloud Mattress?",
+        "Which one is better for back pain, the Ultra Comfort Mattress or the Performance Sport Mattress?",
+    ],
+    "reviews": [
+        "What do reviewers say about the Luxury Cloud Mattress?",
+        "Are there any reviews of the Essential Plus Mattress that mention firmness?",
+    ],
+    "order_placement": [
+        "I'd like to buy the Queen Dream Sleep Mattress.",
+        "Please order it and ship it to 42 Elm Street, Springfield.",
+        "Thanks! What happens next?",
+    ],
+    "status_check": [
+        "Where is my order {order_id}?",
+        "What is the status of {order_id}? Can it be delivered sooner?",
+    ],
+}
+SEEDED_ORDERS = 200
+
+
+class LockErrorCountingDB:
+    """Wraps the orders DB and counts "database is locked" errors (they are still raised to the caller)."""
+
+    def __init__(self, db):
+        self._db = db
+        self._lock = threading.Lock()
+        self.lock_errors = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._db, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            try:
+                return attribute(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e):
+                    with self._lock:
+                        self.lock_errors += 1
+                raise
+
+        return call
+
+
+class LoadTestApp(FrodoApp):
+    """FrodoApp with agent sessions in a SQLite file (unless `session_db_file` is None) and a lock-counting orders DB."""
+
+    def __init__(self, settings: dict, session_db_file: Optional[str] = None):
+        super().__init__(settings)
+        self.session_db_file = session_db_file
+
+    def _agent_storage(self, table_name: str):
+        if self.session_db_file is None:
+            return super()._agent_storage(table_name)
+        from phi.storage.agent.sqlite import SqlAgentStorage
+
+        storage = SqlAgentStorage(table_name=table_name, db_file=self.session_db_file)
+        # phidata creates the table on first write; sessions racing to do so fail with "already exists"
+        storage.create()
+        return storage
+
+    @component
+    def orders_db(self):
+        from src.db.orders import SQLiteOrdersDB
+
+        if not self.settings["agents"]["orders"]["enabled"]:
+            return None
+        return LockErrorCountingDB(SQLiteOrdersDB(db_path=self.settings["database"]["orders_path"]))
+
+
+class SpanCollector:
+    """Trace exporter keeping every span's duration by span name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.traces = 0
+
+    def export(self, trace):
+        with self._lock:
+            self.traces += 1
+            for span in trace.spans:
+                self.durations[span.name].append(span.duration_ms / 1000)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: latency_summary(durations) for name, durations in sorted(self.durations.items())}
+
+
+def loadtest_settings(settings: dict, directory: str, sessions: int, trace_sample_rate: float = 1.0) -> dict:
+    """Copy of `settings` whose databases, caches and vectors live under `directory`."""
+    settings = copy.deepcopy(settings)
+    settings["vector_store"].update(backend="local", local_path=os.path.join(directory, "vectors"))
+    settings["database"]["orders_path"] = os.path.join(directory, "orders.sqlite")
+    settings["data"]["catalog_index"] = os.path.join(directory, "catalog_index.json")
+    settings["data"]["reviews_db"] = os.path.join(directory, "reviews.sqlite")
+    settings["embeddings"]["cache_path"] = os.path.join(directory, "embedding_cache.sqlite")
+    settings["ingestion"].update(manifest_path=os.path.join(directory, "ingest_manifest.sqlite"), load_on_startup=True)
+    settings["agent_pool"]["max_sessions"] = max(sessions, settings["agent_pool"]["max_sessions"])
+    # Spans are summarized in the report instead of being written out
+    settings["tracing"].update(enabled=True, sample_rate=trace_sample_rate, jsonl_path=None, otlp_endpoint=None)
+    return settings
+
+
+def seed_orders(orders_db, count: int = SEEDED_ORDERS) -> List[str]:
+    """Existing orders for the status-check conversations."""
+    orders = [
+        {
+            "customer_id": f"LOAD{i:06d}",
+            "product_name": "Dream Sleep Mattress",
+            "size": "Queen",
+            "price": 899.00,
+            "shipping_address": f"{i} Load Test Ave",
+        }
+        for i in range(count)
+    ]
+    return orders_db.bulk_create_orders(orders)["created"]
+
+
+class LoadRecorder:
+    """Per-turn samples, grouped by script; written from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns: List[dict] = []
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def add(self, turn: dict):
+        with self._lock:
+            self.turns.append(turn)
+
+    def error(self, error: Exception):
+        with self._lock:
+            self.errors[type(error).__name__] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        turns = list(self.turns)
+        by_script = defaultdict(list)
+        for turn in turns:
+            by_script[turn["script"]].append(turn)
+        fast_path = [turn for turn in turns if turn["fast_path"]]
+        return {
+            "elapsed_seconds": elapsed,
+            "turns": len(turns),
+            "turns_per_sec": len(turns) / elapsed if elapsed else 0.0,
+            "errors": sum(self.errors.values()),
+            "errors_by_type": dict(self.errors),
+            "fast_path_turns": len(fast_path),
+            "turn_latency": latency_summary([turn["latency"] for turn in turns]),
+            "first_token": latency_summary([turn["first_token"] for turn in turns if turn["first_token"] is not None]),
+            "queue_delay": latency_summary([turn["queue_delay"] for turn in turns]),
+            "by_script": {
+                script: latency_summary([turn["latency"] for turn in script_turns])
+                for script, script_turns in sorted(by_script.items())
+            },
+        }
+
+
+def run_turn(frodo: FrodoApp, session_key: str, prompt: str) -> dict:
+    """One user turn, routed like the Streamlit app: order status fast path first, then the streamed agent."""
+    started = time.perf_counter()
+    with frodo.tracer.trace("turn", session=session_key):
+        agent = frodo.agent_pool.acquire(session_key)
+        fast_path = frodo.order_status_fast_path
+        answer = fast_path.answer(prompt) if fast_path is not None else None
+        if answer is not None:
+            record_turn(agent, prompt, answer)
+            return {"started": started, "first_token": time.perf_counter() - started, "fast_path": True}
+
+        first_token = None
+        for delta in agent.run(message=prompt, stream=True):
+            if first_token is None and delta.content:
+                first_token = time.perf_counter() - started
+    return {"started": started, "first_token": first_token, "fast_path": False}
+
+
+async def simulate_session(
+    frodo: FrodoApp,
+    executor: ThreadPoolExecutor,
+    recorder: LoadRecorder,
+    session: int,
+    order_ids: List[str],
+    deadline: float,
+    think_time_ms: float,
+    rng: random.Random,
+):
+    """Replay scripts for one customer until `deadline` (at least one conversation)."""
+    loop = asyncio.get_running_loop()
+    session_key = f"load-{session}"
+    conversations = 0
+    try:
+        while conversations == 0 or time.perf_counter() < deadline:
+            script = list(SCRIPTS)[(session + conversations) % len(SCRIPTS)]
+            order_id = rng.choice(order_ids) if order_ids else "ORD000001"
+            for prompt in SCRIPTS[script]:
+                submitted = time.perf_counter()
+                try:
+                    turn = await loop.run_in_executor(executor, run_turn, frodo, session_key, prompt.format(order_id=order_id))
+                except Exception as e:
+                    recorder.error(e)
+                    break
+                finished = time.perf_counter()
+                recorder.add({
+                    "script": script,
+                    "latency": finished - turn["started"],
+                    "first_token": turn["first_token"],
+                    "queue_delay": turn["started"] - submitted,
+                    "fast_path": turn["fast_path"],
+                })
+                if think_time_ms:
+                    await asyncio.sleep(rng.uniform(0.5, 1.5) * think_time_ms / 1000)
+            conversations += 1
+    finally:
+        frodo.agent_pool.release(session_key)
+
+
+async def _drive(frodo: FrodoApp, sessions: int, turn_workers: int, duration: float, think_time_ms: float,
+                 order_ids: List[str], seed: int) -> dict:
+    recorder = LoadRecorder()
+    rng = random.Random(seed)
+    with ThreadPoolExecutor(max_workers=turn_workers, thread_name_prefix="loadgen") as executor:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_session(frodo, executor, recorder, session, order_ids, started + duration, think_time_ms,
+                             random.Random(rng.random()))
+            for session in range(sessions)
+        ))
+        elapsed = time.perf_counter() - started
+    return recorder.summary(elapsed)
+
+
+def run_load(
+    frodo: FrodoApp,
+    sessions: int = 10,
+    turn_workers: int = 8,
+    duration: float = 0.0,
+    think_time_ms: float = 0.0,
+    seed: int = 0,
+) -> dict:
+    """Warm `frodo` up, seed orders and replay conversations; latency, throughput and error summary."""
+    warm_up_started = time.perf_counter()
+    frodo.warm_up()
+    warm_up_seconds = time.perf_counter() - warm_up_started
+    order_ids = seed_orders(frodo.orders_db) if frodo.orders_db is not None else []
+    spans = SpanCollector()
+    frodo.tracer.exporters.append(spans)
+    summary = asyncio.run(_drive(frodo, sessions, turn_workers, duration, think_time_ms, order_ids, seed))
+    frodo.tracer.flush()
+    return {
+        "sessions": sessions,
+        "turn_workers": turn_workers,
+        "warm_up_seconds": warm_up_seconds,
+        **summary,
+        "db_lock_errors": getattr(frodo.orders_db, "lock_errors", 0),
+        "model_metrics": frodo.model_metrics.stats(),
+        "openai_scheduler": frodo.openai_scheduler.stats() if frodo.openai_scheduler is not None else None,
+        "traced_turns": spans.traces,
+        "spans": spans.summary(),
+    }
+
+
+def _print_summary(results: dict):
+    latency, queue = results["turn_latency"], results["queue_delay"]
+    print(f"{results['sessions']} sessions on {results['turn_workers']} workers: {results['turns']} turns in "
+          f"{results['elapsed_seconds']:.1f}s ({results['turns_per_sec']:.2f} turns/s, {results['fast_path_turns']} on the fast path)")
+    print(f"turn latency p50 {latency['p50_ms']:.0f} ms / p95 {latency['p95_ms']:.0f} ms / p99 {latency['p99_ms']:.0f} ms, "
+          f"first token p50 {results['first_token']['p50_ms']:.0f} ms")
+    print(f"queueing delay p50 {queue['p50_ms']:.0f} ms / p95 {queue['p95_ms']:.0f} ms / p99 {queue['p99_ms']:.0f} ms")
+    for script, summary in results["by_script"].items():
+        print(f"  {script}: {summary['count']} turns, p50 {summary['p50_ms']:.0f} ms / p95 {summary['p95_ms']:.0f} ms")
+    errors_by_type = ", ".join(f"{name} x{count}" for name, count in results["errors_by_type"].items())
+    slowest = sorted(results["spans"].items(), key=lambda item: -item[1]["mean_ms"] * item[1]["count"])[:8]
+    if slowest:
+        print(f"time by span over {results['traced_turns']} traced turns:")
+    for name, summary in slowest:
+        print(f"  {name}: {summary['count']} x, mean {summary['mean_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms")
+    print(f"{results['errors']} failed turns{f' ({errors_by_type})' if errors_by_type else ''}, "
+          f"{results['db_lock_errors']} DB lock errors")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent customer sessions.")
+    parser.add_argument("--turn-workers", type=int, default=8, help="Threads running turns (like the API threadpool).")
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="Keep replaying for this many seconds (default: one conversation per session).")
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="Mean pause between a session's turns.")
+    parser.add_argument("--base-url", help="An OpenAI-compatible endpoint to use instead of the built-in fake server.")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Fake server: delay per completion.")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Fake server: random extra delay.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake server: stream pacing.")
+    parser.add_argument("--session-storage", choices=["sqlite", "postgres"], default="sqlite",
+                        help="Where agent sessions are stored (postgres uses database.url).")
+    parser.add_argument("--trace-sample-rate", type=float, default=1.0, help="Fraction of turns traced into spans.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/load-<commit>-<time>.json).")
+    args = parser.parse_args(argv)
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+
+    server = None
+    if args.base_url is None:
+        server = FakeOpenAIServer(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens_per_second=args.tokens_per_second,
+            embedding_latency_ms=0.0, seed=args.seed
+        ).start()
+        os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["OPENAI_BASE_URL"] = args.base_url or server.base_url
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            settings = loadtest_settings(load_settings(), directory, args.sessions, args.trace_sample_rate)
+            session_db_file = os.path.join(directory, "sessions.sqlite") if args.session_storage == "sqlite" else None
+            frodo = LoadTestApp(settings, session_db_file=session_db_file)
+            load = run_load(frodo, args.sessions, args.turn_workers, args.duration, args.think_time_ms, args.seed)
+            load["fake_openai"] = server.app.state.stats.snapshot() if server else None
+    finally:
+        if server is not None:
+            server.stop()
+
+    _print_summary(load)
+    results = {"environment": environment(), "results": {"load": load}}
+    env = results["environment"]
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"load-{env['commit'] or 'nocommit'}-{env['timestamp'].replace(':', '')}.json"
+    )
+    write_results(results, output)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
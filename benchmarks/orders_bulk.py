@@ -0,0 +1,76 @@
+# orders_bulk.py
+"""Compare per-row and bulk order writes.
+
+    python -m benchmarks.orders_bulk --rows 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.db.orders import SQLiteOrdersDB
+
+
+def _orders(count: int):
+    return [
+        {
+            "customer_id": f"CUST{i:08d}",
+            "product_name": "Dream Sleep Mattress",
+            "size": "Queen",
+            "price": 899.00,
+            "shipping_address": f"{i} Benchmark Ave",
+        }
+        for i in range(count)
+    ]
+
+
+def _rate(count: int, started: float) -> float:
+    return count / (time.perf_counter() - started)
+
+
+def run(rows: int) -> dict:
+    orders = _orders(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        with SQLiteOrdersDB(db_path=os.path.join(tmp, "per_row.sqlite")) as db:
+            started = time.perf_counter()
+            order_ids = [
+                db.create_order(o["customer_id"], o["product_name"], o["size"], o["price"], o["shipping_address"], "cash")
+                for o in orders
+            ]
+            per_row_create = _rate(rows, started)
+            started = time.perf_counter()
+            for order_id in order_ids:
+                db.update_order_status(order_id, "shipped")
+            per_row_update = _rate(rows, started)
+
+        with SQLiteOrdersDB(db_path=os.path.join(tmp, "bulk.sqlite")) as db:
+            started = time.perf_counter()
+            order_ids = db.bulk_create_orders(orders)["created"]
+            bulk_create = _rate(rows, started)
+            started = time.perf_counter()
+            db.bulk_update_status((order_id, "shipped") for order_id in order_ids)
+            bulk_update = _rate(rows, started)
+
+    return {
+        "rows": rows,
+        "create_rows_per_sec": {"per_row": per_row_create, "bulk": bulk_create},
+        "update_rows_per_sec": {"per_row": per_row_update, "bulk": bulk_update},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    result = run(args.rows)
+    for operation in ("create", "update"):
+        rates = result[f"{operation}_rows_per_sec"]
+        print(
+            f"{operation}: per-row {rates['per_row']:,.0f} rows/s, bulk {rates['bulk']:,.0f} rows/s "
+            f"({rates['bulk'] / rates['per_row']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
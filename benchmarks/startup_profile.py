@@ -0,0 +1,79 @@
+# startup_profile.py
+"""Profile application startup: import-time breakdown and (optionally) component build times.
+
+    python -m benchmarks.startup_profile                 # import time of src.agents.main_agent
+    python -m benchmarks.startup_profile --module src.interface.api --top 30
+    python -m benchmarks.startup_profile --build catalog review_stats knowledge_bases
+"""
+import argparse
+import subprocess
+import sys
+import time
+from typing import List
+
+
+def parse_importtime(output: str) -> List[dict]:
+    """Parse `python -X importtime` stderr into {module, self_us, cumulative_us, depth} rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # Nested imports are indented by two spaces per level
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return rows
+
+
+def profile_imports(module: str) -> List[dict]:
+    """Import `module` in a fresh interpreter and return its import-time rows."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def profile_build(components: List[str]) -> List[tuple]:
+    """Build FrodoApp components in order and return (name, seconds) pairs. May touch the DB and OpenAI."""
+    from src.agents.main_agent import build_app
+
+    frodo = build_app()
+    timings = []
+    for name in components:
+        started = time.perf_counter()
+        getattr(frodo, name)
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.agents.main_agent")
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest top-level imports to show.")
+    parser.add_argument("--build", nargs="*", metavar="COMPONENT", help="FrodoApp components to build and time.")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    target = next((row for row in rows if row["module"] == args.module), None)
+    total_ms = target["cumulative_us"] / 1000 if target else sum(row["self_us"] for row in rows) / 1000
+    print(f"import {args.module}: {total_ms:.1f} ms, {len(rows)} modules")
+    top_level = sorted((row for row in rows if row["depth"] == 0), key=lambda row: -row["cumulative_us"])
+    for row in top_level[:args.top]:
+        print(f"  {row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+
+    if args.build:
+        print("component builds:")
+        for name, seconds in profile_build(args.build):
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# suite.py
+"""Offline benchmark suite for the orders DB, ingestion and retrieval hot paths.
+
+Nothing here calls OpenAI or Postgres: embeddings come from a deterministic fake embedder and
+vectors live in the in-process LocalVectorDb, so results are reproducible on any machine.
+
+    python -m benchmarks.suite                                  # everything, JSON in benchmarks/results/
+    python -m benchmarks.suite --quick --only orders retrieval
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite compare before.json after.json   # flag regressions beyond 10%
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from phi.document import Document
+from phi.knowledge.pdf import PDFKnowledgeBase, PDFReader
+from phi.vectordb.search import SearchType
+
+from benchmarks.common import environment, latency_summary, write_results
+from benchmarks.fakes import FakeEmbedder
+from src.db.orders import SQLiteOrdersDB
+
+BENCHMARKS = ["orders", "concurrency", "ingestion", "retrieval"]
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+QUICK_ROWS = [10_000]
+PDFS = {
+    "product_catalog": "data/SWE-GenAI_Take_Home/Sleep_Better_Product_Catalog.pdf",
+    "product_reviews": "data/SWE-GenAI_Take_Home/Sleep_Better_Product_Reviews.pdf",
+}
+QUERIES = [
+    "Which mattress is best for back pain?",
+    "cooling gel memory foam for hot sleepers",
+    "What sizes does the Dream Sleep come in?",
+    "warranty and trial period",
+    "reviews mentioning firmness",
+    "price of a king size hybrid mattress",
+]
+SEED_BATCH = 50_000
+
+
+def _order(i: int) -> dict:
+    return {
+        "customer_id": f"CUST{i:08d}",
+        "product_name": "Dream Sleep Mattress",
+        "size": "Queen",
+        "price": 899.00,
+        "shipping_address": f"{i} Benchmark Ave",
+    }
+
+
+def _seed(db: SQLiteOrdersDB, rows: int) -> List[str]:
+    order_ids = []
+    for start in range(0, rows, SEED_BATCH):
+        batch = [_order(i) for i in range(start, min(rows, start + SEED_BATCH))]
+        order_ids.extend(db.bulk_create_orders(batch)["created"])
+    return order_ids
+
+
+def _timed(operation, arguments) -> dict:
+    """Run `operation` once per argument tuple; ops/sec plus latency percentiles."""
+    durations = []
+    started = time.perf_counter()
+    for args in arguments:
+        call_started = time.perf_counter()
+        operation(*args)
+        durations.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {"ops_per_sec": len(durations) / elapsed if elapsed else 0.0, **latency_summary(durations)}
+
+
+def bench_orders(rows: int, operations: int = 2000, seed: int = 0) -> dict:
+    """create / lookup / update throughput of SQLiteOrdersDB on a table pre-filled with `rows` orders."""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp, SQLiteOrdersDB(db_path=os.path.join(tmp, "orders.sqlite")) as db:
+        started = time.perf_counter()
+        order_ids = _seed(db, rows)
+        seed_seconds = time.perf_counter() - started
+
+        lookups = [(rng.choice(order_ids),) for _ in range(operations)]
+        updates = [(rng.choice(order_ids), rng.choice(["shipped", "delivered"])) for _ in range(operations)]
+        creates = [(o["customer_id"], o["product_name"], o["size"], o["price"], o["shipping_address"], "cash")
+                   for o in (_order(rows + i) for i in range(operations))]
+        return {
+            "rows": rows,
+            "seed_seconds": seed_seconds,
+            "create": _timed(db.create_order, creates),
+            "lookup": _timed(db.get_order_status, lookups),
+            "update": _timed(db.update_order_status, updates),
+        }
+
+
+def bench_concurrent_writers(writers: int, orders_per_writer: int = 500, busy_timeout_ms: int = 5000) -> dict:
+    """Throughput of `writers` threads creating orders at once through one shared SQLiteOrdersDB."""
+    with tempfile.TemporaryDirectory() as tmp, SQLiteOrdersDB(
+        db_path=os.path.join(tmp, "orders.sqlite"), busy_timeout_ms=busy_timeout_ms
+    ) as db:
+        durations: List[float] = []
+        lock_errors = [0]
+        lock = threading.Lock()
+        start = threading.Barrier(writers)
+
+        def write(writer: int):
+            local = []
+            start.wait()
+            for i in range(orders_per_writer):
+                o = _order(writer * orders_per_writer + i)
+                call_started = time.perf_counter()
+                try:
+                    db.create_order(o["customer_id"], o["product_name"], o["size"], o["price"], o["shipping_address"], "cash")
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        lock_errors[0] += 1
+                local.append(time.perf_counter() - call_started)
+            with lock:
+                durations.extend(local)
+
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        created = db._connect().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    return {
+        "writers": writers,
+        "orders": created,
+        "lock_errors": lock_errors[0],
+        "ops_per_sec": created / elapsed if elapsed else 0.0,
+        **latency_summary(durations),
+    }
+
+
+def bench_ingestion(embedder: FakeEmbedder, directory: str) -> Dict[str, dict]:
+    """Chunk + embed + store time per PDF, into a LocalVectorDb collection under `directory`.
+
+    Also the throughput of the same PDF through the parallel ingestion pipeline (one page per task).
+    """
+    from src.knowledge.local_vectordb import LocalVectorDb
+    from src.knowledge.pipeline import IngestionPipeline
+
+    results = {}
+    pipeline = IngestionPipeline(workers=2, pages_per_task=1)
+    # Start the worker processes outside the measurements
+    list(pipeline.executor.map(abs, range(2)))
+    for name, path in PDFS.items():
+        reader = PDFReader(chunk=True)
+        started = time.perf_counter()
+        documents = reader.read(pdf=path)
+        chunk_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for document in documents:
+            document.embed(embedder=embedder)
+        embed_seconds = time.perf_counter() - started
+
+        vector_db = LocalVectorDb(name, directory, embedder, search_type=SearchType.hybrid)
+        started = time.perf_counter()
+        vector_db.upsert(documents)
+        store_seconds = time.perf_counter() - started
+
+        pipeline_db = LocalVectorDb(f"{name}_pipeline", directory, embedder, search_type=SearchType.hybrid)
+        pages_before, chunks_before, seconds_before = pipeline.pages, pipeline.chunks, pipeline.seconds
+        pipeline.write(pipeline_db, pipeline.iter_chunks(Path(path), PDFReader(chunk=True)))
+        pipeline_seconds = pipeline.seconds - seconds_before
+        results[name] = {
+            "chunks": len(documents),
+            "chunk_seconds": chunk_seconds,
+            "embed_seconds": embed_seconds,
+            "store_seconds": store_seconds,
+            "total_seconds": chunk_seconds + embed_seconds + store_seconds,
+            "pipeline_seconds": pipeline_seconds,
+            "pages_per_sec": (pipeline.pages - pages_before) / pipeline_seconds,
+            "chunks_per_sec": (pipeline.chunks - chunks_before) / pipeline_seconds,
+        }
+    pipeline.close()
+    return results
+
+
+def _collection(embedder: FakeEmbedder, directory: str, size: Optional[int]):
+    """The real chunks of both PDFs, or `size` synthetic chunks made by recombining their sentences."""
+    from src.knowledge.local_vectordb import LocalVectorDb
+
+    chunks = [doc for path in PDFS.values() for doc in PDFReader(chunk=True).read(pdf=path)]
+    if size is not None:
+        rng = random.Random(size)
+        sentences = [s.strip() for doc in chunks for s in doc.content.split(".") if s.strip()]
+        chunks = [
+            Document(id=f"synthetic-{i}", name="synthetic", content=". ".join(rng.sample(sentences, 6)))
+            for i in range(size)
+        ]
+    vector_db = LocalVectorDb(f"retrieval_{size or 'pdfs'}", directory, embedder, search_type=SearchType.hybrid)
+    vector_db.upsert(chunks)
+    return vector_db, len(chunks)
+
+
+def bench_retrieval(embedder: FakeEmbedder, directory: str, sizes: List[Optional[int]], k: int = 5, repeats: int = 20) -> List[dict]:
+    """Top-k latency of vector, keyword and hybrid search per collection size (None = the PDFs' own chunks)."""
+    results = []
+    for size in sizes:
+        vector_db, documents = _collection(embedder, directory, size)
+        entry = {"documents": documents, "k": k}
+        for search_type, search in (
+            ("vector", vector_db.vector_search),
+            ("keyword", vector_db.keyword_search),
+            ("hybrid", vector_db.hybrid_search),
+        ):
+            search(QUERIES[0], limit=k)  # builds the BM25 index outside the timings
+            entry[search_type] = _timed(lambda query: search(query, limit=k), [(q,) for q in QUERIES * repeats])
+        results.append(entry)
+    return results
+
+
+def run_suite(only: List[str], rows: List[int], writers: List[int], retrieval_sizes: List[Optional[int]]) -> dict:
+    results = {"environment": environment(), "results": {}}
+    embedder = FakeEmbedder()
+    with tempfile.TemporaryDirectory() as directory:
+        if "orders" in only:
+            results["results"]["orders"] = [bench_orders(count) for count in rows]
+        if "concurrency" in only:
+            results["results"]["concurrency"] = [bench_concurrent_writers(count) for count in writers]
+        if "ingestion" in only:
+            results["results"]["ingestion"] = bench_ingestion(embedder, os.path.join(directory, "ingestion"))
+        if "retrieval" in only:
+            results["results"]["retrieval"] = bench_retrieval(embedder, os.path.join(directory, "retrieval"), retrieval_sizes)
+    return results
+
+
+# Comparing runs
+
+def _flatten(value, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by path; list entries are keyed by their rows/writers/documents field."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = next((f"{key}={item[key]}" for key in ("rows", "writers", "documents") if isinstance(item, dict) and key in item), str(index))
+            flat.update(_flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> List[dict]:
+    """Metrics that got worse by more than `threshold`: lower ops/sec, or higher latency/seconds/errors."""
+    before, after = _flatten(baseline["results"]), _flatten(current["results"])
+    regressions = []
+    for path, old in before.items():
+        new = after.get(path)
+        if new is None:
+            continue
+        metric = path.rsplit(".", 1)[-1]
+        if metric.endswith("per_sec"):
+            change = (old - new) / old if old else 0.0
+        elif metric.endswith(("_ms", "_seconds")) or metric == "lock_errors":
+            change = (new - old) / old if old else (1.0 if new > 0 else 0.0)
+        else:
+            continue
+        if change > threshold:
+            regressions.append({"metric": path, "baseline": old, "current": new, "worse_by": change})
+    return sorted(regressions, key=lambda regression: -regression["worse_by"])
+
+
+def _print_summary(results: dict):
+    for entry in results.get("orders", []):
+        print(f"orders @ {entry['rows']:,} rows: " + ", ".join(
+            f"{op} {entry[op]['ops_per_sec']:,.0f}/s (p95 {entry[op]['p95_ms']:.2f} ms)" for op in ("create", "lookup", "update")
+        ))
+    for entry in results.get("concurrency", []):
+        print(f"{entry['writers']} writer(s): {entry['ops_per_sec']:,.0f} orders/s, p95 {entry['p95_ms']:.2f} ms, "
+              f"{entry['lock_errors']} lock errors")
+    for name, entry in results.get("ingestion", {}).items():
+        print(f"ingest {name}: {entry['chunks']} chunks in {entry['total_seconds']:.2f}s "
+              f"(chunk {entry['chunk_seconds']:.2f}s, embed {entry['embed_seconds']:.2f}s, store {entry['store_seconds']:.2f}s); "
+              f"pipeline {entry['pages_per_sec']:.1f} pages/s, {entry['chunks_per_sec']:.1f} chunks/s")
+    for entry in results.get("retrieval", []):
+        print(f"top-{entry['k']} over {entry['documents']:,} chunks: " + ", ".join(
+            f"{kind} p50 {entry[kind]['p50_ms']:.2f} ms / p95 {entry[kind]['p95_ms']:.2f} ms" for kind in ("vector", "keyword", "hybrid")
+        ))
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        import json
+
+        parser = argparse.ArgumentParser(prog="benchmarks.suite compare", description="Compare two suite results.")
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression.")
+        args = parser.parse_args(argv[1:])
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for regression in regressions:
+            print(f"{regression['metric']}: {regression['baseline']:.4g} -> {regression['current']:.4g} "
+                  f"({regression['worse_by']:.0%} worse)")
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--rows", nargs="+", type=int, help=f"Orders table sizes (default {DEFAULT_ROWS}).")
+    parser.add_argument("--writers", nargs="+", type=int, default=[1, 4, 8], help="Concurrent writer counts.")
+    parser.add_argument("--retrieval-sizes", nargs="+", type=int, default=[10_000],
+                        help="Synthetic collection sizes, searched in addition to the PDFs' own chunks.")
+    parser.add_argument("--quick", action="store_true", help=f"Only {QUICK_ROWS} order rows.")
+    parser.add_argument("--output", help="JSON results path (default benchmarks/results/<commit>-<time>.json).")
+    args = parser.parse_args(argv)
+
+    rows = args.rows or (QUICK_ROWS if args.quick else DEFAULT_ROWS)
+    results = run_suite(args.only, rows, args.writers, [None] + args.retrieval_sizes)
+    _print_summary(results["results"])
+    env = results["environment"]
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{env['commit'] or 'nocommit'}-{env['timestamp'].replace(':', '')}.json"
+    )
+    write_results(results, output)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# async_runner.py
+"""asyncio entry points for running agents and searching knowledge bases.
+
+phidata executes tool calls (knowledge search, order DB writes, transfers to team members)
+synchronously, even inside `Agent.arun`, so a coroutine agent would still stall the event loop on
+every tool call. Instead, each agent run executes on a bounded worker pool and is exposed as a
+coroutine / async iterator, leaving the event loop free to multiplex many conversations. Work runs
+in a copy of the caller's context, so it is traced under the caller's current span.
+"""
+import asyncio
+import contextvars
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from phi.agent import Agent, RunResponse
+from phi.document import Document
+from phi.knowledge.agent import AgentKnowledge
+from src.agents.pool import AgentPool
+
+_STREAM_END = object()
+
+
+class AsyncAgentRunner:
+    """Run (and stream) sync agents from coroutines on a bounded thread pool."""
+
+    def __init__(self, max_concurrent_runs: int = 64):
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_runs, thread_name_prefix="agent-run")
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, agent: Agent) -> asyncio.Lock:
+        # An agent's memory is not safe for concurrent runs, so runs of one agent are queued
+        key = id(agent)
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = asyncio.Lock()
+                weakref.finalize(agent, self._locks.pop, key, None)
+            return lock
+
+    async def arun(self, agent: Agent, message: str, **kwargs) -> RunResponse:
+        """Run an agent to completion without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        async with self._lock_for(agent):
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self.executor, context.run, lambda: agent.run(message, stream=False, **kwargs))
+
+    async def arun_stream(self, agent: Agent, message: str, **kwargs) -> AsyncIterator[RunResponse]:
+        """Stream an agent's response chunks as they are produced."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for chunk in agent.run(message, stream=True, **kwargs):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        async with self._lock_for(agent):
+            producer = loop.run_in_executor(self.executor, contextvars.copy_context().run, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _STREAM_END:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                # Hold the agent until its run has finished, even if the consumer stopped early
+                await producer
+
+    async def acquire(self, pool: AgentPool, session_key: str) -> Agent:
+        """Get (or build) a session's agent from the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, pool.acquire, session_key)
+
+    async def asearch(self, knowledge_base: AgentKnowledge, query: str, num_documents: Optional[int] = None) -> List[Document]:
+        """Embed the query and search the vector DB off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: knowledge_base.search(query, num_documents=num_documents))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
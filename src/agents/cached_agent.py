@@ -0,0 +1,58 @@
+from typing import Any, Iterator, Optional
+
+from phi.agent import RunResponse
+from phi.utils.log import logger
+from src.agents.tiering import TieredModelAgent
+from src.agents.turns import record_turn
+from src.observability.tracing import span
+
+
+class CachedResponseAgent(TieredModelAgent):
+    """Agent that answers plain-text questions from a SemanticResponseCache when it can.
+
+    Only text-only runs that open a conversation are cached: the cache is shared by every
+    session, and a follow-up ("how much is that in King?") depends on the session's history.
+    Runs with images, audio, videos or explicit messages always go to the model. Behaves
+    exactly like Agent when response_cache is None.
+    """
+
+    response_cache: Optional[Any] = None
+
+    def _is_cacheable(self, message, kwargs) -> bool:
+        if self.response_cache is None or not isinstance(message, str):
+            return False
+        if any(kwargs.get(key) for key in ("audio", "images", "videos", "messages")):
+            return False
+        if self.storage is not None and self.session_id is not None:
+            self.load_session()
+        return not (self.memory.runs or self.memory.messages)
+
+    def run(self, message=None, *, stream: bool = False, **kwargs: Any):
+        if not self._is_cacheable(message, kwargs):
+            return super().run(message, stream=stream, **kwargs)
+
+        with span("response_cache.lookup", agent=self.name) as lookup_span:
+            cached = self.response_cache.lookup(message)
+            lookup_span.set(hit=cached is not None)
+        if cached is not None:
+            logger.debug(f"{self.name}: answered from response cache")
+            # The turn still belongs to the conversation, so follow-ups see it
+            record_turn(self, message, cached)
+            response = RunResponse(content=cached, agent_id=self.agent_id, session_id=self.session_id)
+            return iter([response]) if stream else response
+
+        if stream:
+            return self._run_and_store_stream(message, **kwargs)
+        response = super().run(message, stream=False, **kwargs)
+        if isinstance(response.content, str):
+            self.response_cache.store(message, response.content)
+        return response
+
+    def _run_and_store_stream(self, message: str, **kwargs: Any) -> Iterator[RunResponse]:
+        chunks = []
+        for chunk in super().run(message, stream=True, **kwargs):
+            if isinstance(chunk.content, str):
+                chunks.append(chunk.content)
+            yield chunk
+        # Only cache answers that streamed to completion
+        self.response_cache.store(message, "".join(chunks))
@@ -0,0 +1,458 @@
+"""Token-budgeted conversation history.
+
+phidata replays the last `num_history_responses` runs verbatim on every turn, so a long sales
+conversation re-sends thousands of stale tokens. `HistoryCompactor` keeps the most recent turns
+verbatim, rolls everything older into a one-line-per-turn running summary, and pins the facts an
+order depends on (product, size, price, shipping address, order ids) so they survive compaction.
+
+`HistoryCompactingAgent` folds each finished turn into a `ConversationContext` kept in the session's
+`session_data`, so facts and summary lines outlive the replayed window (20 runs for the reasoning
+agent, phidata's default of 3 for the sub-agents) and are never re-extracted from the whole history.
+
+Tokens are counted with tiktoken's encoding for each agent's model. Without tiktoken (or when
+its encoding files can't be loaded) they are estimated at ~4 characters per token.
+"""
+import json
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from phi.agent import Agent
+from phi.model.message import Message
+from phi.utils.log import logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_MODEL = "gpt-4o"
+# Fallback estimate when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_SNIPPET_CHARS = 160
+# Summary lines kept in session_data; older ones are only counted
+MAX_SUMMARY_LINES = 50
+SESSION_DATA_KEY = "history_context"
+
+ORDER_ID_PATTERN = re.compile(r"\bORD\d{6}\b")
+PRICE_PATTERN = re.compile(r"\$\s?(\d[\d,]*(?:\.\d{1,2})?)")
+SIZE_PATTERN = re.compile(r"\b(california king|cal king|twin xl|twin|full|queen|king)\b", re.IGNORECASE)
+PRODUCT_PATTERN = re.compile(r"\b((?:[A-Z][a-z]+[ -]){1,3}Mattress)\b")
+ADDRESS_PATTERN = re.compile(
+    r"\b\d{1,6}\s+(?:[A-Za-z0-9.'-]+\s+){1,4}"
+    r"(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Way|Court|Ct|Place|Pl|Terrace|Parkway|Pkwy)\b\.?"
+    r"(?:,\s*[A-Za-z0-9 .'#-]+){0,3}"
+)
+# "key": "value" or "key": 123 in tool-call arguments and the orders agent's JSON answers
+ARGUMENT_PATTERN = re.compile(r'"(product_name|size|price|shipping_address)"\s*:\s*(?:"([^"]*)"|([\d.]+))')
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # A model tiktoken doesn't know yet: use the encoding of current OpenAI models
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Could not load the tiktoken encoding for {model}, estimating tokens instead: {e}")
+        return None
+
+
+def count_tokens(text: Optional[str], model: str = DEFAULT_MODEL) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_text(message: Message) -> str:
+    """Text content of a message, including the arguments of any tool calls it makes."""
+    parts = []
+    if isinstance(message.content, str):
+        parts.append(message.content)
+    elif isinstance(message.content, list):
+        parts.extend(part.get("text", "") if isinstance(part, dict) else str(part) for part in message.content)
+    for tool_call in message.tool_calls or []:
+        function = tool_call.get("function") or {}
+        parts.append(f"{function.get('name', '')}({function.get('arguments', '')})")
+    return "\n".join(part for part in parts if part)
+
+
+def message_tokens(message: Message, model: str = DEFAULT_MODEL) -> int:
+    return count_tokens(message_text(message), model) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_turns(messages: List[Message]) -> List[List[Message]]:
+    """Group messages into turns, each starting at a user message.
+
+    A turn's tool calls and tool results stay together, so a verbatim turn is always valid input
+    for the model.
+    """
+    turns: List[List[Message]] = []
+    for message in messages:
+        if message.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _snippet(text: str, limit: int = SUMMARY_SNIPPET_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def summarize_turn(turn: List[Message]) -> str:
+    """One summary line per turn: what the user asked, which tools ran and how the assistant answered."""
+    asked = next((message_text(m) for m in turn if m.role == "user"), "")
+    answers = [m.content for m in turn if m.role == "assistant" and isinstance(m.content, str) and m.content.strip()]
+    tools = []
+    for message in turn:
+        for tool_call in message.tool_calls or []:
+            name = (tool_call.get("function") or {}).get("name")
+            if name and name not in tools:
+                tools.append(name)
+    line = f"- User: {_snippet(asked)}"
+    if tools:
+        line += f" | Tools: {', '.join(tools)}"
+    if answers:
+        line += f" | Assistant: {_snippet(answers[-1])}"
+    return line
+
+
+@dataclass
+class PinnedFacts:
+    """Facts an order depends on, taken from the latest mention anywhere in the conversation."""
+    product_name: Optional[str] = None
+    size: Optional[str] = None
+    price: Optional[str] = None
+    shipping_address: Optional[str] = None
+    order_ids: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.product_name or self.size or self.price or self.shipping_address or self.order_ids)
+
+    def update(self, text: str, catalog=None):
+        products = self._find_products(text, catalog)
+        if products:
+            self.product_name = products[-1]
+        sizes = SIZE_PATTERN.findall(text)
+        if sizes:
+            self.size = self._canonical_size(sizes[-1])
+        # A bare price is only pinned when it is quoted next to a product; compare-all answers list many
+        prices = PRICE_PATTERN.findall(text)
+        if prices and len(set(products)) == 1:
+            self.price = f"${prices[-1]}"
+        addresses = ADDRESS_PATTERN.findall(text)
+        if addresses:
+            self.shipping_address = addresses[-1].strip(" ,.")
+        for order_id in ORDER_ID_PATTERN.findall(text):
+            if order_id not in self.order_ids:
+                self.order_ids.append(order_id)
+        # Explicit tool arguments are the most reliable source, so they win
+        for key, quoted, number in ARGUMENT_PATTERN.findall(text):
+            value = (quoted or number).strip()
+            if not value or value.startswith("["):
+                continue
+            if key == "price":
+                value = value if value.startswith("$") else f"${value}"
+            elif key == "size":
+                value = self._canonical_size(value)
+            elif key == "product_name" and catalog is not None:
+                product = catalog.find(value)
+                value = product.name if product else value
+            setattr(self, key, value)
+
+    @staticmethod
+    def _find_products(text: str, catalog=None) -> List[str]:
+        if catalog is not None:
+            lowered = text.lower()
+            found = []
+            for product in catalog.products:
+                short_name = product.name.lower().replace(" mattress", "")
+                position = lowered.rfind(short_name)
+                if position >= 0:
+                    found.append((position, product.name))
+            return [name for _, name in sorted(found)]
+        return [" ".join(name.replace("-", " ").split()) for name in PRODUCT_PATTERN.findall(text)]
+
+    @staticmethod
+    def _canonical_size(size: str) -> str:
+        size = " ".join(size.split())
+        if size.lower() in ("cal king", "california king"):
+            return "California King"
+        if size.lower() == "twin xl":
+            return "Twin XL"
+        return size.title()
+
+    def to_text(self) -> str:
+        lines = []
+        if self.product_name:
+            lines.append(f"- Selected product: {self.product_name}")
+        if self.size:
+            lines.append(f"- Size: {self.size}")
+        if self.price:
+            lines.append(f"- Price: {self.price}")
+        if self.shipping_address:
+            lines.append(f"- Shipping address: {self.shipping_address}")
+        if self.order_ids:
+            lines.append(f"- Order IDs: {', '.join(self.order_ids)}")
+        return "\n".join(lines)
+
+
+def extract_pinned_facts(messages: List[Message], catalog=None) -> PinnedFacts:
+    facts = PinnedFacts()
+    for message in messages:
+        if message.role in ("user", "assistant", "tool"):
+            facts.update(message_text(message), catalog)
+    return facts
+
+
+@dataclass
+class ConversationContext:
+    """Pinned facts and one summary line per turn of a whole session, folded in a turn at a time."""
+    facts: PinnedFacts = field(default_factory=PinnedFacts)
+    summary: List[str] = field(default_factory=list)
+    # Turns summarized but dropped from `summary` (over MAX_SUMMARY_LINES)
+    omitted: int = 0
+    # Non-system messages of the session already folded in
+    folded_messages: int = 0
+
+    @property
+    def turns(self) -> int:
+        return self.omitted + len(self.summary)
+
+    def fold(self, messages: List[Message], catalog=None):
+        """Fold in the messages added since the last call (`messages` is the session's whole history)."""
+        # phidata inserts the system message at the front of memory on a session's first run
+        messages = [m for m in messages if m.role != "system"]
+        if len(messages) < self.folded_messages:
+            # The history was cleared or replaced: start over
+            self.facts, self.summary, self.omitted, self.folded_messages = PinnedFacts(), [], 0, 0
+        for turn in split_turns(messages[self.folded_messages:]):
+            for message in turn:
+                if message.role in ("user", "assistant", "tool"):
+                    self.facts.update(message_text(message), catalog)
+            self.summary.append(summarize_turn(turn))
+        overflow = len(self.summary) - MAX_SUMMARY_LINES
+        if overflow > 0:
+            del self.summary[:overflow]
+            self.omitted += overflow
+        self.folded_messages = len(messages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationContext":
+        return cls(
+            facts=PinnedFacts(**data.get("facts", {})),
+            summary=list(data.get("summary", [])),
+            omitted=data.get("omitted", 0),
+            folded_messages=data.get("folded_messages", 0),
+        )
+
+
+@dataclass
+class CompactionResult:
+    messages: List[Message]
+    original_tokens: int
+    compacted_tokens: int
+    summarized_turns: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+
+class HistoryCompactor:
+    """Fit conversation history into `token_budget` tokens.
+
+    History that already fits is returned unchanged. Otherwise the last `keep_recent_turns` turns
+    are kept verbatim (fewer if they alone exceed the budget, but never less than one) and older turns
+    become a single context message holding the pinned facts and a running summary, oldest summary
+    lines dropped first when even the summary does not fit.
+
+    Given the session's `ConversationContext`, the pinned facts and summary lines come from it, and the
+    context message is also added when the history fits but the session has turns before it.
+    """
+
+    def __init__(self, token_budget: int = 2000, keep_recent_turns: int = 4, catalog=None, model: str = DEFAULT_MODEL):
+        self.token_budget = token_budget
+        self.model = model
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self.compactions = 0
+        self.total_tokens_saved = 0
+
+    def compact(self, history: List[Message], context: Optional[ConversationContext] = None) -> CompactionResult:
+        original_tokens = sum(message_tokens(m, self.model) for m in history)
+        turns = split_turns(history)
+        earlier_turns = context.turns - len(turns) if context is not None else 0
+        if original_tokens <= self.token_budget and earlier_turns <= 0:
+            return CompactionResult(history, original_tokens, original_tokens)
+
+        recent = turns if original_tokens <= self.token_budget else turns[-self.keep_recent_turns:]
+        recent_tokens = [sum(message_tokens(m, self.model) for m in turn) for turn in recent]
+        while len(recent) > 1 and sum(recent_tokens) > self.token_budget:
+            recent, recent_tokens = recent[1:], recent_tokens[1:]
+        older = turns[: len(turns) - len(recent)]
+
+        context = self._context_message(older, len(recent), history, self.token_budget - sum(recent_tokens), context)
+        messages = ([context] if context is not None else []) + [m for turn in recent for m in turn]
+        result = CompactionResult(
+            messages,
+            original_tokens,
+            sum(message_tokens(m, self.model) for m in messages),
+            summarized_turns=len(older)
+        )
+        with self._lock:
+            self.compactions += 1
+            # Adding context for turns before the replayed window can cost tokens rather than save them
+            self.total_tokens_saved += max(0, result.tokens_saved)
+        return result
+
+    def _context_message(
+        self,
+        older: List[List[Message]],
+        recent_turns: int,
+        history: List[Message],
+        budget: int,
+        context: Optional[ConversationContext] = None
+    ) -> Optional[Message]:
+        header = "Context from earlier in this conversation (older turns are summarized)."
+        if context is not None:
+            # The context covers the whole session; its last `recent_turns` lines are sent verbatim
+            facts = context.facts
+            summary_lines = context.summary[: max(0, len(context.summary) - recent_turns)]
+            omitted = min(context.omitted, context.turns - recent_turns)
+        else:
+            facts = extract_pinned_facts(history, self.catalog)
+            summary_lines = [summarize_turn(turn) for turn in older]
+            omitted = 0
+        pinned = f"Pinned facts:\n{facts.to_text()}" if not facts.is_empty() else ""
+
+        def render(lines: List[str], omitted: int) -> str:
+            parts = [header]
+            if pinned:
+                parts.append(pinned)
+            if lines or omitted:
+                summary = ([f"- ({omitted} earlier turns omitted)"] if omitted else []) + lines
+                parts.append("Summary of earlier turns:\n" + "\n".join(summary))
+            return "\n\n".join(parts)
+
+        content = render(summary_lines, omitted)
+        while summary_lines and count_tokens(content, self.model) + MESSAGE_OVERHEAD_TOKENS > budget:
+            summary_lines = summary_lines[1:]
+            omitted += 1
+            content = render(summary_lines, omitted)
+        if not pinned and not summary_lines and not omitted:
+            return None
+        # System role: phidata skips system messages when it replays history, so summaries never nest
+        return Message(role="system", content=content)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "token_budget": self.token_budget,
+            "keep_recent_turns": self.keep_recent_turns,
+            "compactions": self.compactions,
+            "total_tokens_saved": self.total_tokens_saved,
+        }
+
+
+class HistoryCompactingAgent(Agent):
+    """Agent whose replayed history and chat-history tool output are kept within a token budget.
+
+    Pinned facts and summary lines come from the session's `ConversationContext` (in `session_data`),
+    so they also cover turns older than the `num_history_responses` runs phidata replays.
+    Behaves exactly like Agent when history_compactor is None.
+    """
+
+    history_compactor: Optional[Any] = None
+
+    def _conversation_context(self) -> ConversationContext:
+        """The session's context with every finished turn folded in, stored back into session_data."""
+        data = (self.session_data or {}).get(SESSION_DATA_KEY)
+        context = ConversationContext.from_dict(data) if data else ConversationContext()
+        context.fold(self.memory.messages, self.history_compactor.catalog)
+        if self.session_data is None:
+            self.session_data = {}
+        self.session_data[SESSION_DATA_KEY] = context.to_dict()
+        return context
+
+    def get_messages_for_run(self, **kwargs: Any) -> Tuple[Optional[Message], List[Message], List[Message]]:
+        system_message, user_messages, messages_for_model = super().get_messages_for_run(**kwargs)
+        extra_data = self.run_response.extra_data
+        history = extra_data.history if extra_data is not None else None
+        if self.history_compactor is None or not history:
+            return system_message, user_messages, messages_for_model
+
+        start = next((i for i, m in enumerate(messages_for_model) if m is history[0]), None)
+        if start is None:
+            return system_message, user_messages, messages_for_model
+        result = self.history_compactor.compact(history, self._conversation_context())
+        if result.messages is not history:
+            # messages_for_model is also run_response.messages, so replace the history in place
+            messages_for_model[start: start + len(history)] = result.messages
+            extra_data.history = result.messages
+            logger.info(
+                f"{self.name}: history compacted from {result.original_tokens} to {result.compacted_tokens} tokens "
+                f"({result.tokens_saved} saved, {result.summarized_turns} turns summarized)"
+            )
+        return system_message, user_messages, messages_for_model
+
+    def get_chat_history(self, num_chats: Optional[int] = None) -> str:
+        """Use this function to get the chat history between the user and agent.
+
+        Args:
+            num_chats: The number of chats to return.
+                Each chat contains 2 messages. One from the user and one from the agent.
+                Default: None
+
+        Returns:
+            str: A JSON of a list of dictionaries representing the chat history.
+                Older chats may be replaced by a summary with the key facts of the conversation.
+        """
+        if self.history_compactor is None:
+            return super().get_chat_history(num_chats=num_chats)
+        all_chats = self.memory.get_message_pairs()
+        if len(all_chats) == 0:
+            return ""
+        if num_chats is not None:
+            all_chats = all_chats[-num_chats:]
+        result = self.history_compactor.compact([message for chat in all_chats for message in chat])
+        if result.tokens_saved > 0:
+            logger.info(f"{self.name}: chat history tool output compacted ({result.tokens_saved} tokens saved)")
+        return json.dumps([message.to_dict() for message in result.messages])
+
+
+def create_history_compactors(settings: dict, catalog=None) -> Dict[str, HistoryCompactor]:
+    """One compactor per agent ("reasoning", "product_details", ...), shared by every session; {} when disabled.
+
+    Each counts tokens with the encoding of the model configured for its agent.
+    """
+    config = settings["history_compaction"]
+    if not config["enabled"]:
+        return {}
+
+    def model(agent: str) -> str:
+        agent_config = settings.get("reasoning_agent", {}) if agent == "reasoning" else settings.get("agents", {}).get(agent, {})
+        return agent_config.get("model", DEFAULT_MODEL)
+
+    return {
+        agent: HistoryCompactor(
+            token_budget=budget,
+            keep_recent_turns=config["keep_recent_turns"],
+            catalog=catalog,
+            model=model(agent)
+        )
+        for agent, budget in config["token_budgets"].items()
+    }
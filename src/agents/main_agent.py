@@ -1,80 +1,307 @@
-import json
-import os
-from phi.agent import Agent
-from phi.model.openai import OpenAIChat
-from phi.embedder.openai import OpenAIEmbedder
-from phi.knowledge.pdf import PDFKnowledgeBase, PDFReader
-from phi.storage.agent.postgres import PgAgentStorage
-from phi.vectordb.pgvector import PgVector, SearchType
-from phi.playground import Playground, serve_playground_app
-from src.agents.orders_agent import create_sqlite_orders_agent
-from src.agents.reasoning_agent import get_reasoning_agent
-from src.agents.product_agents import create_product_details_agent, create_product_reviews_agent
-# Load settings
-settings_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'settings.json')
-
-with open(settings_path) as f:
-    settings = json.load(f) 
-
-print(settings)
-
-db_url = settings["database"]["url"]
-collections = settings["database"]["collections"]
-product_details_data_path = settings["data"]["product_catalog"]
-product_reviews_data_path = settings["data"]["product_reviews"]
-
-# Vector Databases
-product_details_vector_db = PgVector(
-    table_name=collections["product_details"],
-    db_url=db_url,
-    search_type=SearchType.hybrid,
-    embedder=OpenAIEmbedder(model="text-embedding-3-small"),
-)
-
-product_reviews_vector_db = PgVector(
-    table_name=collections["product_reviews"],
-    db_url=db_url,
-    search_type=SearchType.hybrid,
-    embedder=OpenAIEmbedder(model="text-embedding-3-small"),
-)
-
-# Knowledge Bases
-product_details_kb = PDFKnowledgeBase(
-    path=product_details_data_path,
-    vector_db=product_details_vector_db,
-    reader=PDFReader(chunk=True)
-)
-
-product_reviews_kb = PDFKnowledgeBase(
-    path=product_reviews_data_path,
-    vector_db=product_reviews_vector_db,
-    reader=PDFReader(chunk=True)
-)
-
-# Load Knowledge Bases
-product_details_kb.load(upsert=True)
-product_reviews_kb.load(upsert=True)
-
-enabled_agents = []
-# Sub-Agents
-
-if settings['agents']['product_details']['enabled']:
-    product_details_agent = create_product_details_agent(product_details_kb, db_url)
-    enabled_agents.append(product_details_agent)
-    
-if settings['agents']['product_reviews']['enabled']:
-    product_reviews_agent = create_product_reviews_agent(product_reviews_kb, db_url)
-    enabled_agents.append(product_reviews_agent)
-    
-if settings['agents']['orders']['enabled']:
-    orders_agent = create_sqlite_orders_agent(db_path=settings["database"]["orders_path"], product_details_kb=product_details_kb)
-    enabled_agents.append(orders_agent)
-
-
-reasoning_agent = get_reasoning_agent(enabled_agents)
+"""Bootstrap of the Frodo application.
+
+Importing this module is cheap and side-effect free. `build_app(settings)` returns a `FrodoApp`
+whose components (knowledge bases, databases, toolkits, agents, pools) are created on first use,
+each at most once, so a caller only pays for what it touches:
+
+    frodo = build_app()
+    agent = frodo.agent_pool.acquire(session_key)
+"""
+import threading
+from functools import wraps
+from typing import TYPE_CHECKING, Optional
+
+from src.config import load_settings
+
+if TYPE_CHECKING:
+    from phi.agent import Agent
+
+
+def component(build):
+    """Turn a builder method into a property that builds once, on first access, thread-safely."""
+    name = build.__name__
+
+    @property
+    @wraps(build)
+    def getter(self):
+        components = self._components
+        if name not in components:
+            # Re-entrant: building one component may build the components it depends on
+            with self._lock:
+                if name not in components:
+                    components[name] = build(self)
+        return components[name]
+
+    return getter
+
+
+class FrodoApp:
+    """Lazily built components of the Frodo application, configured by settings.json."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.db_url = settings["database"]["url"]
+        self._components = {}
+        self._lock = threading.RLock()
+
+    def built(self) -> list:
+        """Names of the components built so far."""
+        return list(self._components)
+
+    def warm_up(self):
+        """Build every shared component an agent team needs, e.g. before a server takes traffic."""
+        self.create_agent_team()
+
+    # Knowledge Bases
+
+    @component
+    def knowledge_bases(self) -> dict:
+        from src.knowledge.bases import create_knowledge_bases
+        from src.knowledge.ingest import ingest_all
+
+        knowledge_bases = create_knowledge_bases(self.settings, scheduler=self.openai_scheduler)
+        # Load Knowledge Bases (only new or changed chunks are embedded; see src/knowledge/ingest.py)
+        if self.settings["ingestion"]["load_on_startup"]:
+            ingest_all(self.settings, knowledge_bases)
+        return knowledge_bases
+
+    @property
+    def product_details_kb(self):
+        return self.knowledge_bases["product_details"]
+
+    @property
+    def product_reviews_kb(self):
+        return self.knowledge_bases["product_reviews"]
+
+    @component
+    def response_caches(self) -> dict:
+        """Semantic answer caches for the product agents, invalidated when their PDF is re-ingested."""
+        from src.knowledge.bases import create_response_caches
+
+        return create_response_caches(self.settings, self.product_details_kb.vector_db.embedder)
+
+    # Structured data and toolkits
+
+    @component
+    def catalog(self):
+        """Structured product/size/price table parsed from the catalog PDF at ingest."""
+        from src.knowledge.catalog import load_catalog_index
+
+        return load_catalog_index(self.settings["data"]["product_catalog"], self.settings["data"]["catalog_index"])
+
+    @component
+    def catalog_toolkit(self):
+        from src.tools.catalog_lookup import CatalogToolkit
+
+        return CatalogToolkit(self.catalog)
+
+    @component
+    def review_stats(self):
+        """Per-product rating histograms and review excerpts aggregated at ingest."""
+        from src.knowledge.reviews import build_review_stats
+
+        return build_review_stats(self.settings["data"]["product_reviews"], self.settings["data"]["reviews_db"])
+
+    @component
+    def reviews_toolkit(self):
+        from src.tools.review_stats import ReviewsToolkit
+
+        return ReviewsToolkit(self.review_stats)
+
+    @component
+    def history_compactors(self) -> dict:
+        """Token-budgeted history per agent type, shared by every session (pins catalog product names)."""
+        from src.agents.history import create_history_compactors
+
+        return create_history_compactors(self.settings, catalog=self.catalog)
+
+    @component
+    def model_metrics(self):
+        """Per-agent latency and token counts of every model run, to tune the model tiers in settings.json."""
+        from src.agents.tiering import ModelMetrics
+
+        return ModelMetrics()
+
+    @component
+    def tracer(self):
+        """Samples user turns into span traces, exported to JSONL (and optionally OTLP) off the request path."""
+        from src.observability.tracing import create_tracer
+
+        return create_tracer(self.settings)
+
+    @component
+    def openai_scheduler(self):
+        """Process-wide rate limiting, prioritisation and retries of OpenAI requests, or None when disabled."""
+        from src.llm.scheduler import create_openai_scheduler
+
+        return create_openai_scheduler(self.settings)
+
+    def model_tier(self, agent: str):
+        """The configured model (and optional fallback) of a sub-agent, or of the "reasoning" agent."""
+        from src.agents.tiering import ModelTier
+
+        config = self.settings["reasoning_agent"] if agent == "reasoning" else self.settings["agents"][agent]
+        scheduler = self.openai_scheduler
+        return ModelTier.from_settings(config, http_client=scheduler.http_client if scheduler is not None else None)
+
+    # Storage, shared by every session's agents: one engine per table and one orders DB
+
+    def _agent_storage(self, table_name: str):
+        from phi.storage.agent.postgres import PgAgentStorage
+
+        return PgAgentStorage(table_name=table_name, db_url=self.db_url)
+
+    @component
+    def product_details_storage(self):
+        return self._agent_storage("product_details_sessions")
+
+    @component
+    def product_reviews_storage(self):
+        return self._agent_storage("product_reviews_sessions")
+
+    @component
+    def reasoning_storage(self):
+        """Reasoning agent sessions are stored too, so any API worker can resume any session."""
+        return self._agent_storage("reasoning_sessions")
+
+    @component
+    def orders_db(self):
+        """The shared orders database, or None when the orders agent is disabled."""
+        from src.db.orders import SQLiteOrdersDB
+
+        if not self.settings["agents"]["orders"]["enabled"]:
+            return None
+        return SQLiteOrdersDB(db_path=self.settings["database"]["orders_path"])
+
+    @component
+    def session_index(self):
+        """Newest-first, paginated listing of stored reasoning agent sessions."""
+        from src.db.session_index import SessionIndex
+
+        return SessionIndex(self.reasoning_storage, agent_id="reasoning-agent")
+
+    @component
+    def order_status_fast_path(self):
+        """Deterministic pre-router for order status questions (only when the orders agent is enabled)."""
+        from src.interface.fast_path import OrderStatusFastPath
+
+        return OrderStatusFastPath(self.orders_db) if self.orders_db is not None else None
+
+    # Agents
+
+    @component
+    def delegation_executor(self):
+        """Threads for parallel fan-out to sub-agents, shared by every session's reasoning agent."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        return ThreadPoolExecutor(
+            max_workers=self.settings["delegation"]["max_workers"],
+            thread_name_prefix="delegation"
+        )
+
+    def create_agent_team(self) -> "Agent":
+        """Build a reasoning agent and its sub-agents for one chat session.
+
+        Memory and run state are per instance; knowledge bases, storage, caches and toolkits are shared.
+        """
+        from src.agents.orders_agent import create_sqlite_orders_agent
+        from src.agents.product_agents import create_product_details_agent, create_product_reviews_agent
+        from src.agents.reasoning_agent import get_reasoning_agent
+
+        settings = self.settings
+        enabled_agents = []
+        # Sub-Agents
+
+        if settings['agents']['product_details']['enabled']:
+            product_details_agent = create_product_details_agent(
+                self.product_details_kb,
+                self.db_url,
+                tools=[self.catalog_toolkit],
+                response_cache=self.response_caches.get("product_details"),
+                storage=self.product_details_storage,
+                history_compactor=self.history_compactors.get("product_details"),
+                model_tier=self.model_tier("product_details"),
+                model_metrics=self.model_metrics
+            )
+            enabled_agents.append(product_details_agent)
+
+        if settings['agents']['product_reviews']['enabled']:
+            product_reviews_agent = create_product_reviews_agent(
+                self.product_reviews_kb,
+                self.db_url,
+                tools=[self.reviews_toolkit],
+                response_cache=self.response_caches.get("product_reviews"),
+                storage=self.product_reviews_storage,
+                history_compactor=self.history_compactors.get("product_reviews"),
+                model_tier=self.model_tier("product_reviews"),
+                model_metrics=self.model_metrics
+            )
+            enabled_agents.append(product_reviews_agent)
+
+        if settings['agents']['orders']['enabled']:
+            orders_agent = create_sqlite_orders_agent(
+                db_path=settings["database"]["orders_path"],
+                product_details_kb=self.product_details_kb,
+                orders_db=self.orders_db,
+                catalog=self.catalog,
+                history_compactor=self.history_compactors.get("orders"),
+                model_tier=self.model_tier("orders"),
+                model_metrics=self.model_metrics
+            )
+            enabled_agents.append(orders_agent)
+
+        return get_reasoning_agent(
+            enabled_agents,
+            tools=[self.catalog_toolkit],
+            delegation=settings["delegation"],
+            executor=self.delegation_executor,
+            storage=self.reasoning_storage,
+            history_compactor=self.history_compactors.get("reasoning"),
+            model_tier=self.model_tier("reasoning"),
+            model_metrics=self.model_metrics
+        )
+
+    @component
+    def agent_pool(self):
+        """One agent team per chat session, evicted when idle."""
+        from src.agents.pool import AgentPool
+
+        return AgentPool(
+            self.create_agent_team,
+            max_size=self.settings["agent_pool"]["max_sessions"],
+            idle_timeout_seconds=self.settings["agent_pool"]["idle_timeout_seconds"]
+        )
+
+    @component
+    def reasoning_agent(self) -> "Agent":
+        """A standalone agent team, e.g. for the phidata Playground."""
+        return self.create_agent_team()
+
+    # asyncio entry points: agent runs, vector search and order DB calls off the event loop
+
+    @component
+    def agent_runner(self):
+        from src.agents.async_runner import AsyncAgentRunner
+
+        return AsyncAgentRunner(max_concurrent_runs=self.settings["async_runtime"]["max_concurrent_runs"])
+
+    @component
+    def async_orders_db(self):
+        from src.db.async_orders import AsyncOrdersDB
+
+        if self.orders_db is None:
+            return None
+        return AsyncOrdersDB(self.orders_db, max_workers=self.settings["async_runtime"]["db_workers"])
+
+
+def build_app(settings: Optional[dict] = None) -> FrodoApp:
+    """Create the application from settings (settings.json by default). Nothing is built yet."""
+    return FrodoApp(settings if settings is not None else load_settings())
+
 
 # Playground App
-# app = Playground(agents=[reasoning_agent]).get_app()
+# from phi.playground import Playground, serve_playground_app
+# app = Playground(agents=[build_app().reasoning_agent]).get_app()
 
 # if __name__ == "__main__":
-#     serve_playground_app("frodo_agents:app", reload=True)
\ No newline at end of file
+#     serve_playground_app("frodo_agents:app", reload=True)
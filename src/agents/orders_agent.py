@@ -1,5 +1,4 @@
-from phi.agent import Agent
-from phi.model.openai import OpenAIChat
+from src.agents.tiering import ModelTier, TieredModelAgent, json_response_check
 from src.tools.order_manager import OrdersToolkit
 
 orders_agent_instructions = [
@@ -17,6 +16,7 @@ orders_agent_instructions = [
     "You have access to the following tools for managing orders:",
     "1. **handle_summarize_order_details**: Summarizes the details of an order before creation.",
     "   - Arguments: {args: {product_name, size, price}}",
+    "   - Product name, size and price are checked against the catalog; the catalog price always wins.",
     "   - Returns: JSON with the output of the function.",
     # "   - Example:",
     # """   {
@@ -63,6 +63,16 @@ orders_agent_instructions = [
     #        }
     #     }""",
     
+    "4. **handle_list_customer_orders**: Lists a customer's orders, a page at a time.",
+    "   - Arguments: {args: {customer_id, limit (optional), cursor (optional)}}",
+    "5. **handle_list_orders_by_status**: Lists orders in a status, oldest first.",
+    "   - Arguments: {args: {status, older_than_days (optional), limit (optional), cursor (optional)}}",
+    "6. **handle_list_orders_since**: Lists orders placed on or after a date.",
+    "   - Arguments: {args: {since (YYYY-MM-DD), limit (optional), cursor (optional)}}",
+    "7. **handle_list_overdue_orders**: Lists open orders past their estimated delivery date, most overdue first.",
+    "   - Arguments: {args: {limit (optional), cursor (optional)}}",
+    "   - When a listing says more orders are available, pass the returned cursor to get the next page.",
+    
     "Workflow for Processing Orders:",
     "1. Use the context or `product_details_agent` to fetch required information (e.g., product details).",
     "2. Invoke the relevant tool using the correct arguments.",
@@ -72,16 +82,22 @@ orders_agent_instructions = [
     "IMPORTANT: Always prioritize tool execution over formatting responses. The reasoning agent will handle formatting if necessary."
 ]
 
-def create_sqlite_orders_agent(db_path="/path/to/orders.db", product_details_kb=None):
-    orders_toolkit = OrdersToolkit(db_path=db_path)
-    return Agent(
+def create_sqlite_orders_agent(
+    db_path="/path/to/orders.db", product_details_kb=None, orders_db=None, catalog=None, history_compactor=None,
+    model_tier=None, model_metrics=None
+):
+    model_tier = model_tier or ModelTier("gpt-4o")
+    orders_toolkit = OrdersToolkit(db_path=db_path, db=orders_db, catalog=catalog)
+    return TieredModelAgent(
         name="Orders Agent",
         agent_id="orders-agent",
-        model=OpenAIChat(
-            id="gpt-4o",
-            response_format={"type": "json_object"}
-        ),
+        model=model_tier.create_model(response_format={"type": "json_object"}),
+        fallback_model=model_tier.create_fallback_model(response_format={"type": "json_object"}),
+        # Every answer must follow the JSON structure in the instructions; a small model that breaks it escalates
+        response_check=json_response_check("answer") if model_tier.escalate_on_schema_failure else None,
+        model_metrics=model_metrics,
         tools=[orders_toolkit],
+        history_compactor=history_compactor,
         knowledge=product_details_kb,
         search_knowledge=True,
         markdown=True,
@@ -0,0 +1,95 @@
+# pool.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from phi.agent import Agent
+from phi.utils.log import logger
+
+
+@dataclass
+class PooledAgent:
+    agent: Agent
+    last_used: float
+
+
+class AgentPool:
+    """Bounded pool of per-session agent instances.
+
+    Each chat session gets its own agent (and therefore its own memory and run state) built
+    by `factory`; the factory is expected to share the expensive, immutable parts such as
+    knowledge bases, storage engines and toolkits. Instances idle for longer than
+    `idle_timeout_seconds` are evicted, and the least recently used one is evicted when a
+    new session would exceed `max_size`.
+    """
+
+    def __init__(self, factory: Callable[[], Agent], max_size: int = 50, idle_timeout_seconds: float = 1800):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.created = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._agents: "OrderedDict[str, PooledAgent]" = OrderedDict()
+
+    def acquire(self, session_key: str) -> Agent:
+        """Return the agent for a session, creating one if the session has none (or it was evicted)."""
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            pooled = self._agents.get(session_key)
+            if pooled is not None:
+                pooled.last_used = now
+                self._agents.move_to_end(session_key)
+                return pooled.agent
+
+        # Build outside the lock so a slow factory does not block other sessions
+        agent = self.factory()
+        with self._lock:
+            pooled = self._agents.get(session_key)
+            if pooled is None:
+                pooled = self._agents[session_key] = PooledAgent(agent=agent, last_used=now)
+                self.created += 1
+                while len(self._agents) > self.max_size:
+                    evicted_key, _ = self._agents.popitem(last=False)
+                    self.evictions += 1
+                    logger.warning(f"Agent pool full ({self.max_size}), evicted session {evicted_key}")
+            pooled.last_used = now
+            self._agents.move_to_end(session_key)
+            return pooled.agent
+
+    def get(self, session_key: str) -> Optional[Agent]:
+        """Return the agent for a session without creating one."""
+        with self._lock:
+            pooled = self._agents.get(session_key)
+            return pooled.agent if pooled is not None else None
+
+    def release(self, session_key: str):
+        """Drop a session's agent, e.g. when the user starts a new conversation."""
+        with self._lock:
+            self._agents.pop(session_key, None)
+
+    def _evict_idle(self, now: float):
+        # Entries are kept in last-used order, so stop at the first one still within the timeout
+        while self._agents:
+            session_key, pooled = next(iter(self._agents.items()))
+            if now - pooled.last_used <= self.idle_timeout_seconds:
+                break
+            del self._agents[session_key]
+            self.evictions += 1
+            logger.info(f"Evicted idle agent for session {session_key}")
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._agents),
+                "max_size": self.max_size,
+                "created": self.created,
+                "evictions": self.evictions,
+            }
@@ -1,9 +1,10 @@
-from phi.agent import Agent
-from phi.model.openai import OpenAIChat
 from phi.storage.agent.postgres import PgAgentStorage
+from src.agents.cached_agent import CachedResponseAgent
+from src.agents.tiering import ModelTier
 
 # Product Details Agent Instructions
 product_details_instructions = [
+    "Use the catalog tools for prices, sizes and specs; search the knowledge base for everything else",
     "Keep responses conversational and concise",
     "Focus on 2-3 key features most relevant to the customer",
     "Use natural comparisons instead of lists",
@@ -20,6 +21,7 @@ product_details_guidelines = [
 
 # Reviews Agent Instructions
 reviews_agent_instructions = [
+    "Use the review tools for ratings, sentiment and example reviews; search the knowledge base only for reviews on a specific topic",
     "Highlight 2-3 most relevant reviews",
     "Summarize general customer sentiment",
     "Focus on reviews matching customer's interests",
@@ -34,14 +36,23 @@ reviews_agent_guidelines = [
     "Focus on specific customer concerns"
 ]
 
-def create_product_details_agent(knowledge_base, db_url):
-    return Agent(
+def create_product_details_agent(
+    knowledge_base, db_url, tools=None, response_cache=None, storage=None, history_compactor=None,
+    model_tier=None, model_metrics=None
+):
+    model_tier = model_tier or ModelTier("gpt-4o")
+    return CachedResponseAgent(
         name="Product Details Agent",
         agent_id="product-details-agent",
-        model=OpenAIChat(id="gpt-4o"),
+        model=model_tier.create_model(),
+        fallback_model=model_tier.create_fallback_model(),
+        model_metrics=model_metrics,
+        tools=tools,
+        response_cache=response_cache,
+        history_compactor=history_compactor,
         search_knowledge=True,
         knowledge=knowledge_base,
-        storage=PgAgentStorage(table_name="product_details_sessions", db_url=db_url),
+        storage=storage or PgAgentStorage(table_name="product_details_sessions", db_url=db_url),
         instructions=product_details_instructions,
         guidelines=product_details_guidelines,
         description="Sleep consultant focusing on product features and comparisons",
@@ -57,14 +68,23 @@ def create_product_details_agent(knowledge_base, db_url):
         add_history_to_messages=True
     )
 
-def create_product_reviews_agent(knowledge_base, db_url):
-    return Agent(
+def create_product_reviews_agent(
+    knowledge_base, db_url, tools=None, response_cache=None, storage=None, history_compactor=None,
+    model_tier=None, model_metrics=None
+):
+    model_tier = model_tier or ModelTier("gpt-4o")
+    return CachedResponseAgent(
         name="Product Reviews Agent",
         agent_id="product-reviews-agent",
-        model=OpenAIChat(id="gpt-4o"),
+        model=model_tier.create_model(),
+        fallback_model=model_tier.create_fallback_model(),
+        model_metrics=model_metrics,
+        tools=tools,
+        response_cache=response_cache,
+        history_compactor=history_compactor,
         search_knowledge=True,
         knowledge=knowledge_base,
-        storage=PgAgentStorage(table_name="product_reviews_sessions", db_url=db_url),
+        storage=storage or PgAgentStorage(table_name="product_reviews_sessions", db_url=db_url),
         instructions=reviews_agent_instructions,
         guidelines=reviews_agent_guidelines,
         description="Sleep consultant focusing on customer feedback and experiences",
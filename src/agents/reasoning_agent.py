@@ -1,6 +1,11 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from phi.agent import Agent
-from phi.model.openai import OpenAIChat
+from phi.storage.agent.base import AgentStorage
+from phi.tools import Toolkit
+from src.agents.history import HistoryCompactor
+from src.agents.tiering import ModelMetrics, ModelTier, TieredModelAgent
+from src.tools.delegation import ParallelDelegationToolkit
 
 reasoning_instructions = [
     "You are Frodo, a friendly and knowledgeable assistant specializing in Sleep Better products.",
@@ -14,7 +19,7 @@ reasoning_instructions = [
     
     "Order Processing Workflow:",
     "1. When the customer expresses interest in placing an order:",
-    "   - Retrieve product details using the product_details_agent and context.",
+    "   - Look up the price and available sizes with the catalog tools (handle_get_product_price, handle_get_product_specs); use the product_details_agent only for other product questions.",
     "   - Send the following JSON request to the orders_agent, ensuring all arguments are part of a dictionary:",
     """   {
            "command": "handle_summarize_order_details",
@@ -68,17 +73,64 @@ reasoning_instructions = [
     "5. If a required agent is unavailable, respond politely with: 'I'm sorry, but I am unable to assist with [specific task] right now. Please try again later.'"
 ]
 
-def get_reasoning_agent(enabled_agents: List[Agent] = []) -> Agent:
-    """Create the main reasoning agent (Frodo) for Sleep Better customer support."""
-    return Agent(
+parallel_delegation_instructions = [
+    "Parallel Delegation:",
+    "When a request needs answers from several agents that do not depend on each other (for example product specs and customer reviews), "
+    "send all of them in one handle_delegate_parallel call instead of transferring to the agents one at a time:",
+    """   {
+           "command": "handle_delegate_parallel",
+           "arguments": {
+               "args": {
+                   "tasks": [
+                       {"agent": "product_details_agent", "task": "[complete task description]", "expected_output": "[what you need back]"},
+                       {"agent": "product_reviews_agent", "task": "[complete task description]", "expected_output": "[what you need back]"}
+                   ]
+               }
+           }
+        }""",
+    "Only transfer to a single agent when one task needs the result of another.",
+]
+
+def get_reasoning_agent(
+    enabled_agents: List[Agent] = [],
+    tools: Optional[List[Toolkit]] = None,
+    delegation: Optional[dict] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+    storage: Optional[AgentStorage] = None,
+    history_compactor: Optional[HistoryCompactor] = None,
+    model_tier: Optional[ModelTier] = None,
+    model_metrics: Optional[ModelMetrics] = None
+) -> Agent:
+    """Create the main reasoning agent (Frodo) for Sleep Better customer support.
+
+    With `delegation["parallel"]` set, the agent also gets a tool that fans independent tasks out to
+    several team members concurrently. With a `history_compactor`, replayed history is kept within its
+    token budget. `model_tier` picks the model (and optional fallback model); runs are recorded in
+    `model_metrics`.
+    """
+    model_tier = model_tier or ModelTier("gpt-4o")
+    instructions = reasoning_instructions
+    if delegation and delegation["parallel"] and len(enabled_agents) > 1:
+        tools = (tools or []) + [ParallelDelegationToolkit(
+            enabled_agents,
+            member_timeout_seconds=delegation["member_timeout_seconds"],
+            executor=executor
+        )]
+        instructions = reasoning_instructions + parallel_delegation_instructions
+    return TieredModelAgent(
         name="Reasoning Agent",
         agent_id="reasoning-agent",
-        model=OpenAIChat(
-            id="gpt-4o"
-        ),
+        model=model_tier.create_model(),
+        fallback_model=model_tier.create_fallback_model(),
+        # phidata would otherwise build the reasoning model itself, with its own OpenAI client
+        reasoning_model=model_tier.create_model(),
+        model_metrics=model_metrics,
         description="Sleep consultant coordinating seamless customer interactions",
-        instructions=reasoning_instructions,
+        instructions=instructions,
         team=enabled_agents,
+        storage=storage,
+        history_compactor=history_compactor,
+        tools=tools,
         reasoning=True,
         markdown=True,
         read_chat_history=True,
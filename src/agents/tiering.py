@@ -0,0 +1,265 @@
+"""Per-agent model tiers from settings.json.
+
+Each agent runs on its configured `model`. With a `fallback_model`, a run that fails on the primary
+model is retried on the fallback, and with `escalate_on_schema_failure` a run whose answer fails the
+agent's response check (e.g. the orders agent's JSON contract) is retried there too, so a small model
+can go first. Latency and token counts of every run are recorded per agent in `ModelMetrics`, and
+each run, its reasoning and its tool calls are traced as spans of the current turn.
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from phi.agent import RunResponse
+from phi.model.openai import OpenAIChat
+from phi.utils.log import logger
+from src.agents.history import HistoryCompactingAgent
+from src.observability.tracing import current_span, span, traced
+
+LATENCY_SAMPLES = 1000
+
+
+@dataclass
+class ModelTier:
+    model: str
+    fallback_model: Optional[str] = None
+    escalate_on_schema_failure: bool = False
+    # The OpenAI scheduler's client: requests are rate limited and retried there, not by the OpenAI client
+    http_client: Optional[Any] = None
+
+    @classmethod
+    def from_settings(cls, config: dict, http_client: Optional[Any] = None) -> "ModelTier":
+        return cls(
+            model=config["model"],
+            fallback_model=config.get("fallback_model"),
+            escalate_on_schema_failure=config.get("escalate_on_schema_failure", False),
+            http_client=http_client
+        )
+
+    def _client_kwargs(self) -> dict:
+        return {"http_client": self.http_client, "max_retries": 0} if self.http_client is not None else {}
+
+    def create_model(self, **kwargs: Any) -> OpenAIChat:
+        return OpenAIChat(id=self.model, **self._client_kwargs(), **kwargs)
+
+    def create_fallback_model(self, **kwargs: Any) -> Optional[OpenAIChat]:
+        return OpenAIChat(id=self.fallback_model, **self._client_kwargs(), **kwargs) if self.fallback_model else None
+
+
+def json_response_check(*required_keys: str) -> Callable[[Any], bool]:
+    """Response check for agents that must answer with a JSON object containing `required_keys`."""
+    def check(content: Any) -> bool:
+        if not isinstance(content, str):
+            return False
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return False
+        return isinstance(data, dict) and all(key in data for key in required_keys)
+
+    return check
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ModelMetrics:
+    """Thread-safe per-agent run counters: latency, tokens, and how often fallback/escalation kicked in."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, dict] = {}
+
+    def record(
+        self,
+        agent: str,
+        model: str,
+        latency: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        outcome: str = "ok"
+    ):
+        """`outcome` is "ok", "escalated" (answered by the fallback model), "schema_failure" or "error"."""
+        with self._lock:
+            entry = self._agents.setdefault(agent, {
+                "runs": 0,
+                "outcomes": {},
+                "models": {},
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "latency_total": 0.0,
+                "latencies": deque(maxlen=LATENCY_SAMPLES),
+            })
+            entry["runs"] += 1
+            entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            entry["models"][model] = entry["models"].get(model, 0) + 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["latency_total"] += latency
+            entry["latencies"].append(latency)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                agent: {
+                    "runs": entry["runs"],
+                    "outcomes": dict(entry["outcomes"]),
+                    "models": dict(entry["models"]),
+                    "input_tokens": entry["input_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "avg_latency": entry["latency_total"] / entry["runs"],
+                    "p50_latency": _percentile(entry["latencies"], 0.5),
+                    "p95_latency": _percentile(entry["latencies"], 0.95),
+                }
+                for agent, entry in self._agents.items()
+            }
+
+
+def _token_counts(run_response: Optional[RunResponse]) -> tuple:
+    """Input and output tokens summed over every model call of a run (phidata keeps one value per call)."""
+    metrics = (run_response.metrics if run_response is not None else None) or {}
+
+    def total(key: str) -> int:
+        value = metrics.get(key, 0)
+        return int(sum(value)) if isinstance(value, list) else int(value or 0)
+
+    return total("input_tokens"), total("output_tokens")
+
+
+class TieredModelAgent(HistoryCompactingAgent):
+    """Agent with an optional fallback model, a response check for escalation, and run metrics.
+
+    Escalation never repeats tool calls: a run that already called tools is not rerun on the fallback
+    model. If its answer fails the check it is returned as is, and if the model then errors the error is raised.
+    With a response check, streamed runs are answered in one chunk, since the answer has to be checked
+    before it is passed on. Behaves exactly like its parent when none of the fields are set.
+    """
+
+    fallback_model: Optional[Any] = None
+    response_check: Optional[Callable[[Any], bool]] = None
+    model_metrics: Optional[Any] = None
+
+    def _model_id(self) -> str:
+        return getattr(self.model, "id", "unknown")
+
+    def _record(self, started: float, outcome: str, run_response: Optional[RunResponse] = None):
+        latency = time.perf_counter() - started
+        input_tokens, output_tokens = _token_counts(run_response)
+        current_span().set(model=self._model_id(), input_tokens=input_tokens, output_tokens=output_tokens, outcome=outcome)
+        logger.info(
+            f"{self.name}: {self._model_id()} answered in {latency:.2f}s "
+            f"({input_tokens} input / {output_tokens} output tokens, {outcome})"
+        )
+        if self.model_metrics is not None:
+            self.model_metrics.record(self.name, self._model_id(), latency, input_tokens, output_tokens, outcome)
+
+    def run(self, message=None, *, stream: bool = False, **kwargs: Any):
+        if self.fallback_model is None and self.response_check is None and self.model_metrics is None:
+            return super().run(message, stream=stream, **kwargs)
+        if stream and self.response_check is None:
+            return self._run_stream(message, **kwargs)
+        response = self._run_checked(message, **kwargs)
+        return iter([response]) if stream else response
+
+    def _run_stream(self, message, **kwargs: Any) -> Iterator[RunResponse]:
+        with span(f"agent {self.name}", agent=self.name, stream=True):
+            started = time.perf_counter()
+            previous_response, messages = self.run_response, len(self.memory.messages)
+            first_chunk = True
+            try:
+                for chunk in super().run(message, stream=True, **kwargs):
+                    first_chunk = False
+                    yield chunk
+            except Exception as e:
+                # Nothing has been passed on yet, so the fallback model can still answer the whole run,
+                # unless tools already ran: the fallback would run them again
+                if not first_chunk or self.fallback_model is None or self._called_tools(previous_response, messages):
+                    self._record(started, "error")
+                    raise
+                logger.warning(f"{self.name}: {self._model_id()} failed ({e}), falling back to {self.fallback_model.id}")
+                with self._using_fallback():
+                    yield from super().run(message, stream=True, **kwargs)
+                    self._record(started, "escalated", self.run_response)
+                return
+            self._record(started, "ok", self.run_response)
+
+    def _run_checked(self, message, **kwargs: Any) -> RunResponse:
+        with span(f"agent {self.name}", agent=self.name, stream=False):
+            return self._run_checked_untraced(message, **kwargs)
+
+    def _run_checked_untraced(self, message, **kwargs: Any) -> RunResponse:
+        started = time.perf_counter()
+        previous_response = self.run_response
+        runs, messages = len(self.memory.runs), len(self.memory.messages)
+        try:
+            response = super().run(message, stream=False, **kwargs)
+        except Exception as e:
+            if self.fallback_model is None or self._called_tools(previous_response, messages):
+                self._record(started, "error")
+                raise
+            logger.warning(f"{self.name}: {self._model_id()} failed ({e}), falling back to {self.fallback_model.id}")
+            return self._escalate(message, started, runs, messages, **kwargs)
+
+        if self.response_check is None or self.response_check(response.content):
+            self._record(started, "ok", response)
+            return response
+        if self.fallback_model is None or response.tools:
+            self._record(started, "schema_failure", response)
+            return response
+        logger.warning(f"{self.name}: {self._model_id()} answer failed the response check, escalating to {self.fallback_model.id}")
+        self._record(started, "schema_failure", response)
+        return self._escalate(message, time.perf_counter(), runs, messages, **kwargs)
+
+    def _called_tools(self, previous_response: Optional[RunResponse], messages: int) -> bool:
+        """Whether the run that just failed had already called tools (e.g. created an order)."""
+        new_messages = list(self.memory.messages[messages:])
+        run_response = self.run_response
+        if run_response is not None and run_response is not previous_response:
+            if run_response.tools:
+                return True
+            # phi appends tool calls and results to the run's messages as the model makes them;
+            # the ones after the last user message belong to this run, earlier ones are history
+            run_messages = run_response.messages or []
+            user_messages = [i for i, m in enumerate(run_messages) if m.role == "user"]
+            new_messages += run_messages[user_messages[-1] + 1:] if user_messages else run_messages
+        return any(m.role == "tool" or m.tool_calls for m in new_messages)
+
+    def _escalate(self, message, started: float, runs: int, messages: int, **kwargs: Any) -> RunResponse:
+        # Drop the failed attempt from memory so the fallback model does not see it as history
+        del self.memory.runs[runs:]
+        del self.memory.messages[messages:]
+        with self._using_fallback():
+            response = super().run(message, stream=False, **kwargs)
+            self._record(started, "escalated", response)
+        return response
+
+    def reason(self, *args: Any, **kwargs: Any) -> Iterator[RunResponse]:
+        with span("reasoning", agent=self.name) as reasoning_span:
+            yield from super().reason(*args, **kwargs)
+            extra_data = self.run_response.extra_data
+            reasoning_span.set(steps=len((extra_data.reasoning_steps if extra_data else None) or []))
+
+    def update_model(self) -> None:
+        super().update_model()
+        # Tool calls (including transfers to team members) run in a span each. Toolkit functions are
+        # shared between agents, so each one is wrapped once.
+        for name, function in (self.model.functions or {}).items():
+            if function.entrypoint is not None and not getattr(function.entrypoint, "__traced__", False):
+                function.entrypoint = traced(f"tool {name}")(function.entrypoint)
+
+    @contextmanager
+    def _using_fallback(self):
+        primary = self.model
+        self.model = self.fallback_model
+        try:
+            yield
+        finally:
+            self.model = primary
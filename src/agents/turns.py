@@ -0,0 +1,25 @@
+# turns.py
+from phi.agent import Agent
+from phi.memory.agent import AgentRun
+from phi.model.message import Message
+from phi.run.response import RunResponse
+
+
+def record_turn(agent: Agent, prompt: str, answer: str):
+    """Add a turn answered outside the agent to its memory, so it shows in the chat history
+    and is part of the context for the agent's next run."""
+    if agent.storage is not None:
+        # The agent may be a fresh instance (another worker served the earlier turns):
+        # start from the stored session, or writing it back would drop those turns
+        agent.read_from_storage()
+    user_message = Message(role="user", content=prompt)
+    assistant_message = Message(role="assistant", content=answer)
+    agent.memory.add_messages([user_message, assistant_message])
+    agent.memory.add_run(
+        AgentRun(
+            message=user_message,
+            response=RunResponse(content=answer, messages=[user_message, assistant_message])
+        )
+    )
+    if agent.storage is not None:
+        agent.write_to_storage()
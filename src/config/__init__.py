@@ -0,0 +1,10 @@
+import json
+import os
+
+settings_path = os.path.join(os.path.dirname(__file__), 'settings.json')
+
+
+def load_settings(path: str = settings_path) -> dict:
+    """Load the application settings from settings.json."""
+    with open(path) as f:
+        return json.load(f)
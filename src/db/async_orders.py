@@ -0,0 +1,60 @@
+# async_orders.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
+
+from src.db.orders import SQLiteOrdersDB
+
+
+class AsyncOrdersDB:
+    """asyncio facade over SQLiteOrdersDB.
+
+    Every call runs on a small dedicated thread pool, so awaiting an order lookup or write never
+    blocks the event loop. The pool threads each keep one SQLiteOrdersDB connection open, and
+    SQLite serializes writers anyway, so a handful of workers serves any number of coroutines.
+
+    Only the API endpoints go through this facade. `OrdersToolkit` still calls the wrapped
+    SQLiteOrdersDB synchronously from agent tool calls, so the database is shared and is owned (and
+    closed) by whoever created it.
+    """
+
+    def __init__(self, db: SQLiteOrdersDB, max_workers: int = 4):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orders-db")
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(method, *args, **kwargs))
+
+    async def create_order(self, customer_id: str, product_name: str, size: str, price: float, shipping_address: str, payment_method: str) -> str:
+        return await self._call(self.db.create_order, customer_id, product_name, size, price, shipping_address, payment_method)
+
+    async def get_order_status(self, order_id: str) -> Optional[dict]:
+        return await self._call(self.db.get_order_status, order_id)
+
+    async def update_order_status(self, order_id: str, new_status: str) -> bool:
+        return await self._call(self.db.update_order_status, order_id, new_status)
+
+    async def bulk_create_orders(self, orders: Iterable[dict]) -> dict:
+        return await self._call(self.db.bulk_create_orders, list(orders))
+
+    async def bulk_update_status(self, updates: Iterable[Tuple[str, str]]) -> dict:
+        return await self._call(self.db.bulk_update_status, list(updates))
+
+    async def list_orders_by_customer(self, customer_id: str, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._call(self.db.list_orders_by_customer, customer_id, limit=limit, after=after)
+
+    async def list_orders_by_status(self, status: str, older_than: Optional[datetime] = None, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._call(self.db.list_orders_by_status, status, older_than=older_than, limit=limit, after=after)
+
+    async def list_orders_since(self, since: datetime, limit: int = 100, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._call(self.db.list_orders_since, since, limit=limit, after=after)
+
+    async def list_overdue_orders(self, as_of: datetime, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self._call(self.db.list_overdue_orders, as_of, limit=limit, after=after)
+
+    def close(self):
+        """Stop the worker threads; the shared SQLiteOrdersDB stays open for its other users."""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,120 @@
+# import_orders.py
+"""Stream partner order files into the orders database in bounded-memory chunks.
+
+    python -m src.db.import_orders orders.csv --kind create
+    python -m src.db.import_orders updates.jsonl --kind status --chunk-size 5000
+
+CSV files need a header row. Order rows use the `bulk_create_orders` fields; status rows
+need `order_id` and `status` (or `new_status`).
+"""
+import argparse
+import csv
+import json
+import time
+from itertools import islice
+from typing import Iterator, NamedTuple, Union
+
+from src.config import load_settings
+from src.db.orders import SQLiteOrdersDB
+
+
+class MalformedRecord(NamedTuple):
+    """A JSONL line that is not a JSON object; reported as a failed row instead of aborting the import."""
+    error: str
+
+
+def read_records(path: str) -> Iterator[Union[dict, MalformedRecord]]:
+    """Yield one dict per CSV row or JSONL line without loading the file."""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield MalformedRecord(f"Invalid JSON: {e.msg}")
+                    continue
+                if not isinstance(record, dict):
+                    yield MalformedRecord(f"Expected a JSON object, got {type(record).__name__}")
+                    continue
+                yield record
+
+
+def chunked(records: Iterator[dict], chunk_size: int) -> Iterator[list]:
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_orders(db: SQLiteOrdersDB, path: str, kind: str = "create", chunk_size: int = 1000) -> dict:
+    """
+    Import a CSV/JSONL file one chunk (and one transaction) at a time.
+
+    Failed rows, including malformed JSONL lines, are reported with their 1-based record number
+    in the file; they never stop the import.
+    Returns {"processed": n, "succeeded": n, "failed": [...], "seconds": s, "rows_per_sec": r}.
+    """
+    started = time.perf_counter()
+    processed, succeeded, failed = 0, 0, []
+    for chunk in chunked(read_records(path), chunk_size):
+        # Record numbers of the well-formed records, by their index in the bulk call
+        rows, records = [], []
+        for row, record in enumerate(chunk, start=processed + 1):
+            if isinstance(record, MalformedRecord):
+                failed.append({"row": row, "error": record.error})
+            else:
+                rows.append(row)
+                records.append(record)
+        processed += len(chunk)
+        if not records:
+            continue
+        if kind == "create":
+            result = db.bulk_create_orders(records)
+            succeeded += len(result["created"])
+        else:
+            result = db.bulk_update_status(
+                (record.get("order_id"), record.get("status") or record.get("new_status")) for record in records
+            )
+            succeeded += result["updated"]
+        for failure in result["failed"]:
+            failure["row"] = rows[failure["row"]]
+            failed.append(failure)
+    failed.sort(key=lambda failure: failure["row"])
+
+    seconds = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "seconds": seconds,
+        "rows_per_sec": processed / seconds if seconds else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import orders or status updates from CSV/JSONL.")
+    parser.add_argument("path", help="CSV (with header) or JSONL file")
+    parser.add_argument("--kind", choices=["create", "status"], default="create")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--db-path", default=None, help="Defaults to database.orders_path in settings.json")
+    args = parser.parse_args()
+
+    db_path = args.db_path or load_settings()["database"]["orders_path"]
+    with SQLiteOrdersDB(db_path=db_path) as db:
+        result = import_orders(db, args.path, kind=args.kind, chunk_size=args.chunk_size)
+
+    print(
+        f"Processed {result['processed']} rows in {result['seconds']:.2f}s "
+        f"({result['rows_per_sec']:.0f} rows/s): {result['succeeded']} succeeded, {len(result['failed'])} failed"
+    )
+    for failure in result["failed"]:
+        print(f"  row {failure['row']}: {failure['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,120 +1,283 @@
 # orders.py
 import sqlite3
+import threading
+import weakref
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.observability.tracing import traced
+
+# Columns returned by the listing queries, in row order
+ORDER_COLUMNS = (
+    "order_id", "customer_id", "product_name", "size", "price", "status",
+    "order_date", "estimated_delivery", "shipping_address", "payment_method", "confirmed"
+)
+MAX_PAGE_SIZE = 100
+# Statuses in which an order is no longer waiting to be delivered
+CLOSED_STATUSES = ("delivered", "cancelled", "draft")
+BULK_CREATE_REQUIRED = ("customer_id", "product_name", "size", "price", "shipping_address")
+
+
+class _ThreadConnection:
+    """Holds a thread's connection in thread-local storage; collected when the thread exits."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def split_cursor(after: str) -> Tuple[str, str]:
+    """Split an "<order_date>|<order_id>" page cursor; ValueError if `after` is not one."""
+    order_date, separator, order_id = after.partition("|")
+    if not separator or not order_date or not order_id:
+        raise ValueError(f"Invalid page cursor: {after!r}")
+    return order_date, order_id
+
+
+def _release(connections: list, lock: threading.Lock, conn: sqlite3.Connection):
+    with lock:
+        if conn in connections:
+            connections.remove(conn)
+    conn.close()
+
 
 class SQLiteOrdersDB:
-    def __init__(self, db_path: str = "orders.db"):
+    """Orders store backed by SQLite.
+
+    Each thread gets one long-lived connection (WAL journal, NORMAL sync, busy timeout), so
+    concurrent chat sessions neither reconnect per call nor fail with "database is locked".
+    A thread's connection is closed when the thread exits (Streamlit runs every rerun on a new
+    thread), so open connections stay bounded by the live threads.
+    SQL is issued as constant strings, which lets each connection's statement cache reuse the
+    compiled statements. Share one instance per database file and call `close()` (or use it as
+    a context manager) when done.
+    """
+
+    def __init__(self, db_path: str = "orders.db", busy_timeout_ms: int = 5000):
         self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._uri = False
+        self._anchor = None
+        if db_path == ":memory:":
+            # Per-thread connections to ":memory:" would each see a private database, so share one
+            # named in-memory database instead and keep it alive for the lifetime of this object
+            self.db_path = f"file:orders-{id(self)}?mode=memory&cache=shared"
+            self._uri = True
+            self._anchor = self._open()
+            with self._connections_lock:
+                self._connections.append(self._anchor)
         self._init_db()
 
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=256,
+            uri=self._uri
+        )
+        if not self._uri:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and tuning it on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            return holder.conn
+        conn = self._open()
+        holder = _ThreadConnection(conn)
+        self._local.holder = holder
+        with self._connections_lock:
+            self._connections.append(conn)
+        # Thread-local storage is dropped when the thread exits; close its connection with it
+        weakref.finalize(holder, _release, self._connections, self._connections_lock, conn)
+        return conn
+
+    def close(self):
+        """Close every connection opened by this instance, across all threads."""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        self._anchor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _init_db(self):
         """Create the orders table with essential fields."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    order_id TEXT PRIMARY KEY,
+                    customer_id TEXT,
+                    product_name TEXT,
+                    size TEXT,
+                    price REAL,
+                    status TEXT,
+                    order_date TEXT,
+                    estimated_delivery TEXT,
+                    shipping_address TEXT,
+                    payment_method TEXT,
+                    confirmed BOOLEAN DEFAULT FALSE
+                )
+            """)
+            # Single-row counter backing order_id allocation. It is seeded once from existing
+            # orders; afterwards allocation never scans the orders table.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS order_sequence (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("SELECT 1 FROM order_sequence WHERE name = 'orders'")
+            if cursor.fetchone() is None:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO order_sequence (name, value)
+                    SELECT 'orders', COALESCE(MAX(CAST(SUBSTR(order_id, 4) AS INTEGER)), 0)
+                    FROM orders
+                """)
+            # Secondary indexes for the listing queries. Each one ends in order_id so keyset
+            # pagination is served entirely from the index.
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_orders_customer_id
+                ON orders (customer_id, order_id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_orders_status_order_date
+                ON orders (status, order_date, order_id)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_orders_order_date
+                ON orders (order_date, order_id)
+            """)
+            # Superseded by the keyset index below
+            cursor.execute("DROP INDEX IF EXISTS idx_orders_estimated_delivery")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_orders_estimated_delivery_order_id
+                ON orders (estimated_delivery, order_id)
+            """)
+
+    def _next_order_id(self, cursor: sqlite3.Cursor) -> str:
+        """Reserve the next ORD000123-style id.
+
+        The counter UPDATE takes the write lock, so concurrent writers serialize on it and the
+        id commits or rolls back together with the caller's INSERT.
+        """
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id TEXT PRIMARY KEY,
-                customer_id TEXT,
-                product_name TEXT,
-                size TEXT,
-                price REAL,
-                status TEXT,
-                order_date TEXT,
-                estimated_delivery TEXT,
-                shipping_address TEXT,
-                payment_method TEXT,
-                confirmed BOOLEAN DEFAULT FALSE
-            )
+            UPDATE order_sequence SET value = value + 1
+            WHERE name = 'orders'
+            RETURNING value
         """)
-        conn.commit()
-        conn.close()
+        return f"ORD{cursor.fetchone()[0]:06d}"
 
+    def _reserve_order_ids(self, cursor: sqlite3.Cursor, count: int) -> List[str]:
+        """Reserve a contiguous block of `count` order ids with a single counter update."""
+        cursor.execute("""
+            UPDATE order_sequence SET value = value + ?
+            WHERE name = 'orders'
+            RETURNING value
+        """, (count,))
+        last = cursor.fetchone()[0]
+        return [f"ORD{value:06d}" for value in range(last - count + 1, last + 1)]
+
+    @traced("orders_db.create_order_draft")
     def create_order_draft(self, customer_id: str, product_name: str, size: str, price: float, shipping_address: str = None) -> str:
         """Create a draft order pending confirmation."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM orders")
-        count = cursor.fetchone()[0]
-        order_id = f"ORD{count + 1:06d}"
+            order_id = self._next_order_id(cursor)
         
-        # Set fixed 7-day delivery estimate
-        order_date = datetime.now()
-        estimated_delivery = (order_date + timedelta(days=7)).isoformat()
+            # Set fixed 7-day delivery estimate
+            order_date = datetime.now()
+            estimated_delivery = (order_date + timedelta(days=7)).isoformat()
         
-        cursor.execute("""
-            INSERT INTO orders (
-                order_id, customer_id, product_name, size, price, 
-                status, order_date, estimated_delivery, shipping_address, 
-                confirmed
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            order_id, customer_id, product_name, size, price,
-            "draft", order_date.isoformat(), estimated_delivery, 
-            shipping_address, False
-        ))
-        conn.commit()
-        conn.close()
+            cursor.execute("""
+                INSERT INTO orders (
+                    order_id, customer_id, product_name, size, price, 
+                    status, order_date, estimated_delivery, shipping_address, 
+                    confirmed
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                order_id, customer_id, product_name, size, price,
+                "draft", order_date.isoformat(), estimated_delivery, 
+                shipping_address, False
+            ))
         return order_id
 
+    @traced("orders_db.confirm_order")
     def confirm_order(self, order_id: str, payment_method: str, shipping_address: str) -> bool:
         """Confirm a draft order with payment and shipping details."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE orders 
-            SET status = 'processing',
-                confirmed = TRUE,
-                payment_method = ?,
-                shipping_address = ?
-            WHERE order_id = ? AND confirmed = FALSE
-        """, (payment_method, shipping_address, order_id))
+            cursor.execute("""
+                UPDATE orders 
+                SET status = 'processing',
+                    confirmed = TRUE,
+                    payment_method = ?,
+                    shipping_address = ?
+                WHERE order_id = ? AND confirmed = FALSE
+            """, (payment_method, shipping_address, order_id))
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+            success = cursor.rowcount > 0
         return success
 
+    @traced("orders_db.create_order")
     def create_order(self, customer_id: str, product_name: str, size: str, price: float, shipping_address: str, payment_method: str) -> str:
         """
         Directly create and confirm an order with the provided details.
         
         Returns the order_id if successful, or None if creation fails.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        # Generate a new order_id based on the current count of orders
-        cursor.execute("SELECT COUNT(*) FROM orders")
-        count = cursor.fetchone()[0]
-        order_id = f"ORD{count + 1:06d}"
+            # Allocate the next order_id in the same transaction as the INSERT
+            order_id = self._next_order_id(cursor)
         
-        # Set fixed 7-day delivery estimate
-        order_date = datetime.now()
-        estimated_delivery = (order_date + timedelta(days=7)).isoformat()
+            # Set fixed 7-day delivery estimate
+            order_date = datetime.now()
+            estimated_delivery = (order_date + timedelta(days=7)).isoformat()
         
-        cursor.execute("""
-            INSERT INTO orders (
-                order_id, customer_id, product_name, size, price, 
-                status, order_date, estimated_delivery, shipping_address, 
-                payment_method, confirmed
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            order_id, customer_id, product_name, size, price,
-            "processing", order_date.isoformat(), estimated_delivery, 
-            shipping_address, payment_method, True
-        ))
+            cursor.execute("""
+                INSERT INTO orders (
+                    order_id, customer_id, product_name, size, price, 
+                    status, order_date, estimated_delivery, shipping_address, 
+                    payment_method, confirmed
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                order_id, customer_id, product_name, size, price,
+                "processing", order_date.isoformat(), estimated_delivery, 
+                shipping_address, payment_method, True
+            ))
         
-        conn.commit()
-        conn.close()
         return order_id
 
+    @traced("orders_db.get_order_status")
     def get_order_status(self, order_id: str):
         """Fetch order status with formatted delivery date."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -123,7 +286,6 @@ class SQLiteOrdersDB:
             WHERE order_id = ?
         """, (order_id,))
         row = cursor.fetchone()
-        conn.close()
 
         if row:
             status, order_date, estimated_delivery, product_name, size, price = row
@@ -140,12 +302,212 @@ class SQLiteOrdersDB:
             }
         return None
 
+    @traced("orders_db.update_order_status")
     def update_order_status(self, order_id: str, new_status: str) -> bool:
         """Update the status of a given order."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE orders SET status = ? WHERE order_id = ?", (new_status, order_id))
+            rows_affected = cursor.rowcount
+        return rows_affected > 0
+
+    @traced("orders_db.bulk_create_orders")
+    def bulk_create_orders(self, orders: Iterable[dict]) -> dict:
+        """
+        Create many confirmed orders in one transaction.
+
+        Each order needs customer_id, product_name, size, price and shipping_address;
+        payment_method defaults to "cash". Rows that fail validation are reported and skipped,
+        the rest are inserted with a single executemany.
+
+        Returns {"created": [order_id, ...], "failed": [{"row": index, "error": message}, ...]}.
+        """
+        valid_rows, failed = [], []
+        for index, order in enumerate(orders):
+            missing = [field for field in BULK_CREATE_REQUIRED if order.get(field) in (None, "")]
+            if missing:
+                failed.append({"row": index, "error": f"Missing fields: {', '.join(missing)}"})
+                continue
+            try:
+                price = float(order["price"])
+            except (TypeError, ValueError):
+                failed.append({"row": index, "error": f"Invalid price: {order['price']}"})
+                continue
+            valid_rows.append((order, price))
+
+        if not valid_rows:
+            return {"created": [], "failed": failed}
+
+        order_date = datetime.now()
+        estimated_delivery = (order_date + timedelta(days=7)).isoformat()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
+            order_ids = self._reserve_order_ids(cursor, len(valid_rows))
+            cursor.executemany("""
+                INSERT INTO orders (
+                    order_id, customer_id, product_name, size, price,
+                    status, order_date, estimated_delivery, shipping_address,
+                    payment_method, confirmed
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    order_id, order["customer_id"], order["product_name"], order["size"], price,
+                    "processing", order_date.isoformat(), estimated_delivery,
+                    order["shipping_address"], order.get("payment_method") or "cash", True
+                )
+                for order_id, (order, price) in zip(order_ids, valid_rows)
+            ])
+        return {"created": order_ids, "failed": failed}
+
+    @traced("orders_db.bulk_update_status")
+    def bulk_update_status(self, updates: Iterable[Tuple[str, str]]) -> dict:
+        """
+        Apply many (order_id, new_status) transitions in one transaction.
+
+        Unknown order ids and empty statuses are reported per row; the remaining updates are
+        applied with a single executemany.
+
+        Returns {"updated": count, "failed": [{"row": index, "order_id": ..., "error": message}, ...]}.
+        """
+        updates = list(updates)
+        failed = []
+        candidates = []
+        for index, (order_id, new_status) in enumerate(updates):
+            if not order_id or not new_status:
+                failed.append({"row": index, "order_id": order_id, "error": "Order ID and new status are required"})
+            else:
+                candidates.append((index, order_id, new_status))
+
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
+            # Primary-key probes, chunked to stay under SQLite's bound-parameter limit
+            existing = set()
+            unique_ids = list(dict.fromkeys(order_id for _, order_id, _ in candidates))
+            for i in range(0, len(unique_ids), 500):
+                batch = unique_ids[i : i + 500]
+                cursor.execute(
+                    f"SELECT order_id FROM orders WHERE order_id IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                existing.update(row[0] for row in cursor.fetchall())
+
+            rows = []
+            for index, order_id, new_status in candidates:
+                if order_id in existing:
+                    rows.append((new_status, order_id))
+                else:
+                    failed.append({"row": index, "order_id": order_id, "error": f"No order found with ID: {order_id}"})
+            cursor.executemany("UPDATE orders SET status = ? WHERE order_id = ?", rows)
+        return {"updated": len(rows), "failed": sorted(failed, key=lambda failure: failure["row"])}
+
+    @staticmethod
+    def _page(rows: list, limit: int) -> Tuple[List[dict], bool]:
+        """Turn up to limit + 1 fetched rows into order dicts and a has-more flag."""
+        orders = [dict(zip(ORDER_COLUMNS, row)) for row in rows[:limit]]
+        for order in orders:
+            order["confirmed"] = bool(order["confirmed"])
+        return orders, len(rows) > limit
+
+    @traced("orders_db.list_orders_by_customer")
+    def list_orders_by_customer(self, customer_id: str, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        List a customer's orders oldest first, one page at a time.
+
+        Pass the returned cursor as `after` to fetch the next page; it is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conn = self._connect()
         cursor = conn.cursor()
-        cursor.execute("UPDATE orders SET status = ? WHERE order_id = ?", (new_status, order_id))
-        rows_affected = cursor.rowcount
-        conn.commit()
-        conn.close()
-        return rows_affected > 0
\ No newline at end of file
+        cursor.execute(f"""
+            SELECT {", ".join(ORDER_COLUMNS)}
+            FROM orders
+            WHERE customer_id = ? AND order_id > ?
+            ORDER BY order_id
+            LIMIT ?
+        """, (customer_id, after or "", limit + 1))
+        orders, has_more = self._page(cursor.fetchall(), limit)
+        return orders, orders[-1]["order_id"] if has_more else None
+
+    @traced("orders_db.list_orders_by_status")
+    def list_orders_by_status(self, status: str, older_than: Optional[datetime] = None, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        List orders in a given status by order date, optionally only those placed before `older_than`.
+
+        Pass the returned cursor as `after` to fetch the next page; it is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_date, after_id = split_cursor(after) if after else ("", "")
+        before_date = older_than.isoformat() if older_than else "9999"
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {", ".join(ORDER_COLUMNS)}
+            FROM orders
+            WHERE status = ? AND (order_date, order_id) > (?, ?) AND order_date < ?
+            ORDER BY order_date, order_id
+            LIMIT ?
+        """, (status, after_date, after_id, before_date, limit + 1))
+        orders, has_more = self._page(cursor.fetchall(), limit)
+        if not has_more:
+            return orders, None
+        return orders, f"{orders[-1]['order_date']}|{orders[-1]['order_id']}"
+
+    @traced("orders_db.list_orders_since")
+    def list_orders_since(self, since: datetime, limit: int = 100, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        List orders placed at or after `since` by order date.
+
+        Pass the returned cursor as `after` to fetch the next page; it is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_date, after_id = split_cursor(after) if after else (since.isoformat(), "")
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {", ".join(ORDER_COLUMNS)}
+            FROM orders
+            WHERE (order_date, order_id) > (?, ?)
+            ORDER BY order_date, order_id
+            LIMIT ?
+        """, (after_date, after_id, limit + 1))
+        orders, has_more = self._page(cursor.fetchall(), limit)
+        if not has_more:
+            return orders, None
+        return orders, f"{orders[-1]['order_date']}|{orders[-1]['order_id']}"
+
+    @traced("orders_db.list_overdue_orders")
+    def list_overdue_orders(self, as_of: datetime, limit: int = 20, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        List open orders whose estimated delivery is before `as_of`, most overdue first.
+
+        Pass the returned cursor as `after` to fetch the next page; it is None on the last page.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_delivery, after_id = split_cursor(after) if after else ("", "")
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {", ".join(ORDER_COLUMNS)}
+            FROM orders
+            WHERE (estimated_delivery, order_id) > (?, ?) AND estimated_delivery < ?
+              AND lower(status) NOT IN ({", ".join("?" * len(CLOSED_STATUSES))})
+            ORDER BY estimated_delivery, order_id
+            LIMIT ?
+        """, (after_delivery, after_id, as_of.isoformat(), *CLOSED_STATUSES, limit + 1))
+        orders, has_more = self._page(cursor.fetchall(), limit)
+        if not has_more:
+            return orders, None
+        return orders, f"{orders[-1]['estimated_delivery']}|{orders[-1]['order_id']}"
+
+    def iter_orders_since(self, since: datetime, batch_size: int = 100) -> Iterator[dict]:
+        """Yield every order placed at or after `since`, reading one bounded page at a time."""
+        after = None
+        while True:
+            orders, after = self.list_orders_since(since, limit=batch_size, after=after)
+            yield from orders
+            if after is None:
+                return
@@ -0,0 +1,86 @@
+# session_index.py
+from typing import List, Optional, Tuple
+
+from phi.utils.log import logger
+from sqlalchemy import Index, and_, or_, select
+
+MAX_PAGE_SIZE = 100
+
+
+class SessionIndex:
+    """Paginated, searchable listing of stored agent sessions.
+
+    Works on the table of a phidata agent storage (PgAgentStorage) and replaces
+    `get_all_session_ids()`, which loads every session id. Pages are newest first and use keyset
+    cursors ("created_at|session_id") backed by an (agent_id, created_at, session_id) index, so
+    a page costs the same no matter how many sessions are stored.
+    """
+
+    def __init__(self, storage, agent_id: Optional[str] = None):
+        self.storage = storage
+        self.table = storage.table
+        self.agent_id = agent_id
+        self._index = Index(
+            f"idx_{self.table.name}_agent_created",
+            self.table.c.agent_id,
+            self.table.c.created_at.desc(),
+            self.table.c.session_id.desc()
+        )
+        self._index_ready = False
+
+    def ensure_index(self):
+        """Create the listing index if the sessions table exists; safe to call repeatedly."""
+        if self._index_ready:
+            return
+        try:
+            if self.storage.table_exists():
+                self._index.create(bind=self.storage.db_engine, checkfirst=True)
+                self._index_ready = True
+        except Exception as e:
+            logger.warning(f"Could not create session index on {self.table.name}: {e}")
+
+    def page(self, limit: int = 20, after: Optional[str] = None, search: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Return up to `limit` sessions older than the `after` cursor, plus the cursor of the next page.
+
+        `search` matches the start of a session id or any part of a session name.
+        """
+        self.ensure_index()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        table = self.table
+        stmt = select(table.c.session_id, table.c.created_at, table.c.session_data)
+        if self.agent_id is not None:
+            stmt = stmt.where(table.c.agent_id == self.agent_id)
+        if after:
+            created_at, session_id = after.split("|", 1)
+            stmt = stmt.where(or_(
+                table.c.created_at < int(created_at),
+                and_(table.c.created_at == int(created_at), table.c.session_id < session_id)
+            ))
+        if search:
+            pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            stmt = stmt.where(or_(
+                table.c.session_id.like(f"{pattern}%", escape="\\"),
+                table.c.session_data["session_name"].as_string().ilike(f"%{pattern}%", escape="\\")
+            ))
+        stmt = stmt.order_by(table.c.created_at.desc(), table.c.session_id.desc()).limit(limit + 1)
+
+        try:
+            with self.storage.Session() as sess, sess.begin():
+                rows = sess.execute(stmt).fetchall()
+        except Exception as e:
+            logger.debug(f"Exception reading sessions from {table.name}: {e}")
+            return [], None
+
+        sessions = [
+            {
+                "session_id": session_id,
+                "created_at": created_at,
+                "session_name": (session_data or {}).get("session_name")
+            }
+            for session_id, created_at, session_data in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = sessions[-1]
+            next_cursor = f"{last['created_at']}|{last['session_id']}"
+        return sessions, next_cursor
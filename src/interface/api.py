@@ -0,0 +1,241 @@
+# api.py
+"""Headless HTTP API for Frodo: session-scoped chat with SSE streaming, plus order endpoints.
+
+    python -m src.interface.api --workers 4
+
+Sessions live in the reasoning agent's Postgres storage, so any worker (or replica behind a load
+balancer) can serve any session; each worker keeps its own pool of agent instances.
+"""
+import argparse
+import asyncio
+import json
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from phi.agent import Agent
+from phi.utils.log import logger
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from src.agents.async_runner import AsyncAgentRunner
+from src.agents.pool import AgentPool
+from src.agents.tiering import ModelMetrics
+from src.config import load_settings
+from src.db.async_orders import AsyncOrdersDB
+from src.db.orders import MAX_PAGE_SIZE, SQLiteOrdersDB
+from src.agents.turns import record_turn
+from src.interface.fast_path import OrderStatusFastPath
+from src.knowledge.catalog import CatalogIndex
+from src.llm.scheduler import OpenAIScheduler
+from src.observability.tracing import Tracer
+from src.tools.order_manager import OrdersToolkit
+
+
+class ChatRequest(BaseModel):
+    message: str
+    stream: bool = True
+
+
+class OrderCommandRequest(BaseModel):
+    args: Dict[str, Any] = {}
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(
+    agent_pool: AgentPool,
+    agent_runner: AsyncAgentRunner,
+    orders_db: Optional[SQLiteOrdersDB] = None,
+    async_orders_db: Optional[AsyncOrdersDB] = None,
+    catalog: Optional[CatalogIndex] = None,
+    model_metrics: Optional[ModelMetrics] = None,
+    tracer: Optional[Tracer] = None,
+    openai_scheduler: Optional[OpenAIScheduler] = None
+) -> FastAPI:
+    """Build the API around already constructed agents and databases.
+
+    Either orders database may be passed; the other is derived from it.
+    """
+    app = FastAPI(title="Sleep Better - Frodo API")
+    tracer = tracer or Tracer(sample_rate=0.0)
+    if orders_db is None and async_orders_db is not None:
+        orders_db = async_orders_db.db
+    if async_orders_db is None and orders_db is not None:
+        async_orders_db = AsyncOrdersDB(orders_db)
+        app.add_event_handler("shutdown", async_orders_db.close)
+    order_status_fast_path = OrderStatusFastPath(orders_db) if orders_db is not None else None
+    orders_toolkit = OrdersToolkit(db=orders_db, catalog=catalog) if orders_db is not None else None
+
+    # A phi Agent's memory and run state are not safe for concurrent turns, so the turns (and
+    # history reads) of a session are serialised; locks go away once no request holds them
+    session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def session_lock(session_id: str) -> asyncio.Lock:
+        lock = session_locks.get(session_id)
+        if lock is None:
+            lock = session_locks[session_id] = asyncio.Lock()
+        return lock
+
+    def get_session_agent(session_id: str) -> Agent:
+        """Return this worker's agent for a session, pointed at the session stored in Postgres."""
+        agent = agent_pool.acquire(session_id)
+        if agent.session_id != session_id:
+            # Fresh instance: the next load_session()/run() reads the session's memory from storage
+            agent.session_id = session_id
+        return agent
+
+    def require_orders() -> OrdersToolkit:
+        if orders_toolkit is None:
+            raise HTTPException(status_code=503, detail="The orders agent is disabled")
+        return orders_toolkit
+
+    async def fast_path_reply(agent: Agent, message: str) -> Optional[str]:
+        """Answer order status lookups without the LLM chain; None if the message needs the agent."""
+        if order_status_fast_path is None:
+            return None
+        answer = await run_in_threadpool(order_status_fast_path.answer, message)
+        if answer is not None:
+            await run_in_threadpool(record_turn, agent, message, answer)
+        return answer
+
+    async def stream_reply(agent: Agent, session_id: str, message: str) -> AsyncIterator[str]:
+        # The lock is taken here, not in the endpoint, so it is only held while the response is sent
+        async with session_lock(session_id):
+            answer = await fast_path_reply(agent, message)
+            if answer is not None:
+                yield sse_event("token", {"content": answer})
+                yield sse_event("done", {})
+                return
+            with tracer.trace("turn", session=session_id, stream=True):
+                try:
+                    async for chunk in agent_runner.arun_stream(agent, message):
+                        if chunk.content:
+                            yield sse_event("token", {"content": chunk.content})
+                except Exception as e:
+                    logger.error(f"Streaming run failed: {e}")
+                    yield sse_event("error", {"detail": "The agent failed to respond. Please try again."})
+                    return
+            yield sse_event("done", {})
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "agent_pool": agent_pool.stats()}
+
+    @app.get("/metrics/models")
+    async def model_stats():
+        """Per-agent model latency, token counts and fallback/escalation outcomes of this worker."""
+        return model_metrics.stats() if model_metrics is not None else {}
+
+    @app.get("/metrics/openai")
+    async def openai_stats():
+        """Queue depth, wait times, retries and embedding batch sizes of this worker's OpenAI scheduler."""
+        return openai_scheduler.stats() if openai_scheduler is not None else {}
+
+    @app.post("/sessions")
+    async def create_session():
+        session_id = str(uuid4())
+        agent = await run_in_threadpool(get_session_agent, session_id)
+        await run_in_threadpool(agent.create_session)
+        return {"session_id": session_id}
+
+    @app.get("/sessions/{session_id}/messages")
+    async def get_messages(session_id: str):
+        agent = await run_in_threadpool(get_session_agent, session_id)
+        async with session_lock(session_id):
+            # Another worker may have served later turns: always read the stored session
+            if agent.storage is not None and await run_in_threadpool(agent.read_from_storage) is None:
+                raise HTTPException(status_code=404, detail=f"No session found with ID: {session_id}")
+        return {
+            "session_id": session_id,
+            "messages": [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in agent.memory.get_messages()
+                if msg.get("role") in ["user", "assistant"] and msg.get("content") is not None
+            ]
+        }
+
+    @app.delete("/sessions/{session_id}")
+    async def end_session(session_id: str):
+        """Drop this worker's in-memory agent; the stored history is kept."""
+        agent_pool.release(session_id)
+        return {"session_id": session_id, "released": True}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def send_message(session_id: str, request: ChatRequest):
+        agent = await run_in_threadpool(get_session_agent, session_id)
+        if request.stream:
+            return StreamingResponse(stream_reply(agent, session_id, request.message), media_type="text/event-stream")
+
+        async with session_lock(session_id):
+            answer = await fast_path_reply(agent, request.message)
+            if answer is not None:
+                return {"session_id": session_id, "content": answer}
+            with tracer.trace("turn", session=session_id, stream=False):
+                response = await agent_runner.arun(agent, request.message)
+        return {"session_id": session_id, "content": response.content}
+
+    @app.post("/orders/commands/{command}")
+    def run_order_command(command: str, request: OrderCommandRequest):
+        """Run an orders toolkit command (e.g. handle_create_order) directly, without the LLM."""
+        toolkit = require_orders()
+        if command not in toolkit.functions:
+            raise HTTPException(status_code=404, detail=f"Unknown command: {command}")
+        return {"command": command, "result": getattr(toolkit, command)(request.args)}
+
+    @app.get("/orders/{order_id}")
+    async def get_order(order_id: str):
+        require_orders()
+        order = await async_orders_db.get_order_status(order_id)
+        if order is None:
+            raise HTTPException(status_code=404, detail=f"No order found with ID: {order_id}")
+        return order
+
+    @app.get("/customers/{customer_id}/orders")
+    async def list_customer_orders(customer_id: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+        require_orders()
+        try:
+            orders, next_cursor = await async_orders_db.list_orders_by_customer(customer_id, limit=limit, after=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"orders": orders, "next_cursor": next_cursor}
+
+    return app
+
+
+def create_default_app() -> FastAPI:
+    """uvicorn factory: bootstrap the agents from settings.json inside each worker process."""
+    from src.agents.main_agent import build_app
+
+    frodo = build_app()
+    frodo.warm_up()
+    return create_app(
+        frodo.agent_pool,
+        frodo.agent_runner,
+        orders_db=frodo.orders_db,
+        async_orders_db=frodo.async_orders_db,
+        catalog=frodo.catalog,
+        model_metrics=frodo.model_metrics,
+        tracer=frodo.tracer,
+        openai_scheduler=frodo.openai_scheduler
+    )
+
+
+def main():
+    import uvicorn
+
+    api_settings = load_settings()["api"]
+    parser = argparse.ArgumentParser(description="Serve the Frodo HTTP API.")
+    parser.add_argument("--host", default=api_settings["host"])
+    parser.add_argument("--port", type=int, default=api_settings["port"])
+    parser.add_argument("--workers", type=int, default=api_settings["workers"])
+    args = parser.parse_args()
+    uvicorn.run("src.interface.api:create_default_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,35 @@
 import streamlit as st
 from typing import List
+from uuid import uuid4
 from phi.utils.log import logger
-from src.agents.main_agent import reasoning_agent, settings
+from src.agents.main_agent import FrodoApp, build_app
+from src.agents.turns import record_turn
+from src.interface.history import ChatHistoryView
+from src.interface.streaming import BufferedStreamRenderer
+from src.observability.tracing import Trace, timing_rows
+
+SESSIONS_PER_PAGE = 20
+
+@st.cache_resource
+def get_frodo() -> FrodoApp:
+    """One application per Streamlit server, shared by every browser session; components build on first use"""
+    return build_app()
 
 def init_session_state():
     """Initialize session state variables"""
     if "agent" not in st.session_state:
         st.session_state.agent = None
+    if "agent_key" not in st.session_state:
+        st.session_state.agent_key = str(uuid4())
     if "agent_session_id" not in st.session_state:
         st.session_state.agent_session_id = None
+    if "history_view" not in st.session_state:
+        st.session_state.history_view = ChatHistoryView(format_assistant=format_agent_response)
+    if "last_trace" not in st.session_state:
+        st.session_state.last_trace = None
+    if "session_page_cursors" not in st.session_state:
+        # Cursor of every page visited so far; the last one is the page being shown
+        st.session_state.session_page_cursors = [None]
     if "messages" not in st.session_state:
         st.session_state.messages = [
             {
@@ -20,6 +41,8 @@ def init_session_state():
 def restart_agent():
     """Restart the agent and clear session state"""
     logger.debug("---*--- Restarting Agent ---*---")
+    get_frodo().agent_pool.release(st.session_state.agent_key)
+    st.session_state.agent_key = str(uuid4())
     st.session_state.agent = None
     st.session_state.agent_session_id = None
     st.session_state.messages = [
@@ -30,6 +53,20 @@ def restart_agent():
     ]
     st.rerun()
 
+def reset_session_pages():
+    """Go back to the newest sessions when the search changes"""
+    st.session_state.session_page_cursors = [None]
+
+def render_timings(panel, trace: Trace):
+    """Show where the last turn spent its time: one row per span, nested by call."""
+    summary = trace.summary()
+    with panel.container():
+        st.caption(
+            f"{summary['duration_ms']:.0f} ms, {summary['spans']} spans, "
+            f"{summary['input_tokens']} input / {summary['output_tokens']} output tokens"
+        )
+        st.dataframe(timing_rows(trace), hide_index=True, use_container_width=True)
+
 def format_agent_response(response: str) -> str:
     """Format the agent's response to start with 'Frodo:'"""
     if not response.startswith("Frodo:"):
@@ -45,6 +82,8 @@ def main():
     
     # Initialize session state
     init_session_state()
+    frodo = get_frodo()
+    settings = frodo.settings
     
     # Main title and subtitle
     st.title("🛏️ Sleep Better with Frodo")
@@ -54,12 +93,19 @@ def main():
     with st.sidebar:
         st.header("Configuration")
         
-        # Get the Agent
-        if "agent" not in st.session_state or st.session_state.agent is None:
-            logger.info("---*--- Creating New Agent Session ---*---")
-            st.session_state.agent = reasoning_agent
+        # Get this session's own Agent from the pool (created on first use or after idle/LRU eviction)
+        agent = frodo.agent_pool.acquire(st.session_state.agent_key)
+        if st.session_state.agent is not agent:
+            st.session_state.agent = agent
+            if st.session_state.agent_session_id is not None:
+                # The pool evicted this session's agent: resume the same conversation from storage
+                logger.info(f"Resuming session: {st.session_state.agent_session_id}")
+                agent.session_id = st.session_state.agent_session_id
+                agent.load_session(force=True)
+            else:
+                logger.info("---*--- Creating New Agent Session ---*---")
             
-        # Create Agent session and store session_id
+        # Create an Agent session only when this browser session has none yet
         try:
             if st.session_state.agent_session_id is None:
                 st.session_state.agent_session_id = st.session_state.agent.create_session()
@@ -71,18 +117,39 @@ def main():
 
         # Session Management
         if st.session_state.agent.storage:
-            agent_session_ids: List[str] = st.session_state.agent.storage.get_all_session_ids()
-            if agent_session_ids:
-                new_session_id = st.selectbox(
-                    "Session History", 
-                    options=agent_session_ids,
-                    index=agent_session_ids.index(st.session_state.agent_session_id) if st.session_state.agent_session_id in agent_session_ids else 0
-                )
-                
-                if st.session_state.agent_session_id != new_session_id:
-                    logger.info(f"Loading session: {new_session_id}")
-                    st.session_state.agent_session_id = new_session_id
-                    st.rerun()
+            search = st.text_input("Search Sessions", key="session_search", on_change=reset_session_pages)
+            sessions, next_cursor = frodo.session_index.page(
+                limit=SESSIONS_PER_PAGE,
+                after=st.session_state.session_page_cursors[-1],
+                search=search or None
+            )
+            # The current session is always selectable, even when it is not on this page
+            session_names = {session["session_id"]: session["session_name"] for session in sessions}
+            agent_session_ids: List[str] = [st.session_state.agent_session_id] + [
+                session_id for session_id in session_names if session_id != st.session_state.agent_session_id
+            ]
+            new_session_id = st.selectbox(
+                "Session History",
+                options=agent_session_ids,
+                index=0,
+                format_func=lambda session_id: session_names.get(session_id) or session_id
+            )
+
+            newer, older = st.columns(2)
+            if newer.button("Newer", disabled=len(st.session_state.session_page_cursors) == 1):
+                st.session_state.session_page_cursors.pop()
+                st.rerun()
+            if older.button("Older", disabled=next_cursor is None):
+                st.session_state.session_page_cursors.append(next_cursor)
+                st.rerun()
+
+            if st.session_state.agent_session_id != new_session_id:
+                logger.info(f"Loading session: {new_session_id}")
+                st.session_state.agent_session_id = new_session_id
+                st.session_state.agent.memory.clear()
+                st.session_state.agent.session_id = new_session_id
+                st.session_state.agent.load_session(force=True)
+                st.rerun()
 
         if st.button("New Conversation"):
             restart_agent()
@@ -92,23 +159,18 @@ def main():
         for agent_name, agent_config in settings['agents'].items():
             status = "✅ Active" if agent_config['enabled'] else "❌ Disabled"
             st.write(f"{agent_name.replace('_', ' ').title()}: {status}")
+
+        # Opt-in: turns of this session are always traced while the panel is shown
+        st.header("Turn Timings")
+        show_timings = st.toggle("Show timings of the last turn", key="show_timings")
+        timing_panel = st.empty()
+        if show_timings and st.session_state.last_trace is not None:
+            render_timings(timing_panel, st.session_state.last_trace)
     
-    # Load existing messages from agent memory
-    agent_chat_history = st.session_state.agent.memory.get_messages()
+    # Load existing messages from agent memory (only messages added since the last rerun are converted)
+    agent_chat_history = st.session_state.history_view.sync(st.session_state.agent)
     if len(agent_chat_history) > 0:
-        logger.debug("Loading chat history")
-        messages = []
-        for msg in agent_chat_history:
-            if msg.get("role") in ["user", "assistant"]:
-                if "content" in msg and msg["content"] is not None:
-                    messages.append(
-                        {
-                            "role": msg["role"],
-                            "content": format_agent_response(msg["content"]) if msg["role"] == "assistant" else msg["content"]
-                        }
-                    )
-            
-        st.session_state.messages = messages
+        st.session_state.messages = list(agent_chat_history)
     
     # Display chat history
     for message in st.session_state.messages:
@@ -128,17 +190,29 @@ def main():
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
             
-            # Show spinner while processing
-            with st.spinner("Thinking..."):
-                response = ""
-                for delta in st.session_state.agent.run(message=prompt, stream=True):
-                    if delta.content:
-                        response += delta.content
-                        formatted_response = format_agent_response(response)
-                        message_placeholder.markdown(formatted_response)
-            
-            # After streaming is complete, replace placeholder with final message
-            message_placeholder.markdown(format_agent_response(response))
+            with frodo.tracer.trace("turn", force=show_timings, session=st.session_state.agent_key) as turn:
+                # Order status lookups skip the LLM chain entirely
+                response = frodo.order_status_fast_path.answer(prompt) if frodo.order_status_fast_path else None
+                turn.set(fast_path=response is not None)
+                if response is not None:
+                    record_turn(st.session_state.agent, prompt, response)
+                    message_placeholder.markdown(format_agent_response(response))
+                else:
+                    # Show spinner while processing
+                    with st.spinner("Thinking..."):
+                        renderer = BufferedStreamRenderer(
+                            message_placeholder,
+                            flush_interval=settings["interface"]["stream_flush_interval_ms"] / 1000,
+                            flush_chars=settings["interface"]["stream_flush_chars"]
+                        )
+                        for delta in st.session_state.agent.run(message=prompt, stream=True):
+                            if delta.content:
+                                renderer.write(delta.content)
+                        # Renders the complete message once streaming is done
+                        response = renderer.finish()
+            if show_timings and turn.trace is not None:
+                st.session_state.last_trace = turn.trace
+                render_timings(timing_panel, turn.trace)
                 
             # Add final response to chat history
             st.session_state.messages.append({
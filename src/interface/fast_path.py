@@ -0,0 +1,90 @@
+# fast_path.py
+import re
+from typing import Optional
+
+from phi.utils.log import logger
+from src.db.orders import SQLiteOrdersDB
+
+ORDER_ID_PATTERN = re.compile(r"\bORD[\s#-]*(\d{1,6})\b", re.IGNORECASE)
+# A message is answered here only if every word in it is one of these: the status question itself
+# plus greetings and filler. Any other word (a complaint, a product, a second request) needs the agent.
+STATUS_WORDS = frozenset({
+    "status", "where", "when", "eta", "track", "tracking", "progress", "update", "updates",
+    "arrive", "arrives", "arriving", "arrival", "ship", "ships", "shipped", "shipping",
+    "deliver", "delivered", "delivery", "processing", "expected",
+})
+FILLER_WORDS = frozenset({
+    "hi", "hello", "hey", "please", "thanks", "thank", "you", "ok", "okay", "quick", "question",
+    "i", "me", "my", "it", "is", "has", "be", "the", "a", "an", "of", "on", "for", "to", "at", "so", "far",
+    "order", "number", "id", "what", "whats", "how", "s", "m", "d", "ll", "can", "could", "would", "will",
+    "does", "did", "want", "wanted", "like", "know", "tell", "see", "let", "check", "any", "yet", "now",
+    "current", "latest", "estimated", "date", "just",
+})
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+STATUS_TEMPLATES = {
+    "draft": (
+        "your order {order_id} for the {size} {product_name} is saved as a draft and hasn't been "
+        "confirmed yet. Just share your shipping address whenever you're ready and I'll finalize it for you."
+    ),
+    "processing": (
+        "good news! Your order {order_id} for the {size} {product_name} is being processed. "
+        "You can expect delivery by {estimated_delivery}."
+    ),
+    "shipped": (
+        "your order {order_id} for the {size} {product_name} is on its way! "
+        "It's expected to arrive by {estimated_delivery}."
+    ),
+    "delivered": (
+        "your order {order_id} for the {size} {product_name} has been delivered. "
+        "I hope you're already sleeping better!"
+    ),
+}
+DEFAULT_TEMPLATE = (
+    "your order {order_id} for the {size} {product_name} is currently {status}. "
+    "Expected delivery: {estimated_delivery}."
+)
+
+
+class OrderStatusFastPath:
+    """Answers "where is my order ORD000042?" straight from SQLite, skipping the LLM chain.
+
+    Only messages that carry exactly one order id and consist of nothing but a status question
+    (status wording and filler) are handled; everything else, including complaints about the
+    order and added requests, returns None and goes to the reasoning agent.
+    """
+
+    def __init__(self, orders_db: SQLiteOrdersDB):
+        self.orders_db = orders_db
+
+    def match(self, message: str) -> Optional[str]:
+        """Return the normalized order id if the whole message is a status query for one order."""
+        order_numbers = {int(number) for number in ORDER_ID_PATTERN.findall(message)}
+        if len(order_numbers) != 1:
+            return None
+        words = set(WORD_PATTERN.findall(ORDER_ID_PATTERN.sub(" ", message).lower()))
+        if not words <= STATUS_WORDS | FILLER_WORDS:
+            return None
+        # A bare order id ("ORD000042?") is read as a status question too
+        if words and not words & STATUS_WORDS:
+            return None
+        return f"ORD{order_numbers.pop():06d}"
+
+    def answer(self, message: str) -> Optional[str]:
+        """Render the status answer in Frodo's voice, or None to fall back to the full agent."""
+        order_id = self.match(message)
+        if order_id is None:
+            return None
+
+        status = self.orders_db.get_order_status(order_id)
+        if status is None:
+            return (
+                f"I couldn't find an order with ID {order_id}. Could you double-check the number? "
+                f"It should look like ORD000123."
+            )
+
+        logger.info(f"Answered status for {order_id} on the fast path")
+        template = STATUS_TEMPLATES.get(status["status"], DEFAULT_TEMPLATE)
+        answer = template.format(**status)
+        return f"{answer[0].upper()}{answer[1:]} Is there anything else I can help you with?"
+
@@ -0,0 +1,38 @@
+# history.py
+from typing import Callable, List, Optional, Tuple
+
+from phi.agent import Agent
+
+
+class ChatHistoryView:
+    """Chat messages for display, converted incrementally from an agent's memory.
+
+    Only messages added to `agent.memory.messages` since the last `sync` are converted; the view
+    rebuilds from scratch when the agent or its session changes (new pooled agent, a different
+    session loaded from storage) or the history shrinks. phi replaces the message list with the
+    stored one on every run, so the list itself is not part of the key.
+    """
+
+    def __init__(self, format_assistant: Callable[[str], str] = lambda content: content):
+        self.format_assistant = format_assistant
+        self.messages: List[dict] = []
+        self._key: Optional[Tuple[int, Optional[str]]] = None
+        self._synced = 0
+
+    def sync(self, agent: Agent) -> List[dict]:
+        source = agent.memory.messages
+        key = (id(agent), agent.session_id)
+        if key != self._key or len(source) < self._synced:
+            self.messages = []
+            self._key = key
+            self._synced = 0
+
+        for msg in source[self._synced:]:
+            if msg.role in ["user", "assistant"] and msg.content is not None:
+                content = msg.get_content_string()
+                self.messages.append({
+                    "role": msg.role,
+                    "content": self.format_assistant(content) if msg.role == "assistant" else content
+                })
+        self._synced = len(source)
+        return self.messages
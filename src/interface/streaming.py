@@ -0,0 +1,100 @@
+# streaming.py
+import time
+from typing import Callable, List, Optional
+
+from phi.utils.log import logger
+
+PREFIX = "Frodo:"
+
+
+class BufferedStreamRenderer:
+    """Render a streamed response into a Streamlit placeholder without per-token re-renders.
+
+    Chunks are appended to a list and the placeholder is only re-rendered when `flush_interval`
+    seconds have passed or `flush_chars` new characters have arrived since the last render. The
+    "Frodo:" prefix is decided once, from the start of the response. Time to first token and
+    tokens/sec (one streamed chunk is counted as one token) are available from `stats()`.
+    """
+
+    def __init__(
+        self,
+        placeholder,
+        flush_interval: float = 0.05,
+        flush_chars: int = 200,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        self.placeholder = placeholder
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self.clock = clock
+        self.started_at = clock()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.tokens = 0
+        self.renders = 0
+        self._parts: List[str] = []
+        self._pending_chars = 0
+        self._last_flush = self.started_at
+        self._prefix: Optional[str] = None
+
+    def _resolve_prefix(self, final: bool = False) -> Optional[str]:
+        if self._prefix is None:
+            # Chunks are non-empty, so the first len(PREFIX) chunks hold at least len(PREFIX) characters
+            head = "".join(self._parts[:len(PREFIX)])[:len(PREFIX)]
+            if head == PREFIX:
+                self._prefix = ""
+            elif final or len(head) >= len(PREFIX) or not PREFIX.startswith(head):
+                self._prefix = f"{PREFIX} "
+        return self._prefix
+
+    @property
+    def text(self) -> str:
+        """The response so far, with the "Frodo:" prefix once it has been decided."""
+        return (self._resolve_prefix() or "") + "".join(self._parts)
+
+    def write(self, chunk: str):
+        if not chunk:
+            return
+        now = self.clock()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.tokens += 1
+        self._parts.append(chunk)
+        self._pending_chars += len(chunk)
+        if self._pending_chars >= self.flush_chars or now - self._last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None):
+        # Wait until the prefix is known so the first visible render does not change shape
+        if self._resolve_prefix() is None:
+            return
+        self.placeholder.markdown(self.text)
+        self.renders += 1
+        self._pending_chars = 0
+        self._last_flush = now if now is not None else self.clock()
+
+    def finish(self) -> str:
+        """Render the complete response, log timing stats and return the final text."""
+        self.finished_at = self.clock()
+        self._resolve_prefix(final=True)
+        final_text = self.text
+        self.placeholder.markdown(final_text)
+        self.renders += 1
+        stats = self.stats()
+        logger.info(
+            f"Streamed response: {stats['tokens']} tokens, "
+            f"TTFT {stats['time_to_first_token']:.2f}s, {stats['tokens_per_second']:.1f} tokens/s, "
+            f"{self.renders} renders"
+        )
+        return final_text
+
+    def stats(self) -> dict:
+        end = self.finished_at if self.finished_at is not None else self.clock()
+        ttft = (self.first_token_at - self.started_at) if self.first_token_at is not None else 0.0
+        generation = end - self.first_token_at if self.first_token_at is not None else 0.0
+        return {
+            "tokens": self.tokens,
+            "time_to_first_token": ttft,
+            "tokens_per_second": self.tokens / generation if generation > 0 else 0.0,
+            "total_seconds": end - self.started_at,
+        }
@@ -0,0 +1,105 @@
+from phi.embedder.openai import OpenAIEmbedder
+from phi.knowledge.pdf import PDFKnowledgeBase, PDFReader
+from phi.vectordb import VectorDb
+from phi.vectordb.search import SearchType
+from src.knowledge.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.knowledge.manifest import IngestionManifest
+from src.knowledge.response_cache import SemanticResponseCache
+
+
+def create_embedder(settings: dict, scheduler=None) -> CachedEmbedder:
+    """Build the OpenAI embedder, fronted by the persistent embedding cache.
+
+    With an OpenAIScheduler, requests are rate limited by it and concurrent callers' texts are batched.
+    """
+    embedding_settings = settings["embeddings"]
+    # With a scheduler, requests are rate limited and retried there, not by the OpenAI client
+    client_params = {"http_client": scheduler.http_client, "max_retries": 0} if scheduler is not None else None
+    embedder = OpenAIEmbedder(model=embedding_settings["model"], client_params=client_params)
+    if scheduler is not None:
+        from src.llm.scheduler import BatchedEmbedder, batch_embedding_function
+
+        embedder = BatchedEmbedder(embedder=embedder, batcher=scheduler.create_embedding_batcher(batch_embedding_function(embedder)))
+    return CachedEmbedder(
+        embedder=embedder,
+        cache=EmbeddingCache(
+            db_path=embedding_settings["cache_path"],
+            max_entries=embedding_settings["cache_max_entries"]
+        )
+    )
+
+
+def create_vector_db(settings: dict, collection: str, embedder: CachedEmbedder) -> VectorDb:
+    """Hybrid-search vector collection on the backend selected by `vector_store.backend`.
+
+    "pgvector" (default) stores it in Postgres; "local" keeps it in-process (see `src.knowledge.local_vectordb`).
+    """
+    store_settings = settings["vector_store"]
+    if store_settings["backend"] == "local":
+        from src.knowledge.local_vectordb import LocalVectorDb
+
+        return LocalVectorDb(
+            collection=collection,
+            path=store_settings["local_path"],
+            embedder=embedder,
+            search_type=SearchType.hybrid,
+        )
+    if store_settings["backend"] != "pgvector":
+        raise ValueError(f"Unknown vector_store backend: {store_settings['backend']}")
+
+    from phi.vectordb.pgvector import PgVector
+
+    return PgVector(
+        table_name=collection,
+        db_url=settings["database"]["url"],
+        search_type=SearchType.hybrid,
+        embedder=embedder,
+    )
+
+
+def create_knowledge_bases(settings: dict, scheduler=None) -> dict:
+    """Build the product details and product reviews knowledge bases described in settings.
+
+    Returns a dict keyed by collection name ("product_details", "product_reviews").
+    Nothing is read or embedded here; see `src.knowledge.ingest` for loading.
+    Embedding requests go through `scheduler` (an OpenAIScheduler) when one is given.
+    """
+    collections = settings["database"]["collections"]
+    data_paths = {
+        "product_details": settings["data"]["product_catalog"],
+        "product_reviews": settings["data"]["product_reviews"],
+    }
+
+    # One embedder (and cache) shared by both collections, for ingestion and query-time search
+    embedder = create_embedder(settings, scheduler=scheduler)
+    knowledge_bases = {}
+    for name, data_path in data_paths.items():
+        knowledge_bases[name] = PDFKnowledgeBase(
+            path=data_path,
+            vector_db=create_vector_db(settings, collections[name], embedder),
+            reader=PDFReader(chunk=True)
+        )
+    return knowledge_bases
+
+
+def create_response_caches(settings: dict, embedder: CachedEmbedder) -> dict:
+    """Build one semantic response cache per collection, or an empty dict if disabled in settings.
+
+    Each cache is invalidated when its collection is re-ingested (tracked by the ingestion manifest).
+    """
+    cache_settings = settings["response_cache"]
+    if not cache_settings["enabled"]:
+        return {}
+
+    manifest = IngestionManifest(db_path=settings["ingestion"]["manifest_path"])
+    return {
+        name: SemanticResponseCache(
+            embedder=embedder,
+            similarity_threshold=cache_settings["similarity_threshold"],
+            ttl_seconds=cache_settings["ttl_seconds"],
+            max_entries=cache_settings["max_entries"],
+            version_fn=lambda collection=collection: manifest.get_collection_version(collection),
+            version_check_seconds=cache_settings["version_check_seconds"],
+        )
+        for name, collection in settings["database"]["collections"].items()
+    }
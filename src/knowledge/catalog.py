@@ -0,0 +1,218 @@
+# catalog.py
+"""Structured product index parsed from the product catalog PDF.
+
+Resolving a product's sizes and price is a dictionary lookup here instead of a vector search
+plus an LLM call, and order details supplied by the LLM are checked against it.
+"""
+import difflib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from phi.utils.log import logger
+from src.knowledge.manifest import hash_file
+
+PRODUCT_HEADER_PATTERN = re.compile(r"^\s*\d+\.\s*([A-Za-z ]+?Mattress)\s*$", re.MULTILINE)
+SIZE_ALIASES = {
+    "cal king": "California King",
+    "calking": "California King",
+    "california king": "California King",
+    "twin extra long": "Twin XL",
+    "double": "Full",
+}
+# Words customers (and the LLM) wrap around a size: "a Queen size bed", "king-sized mattress"
+SIZE_FILLER_PATTERN = re.compile(r"\b(a|an|the|size|sized|bed|mattress)\b")
+
+
+def split_words(text: str) -> str:
+    """Undo the word squashing of the PDF text layer: "UltraComfortMattress" -> "Ultra Comfort Mattress"."""
+    text = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", text)
+    text = re.sub(r"(?<=[a-zA-Z])(?=\()", " ", text)
+    return " ".join(text.split())
+
+
+def format_price(price: float) -> str:
+    return f"${price:,.0f}" if float(price).is_integer() else f"${price:,.2f}"
+
+
+def name_key(name: str) -> str:
+    """Lookup key for product names: lowercase letters only, without the "mattress" suffix."""
+    key = re.sub(r"[^a-z]", "", name.lower())
+    return key[: -len("mattress")] if key.endswith("mattress") and key != "mattress" else key
+
+
+def size_key(size: str) -> str:
+    return re.sub(r"[^a-z]", "", size.lower())
+
+
+@dataclass
+class Product:
+    name: str
+    sizes: List[str]
+    prices: Dict[str, float] = field(default_factory=dict)
+    type: Optional[str] = None
+    height_inches: Optional[float] = None
+    warranty_years: Optional[int] = None
+    trial_nights: Optional[int] = None
+
+
+@dataclass
+class OrderValidation:
+    ok: bool
+    message: str = ""
+    product_name: Optional[str] = None
+    size: Optional[str] = None
+    price: Optional[float] = None
+
+
+def _search(pattern: str, text: str) -> Optional[str]:
+    match = re.search(pattern, text, re.DOTALL)
+    return match.group(1).strip() if match else None
+
+
+def parse_catalog(text: str) -> List[Product]:
+    """Parse the catalog's text layer into one Product per "N. <Name> Mattress" section."""
+    headers = list(PRODUCT_HEADER_PATTERN.finditer(text))
+    products = []
+    for header, next_header in zip(headers, headers[1:] + [None]):
+        block = text[header.end(): next_header.start() if next_header else len(text)]
+        prices = {}
+        price_match = re.search(r"Price:\s*\$([\d,]+(?:\.\d+)?)\s*\(\s*([A-Za-z ]+?)\s*\)", block)
+        if price_match:
+            prices[split_words(price_match.group(2))] = float(price_match.group(1).replace(",", ""))
+        sizes = _search(r"Available\s*Sizes:\s*(.+?)\s*Warranty:", block) or ""
+        product_type = _search(r"Type:\s*(.+?)\s*Height:", block)
+        height = _search(r"Height:\s*([\d.]+)\s*inches", block)
+        warranty = _search(r"Warranty:\s*(\d+)\s*years", block)
+        trial = _search(r"Trial\s*Period:\s*(\d+)\s*nights", block)
+        products.append(Product(
+            name=split_words(header.group(1)),
+            sizes=[split_words(size) for size in sizes.split(",") if size.strip()],
+            prices=prices,
+            type=split_words(product_type) if product_type else None,
+            height_inches=float(height) if height else None,
+            warranty_years=int(warranty) if warranty else None,
+            trial_nights=int(trial) if trial else None,
+        ))
+    return products
+
+
+class CatalogIndex:
+    """In-memory products x sizes x prices table with fuzzy product-name matching."""
+
+    def __init__(self, products: List[Product], source_hash: Optional[str] = None):
+        self.products = products
+        self.source_hash = source_hash
+        self._by_key = {name_key(product.name): product for product in products}
+
+    @classmethod
+    def from_pdf(cls, path: str) -> "CatalogIndex":
+        from pypdf import PdfReader
+
+        text = "\n".join(page.extract_text() for page in PdfReader(path).pages)
+        products = parse_catalog(text)
+        logger.info(f"Parsed {len(products)} products from {path}")
+        return cls(products, source_hash=hash_file(path))
+
+    @classmethod
+    def load(cls, path: str) -> "CatalogIndex":
+        with open(path) as f:
+            data = json.load(f)
+        return cls([Product(**product) for product in data["products"]], source_hash=data.get("source_hash"))
+
+    def save(self, path: str):
+        """Write the index via a rename, so a worker loading it concurrently never reads half a file."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"source_hash": self.source_hash, "products": [asdict(p) for p in self.products]}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def find(self, name: str) -> Optional[Product]:
+        """Resolve a product from a loosely written name ("dream sleep", "Ultra-Comfort mattress")."""
+        key = name_key(name)
+        if not key:
+            return None
+        if key in self._by_key:
+            return self._by_key[key]
+        partial = [product for product_key, product in self._by_key.items() if key in product_key or product_key in key]
+        if len(partial) == 1:
+            return partial[0]
+        close = difflib.get_close_matches(key, list(self._by_key), n=1, cutoff=0.75)
+        return self._by_key[close[0]] if close else None
+
+    def resolve_size(self, product: Product, size: str) -> Optional[str]:
+        """Return the catalog spelling of `size` if the product comes in it."""
+        words = " ".join(SIZE_FILLER_PATTERN.sub(" ", size.lower().replace("-", " ")).split())
+        wanted = size_key(SIZE_ALIASES.get(words, words))
+        for available in product.sizes:
+            if size_key(available) == wanted:
+                return available
+        return None
+
+    def price_for(self, product_name: str, size: str) -> Optional[float]:
+        """Catalog price for a product in a size, or None when the catalog does not list one."""
+        product = self.find(product_name)
+        if product is None:
+            return None
+        resolved_size = self.resolve_size(product, size)
+        return product.prices.get(resolved_size) if resolved_size else None
+
+    def validate_order(self, product_name: str, size: str, price=None) -> OrderValidation:
+        """Check product, size and price against the catalog; the catalog's price always wins.
+
+        The LLM's price is never used: a size the catalog has no price for is rejected with a request
+        for a quote from the sales team.
+        """
+        product = self.find(product_name)
+        if product is None:
+            names = ", ".join(p.name for p in self.products)
+            return OrderValidation(ok=False, message=f"I couldn't find a product called {product_name}. Our mattresses are: {names}.")
+
+        resolved_size = self.resolve_size(product, size)
+        if resolved_size is None:
+            return OrderValidation(
+                ok=False,
+                product_name=product.name,
+                message=f"The {product.name} is available in: {', '.join(product.sizes)}."
+            )
+
+        catalog_price = product.prices.get(resolved_size)
+        if catalog_price is None:
+            listed = ", ".join(product.prices) or "no sizes"
+            return OrderValidation(
+                ok=False,
+                product_name=product.name,
+                size=resolved_size,
+                message=(
+                    f"Our catalog only lists prices for the {product.name} in: {listed}. The {resolved_size} "
+                    f"needs a quote from our sales team before I can place the order."
+                )
+            )
+        try:
+            supplied_price = float(str(price).replace("$", "").replace(",", "")) if price is not None else None
+        except ValueError:
+            supplied_price = None
+        if supplied_price is not None and abs(supplied_price - catalog_price) >= 0.01:
+            logger.warning(
+                f"Price {price} for {resolved_size} {product.name} does not match catalog price {catalog_price}; using catalog price"
+            )
+        return OrderValidation(ok=True, product_name=product.name, size=resolved_size, price=catalog_price)
+
+
+def build_catalog_index(catalog_pdf: str, index_path: str) -> CatalogIndex:
+    """Parse the catalog PDF and write the index next to the other generated data (run at ingest)."""
+    index = CatalogIndex.from_pdf(catalog_pdf)
+    index.save(index_path)
+    return index
+
+
+def load_catalog_index(catalog_pdf: str, index_path: str) -> CatalogIndex:
+    """Load the index written at ingest, rebuilding it only if it is missing or the PDF changed."""
+    if os.path.exists(index_path):
+        index = CatalogIndex.load(index_path)
+        if index.source_hash == hash_file(catalog_pdf):
+            return index
+        logger.info("Catalog PDF changed since the index was built, rebuilding")
+    return build_catalog_index(catalog_pdf, index_path)
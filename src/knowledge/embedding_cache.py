@@ -0,0 +1,212 @@
+# embedding_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from phi.embedder import Embedder
+from phi.utils.log import logger
+from src.observability.tracing import span
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before keying the cache: NFKC, collapsed whitespace, stripped."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """Disk-backed (SQLite) embedding cache keyed by (model, normalized text) with LRU eviction.
+
+    Several API workers may share the file, so it runs in WAL mode with a busy timeout. Eviction
+    uses a running entry count, re-read from the table every `recount_every` inserts to pick up
+    other processes' inserts and evictions (COUNT(*) scans the whole table). Hits only refresh
+    `last_used` when it is older than `touch_interval` seconds, so recency is kept to that
+    granularity and hot keys are served without a write.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "embedding_cache.sqlite",
+        max_entries: int = 50000,
+        busy_timeout_ms: int = 5000,
+        touch_interval: float = 60.0,
+        recount_every: int = 1000,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.busy_timeout_ms = busy_timeout_ms
+        self.touch_interval = touch_interval
+        self.recount_every = recount_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._init_db()
+        self._entries = self._count()
+        self._inserts_since_count = 0
+
+    def _init_db(self):
+        """Create the embeddings table and the LRU index."""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                embedding BLOB,
+                last_used REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode()).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up several texts in one query. Returns one embedding (or None on a miss) per text."""
+        keys = [self.make_key(model, text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        stale: List[str] = []
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, embedding, last_used FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob, last_used in rows:
+                    found[key] = array("f", blob).tolist()
+                    if last_used is None or now - last_used > self.touch_interval:
+                        stale.append(key)
+            if stale:
+                for i in range(0, len(stale), 500):
+                    batch = stale[i : i + 500]
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({','.join('?' * len(batch))})",
+                        [now] + batch,
+                    )
+                self._conn.commit()
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings for several texts and evict the least recently used entries over max_entries."""
+        now = time.time()
+        rows = [
+            (self.make_key(model, text), model, array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+            if embedding
+        ]
+        if not rows:
+            return
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            inserted = self._conn.total_changes - before
+            self._entries += inserted
+            self._inserts_since_count += inserted
+            if self._inserts_since_count >= self.recount_every:
+                # Other processes sharing the file insert and evict too
+                self._entries = self._count()
+                self._inserts_since_count = 0
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                evicted = self._conn.execute("""
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_used LIMIT ?
+                    )
+                """, (overflow,)).rowcount
+                self._entries -= evicted
+                logger.debug(f"Evicted {evicted} embeddings from cache")
+            self._conn.commit()
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        self.put_many(model, [text], [embedding])
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._count()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedder(Embedder):
+    """Embedder that serves repeated texts from an EmbeddingCache and only calls the wrapped embedder on misses.
+
+    Drop-in for OpenAIEmbedder wherever phi expects an Embedder (PgVector ingestion and search).
+    """
+
+    embedder: Embedder
+    cache: EmbeddingCache
+    batch_size: int = 100
+
+    def model_post_init(self, __context) -> None:
+        self.dimensions = self.embedder.dimensions
+
+    @property
+    def model(self) -> str:
+        return getattr(self.embedder, "model", type(self.embedder).__name__)
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embedding_and_usage(text)[0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        with span("embed", model=self.model) as embed_span:
+            embedding = self.cache.get(self.model, text)
+            embed_span.set(cache_hit=embedding is not None)
+            if embedding is not None:
+                return embedding, None
+            embedding, usage = self.embedder.get_embedding_and_usage(text)
+            self.cache.put(self.model, text, embedding)
+            return embedding, usage
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, looking them up in one batch and embedding all misses in batched requests."""
+        with span("embed_many", model=self.model, texts=len(texts)) as embed_span:
+            embeddings = self.cache.get_many(self.model, texts)
+            missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+            embed_span.set(cache_misses=len(missing))
+            computed: Dict[str, List[float]] = {}
+            for i in range(0, len(missing), self.batch_size):
+                batch = missing[i : i + self.batch_size]
+                batch_embeddings = self._embed_batch(batch)
+                self.cache.put_many(self.model, batch, batch_embeddings)
+                computed.update(zip(batch, batch_embeddings))
+        return [embedding if embedding is not None else computed[text] for text, embedding in zip(texts, embeddings)]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # A batching embedder merges the batch with other callers' texts
+        if hasattr(self.embedder, "get_embeddings"):
+            return self.embedder.get_embeddings(texts)
+        # OpenAIEmbedder.response passes `input` straight through, so a list gives one request for the batch
+        if hasattr(self.embedder, "response"):
+            response = self.embedder.response(text=texts)
+            return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+        return [self.embedder.get_embedding(text) for text in texts]
@@ -0,0 +1,182 @@
+# ingest.py
+"""Incremental ingestion of the PDF knowledge bases.
+
+Run standalone so serving processes never pay for parsing and embedding:
+
+    python -m src.knowledge.ingest [--force] [--workers 8]
+
+Changed PDFs are parsed in a process pool and streamed into batched embeddings and upserts
+(see `src.knowledge.pipeline`).
+"""
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from phi.knowledge.agent import AgentKnowledge
+from phi.utils.log import logger
+from phi.vectordb import VectorDb
+from src.config import load_settings
+from src.knowledge.catalog import load_catalog_index
+from src.knowledge.manifest import IngestionManifest, hash_chunk, hash_file
+from src.knowledge.pipeline import IngestionPipeline, create_ingestion_pipeline
+from src.knowledge.reviews import build_review_stats
+from src.llm.scheduler import request_lane
+
+
+def list_source_files(knowledge_base: AgentKnowledge) -> List[Path]:
+    """Return the PDF files a knowledge base reads, mirroring PDFKnowledgeBase.document_lists."""
+    pdf_path = Path(knowledge_base.path)
+    if pdf_path.exists() and pdf_path.is_dir():
+        return sorted(pdf_path.glob("**/*.pdf"))
+    if pdf_path.exists() and pdf_path.is_file() and pdf_path.suffix == ".pdf":
+        return [pdf_path]
+    return []
+
+
+def delete_chunks(vector_db: VectorDb, chunk_ids: List[str]):
+    """Delete rows from a vector collection by document id."""
+    if not chunk_ids:
+        return
+    if hasattr(vector_db, "delete_ids"):
+        vector_db.delete_ids(chunk_ids)
+        return
+    # PgVector has no delete-by-id API, so go through its table directly
+    with vector_db.Session() as sess, sess.begin():
+        sess.execute(vector_db.table.delete().where(vector_db.table.c.id.in_(chunk_ids)))
+
+
+def sync_knowledge_base(
+    knowledge_base: AgentKnowledge,
+    manifest: IngestionManifest,
+    collection: str,
+    force: bool = False,
+    pipeline: Optional[IngestionPipeline] = None,
+) -> Dict[str, int]:
+    """Bring a vector collection in line with its source PDFs, embedding only what changed.
+
+    Unchanged files (same sha256 as recorded in the manifest) are skipped without being
+    parsed. For changed files, only chunks whose content hash differs are embedded, and
+    chunks that no longer exist are deleted from the collection. Without a `pipeline`,
+    pages are parsed in this process.
+
+    Returns counters: files_skipped, files_ingested, chunks_embedded, chunks_deleted, pages_parsed.
+    """
+    if pipeline is None:
+        with IngestionPipeline(workers=1) as pipeline:
+            return sync_knowledge_base(knowledge_base, manifest, collection, force=force, pipeline=pipeline)
+
+    vector_db = knowledge_base.vector_db
+    stats = {"files_skipped": 0, "files_ingested": 0, "chunks_embedded": 0, "chunks_deleted": 0, "pages_parsed": 0}
+
+    # A missing collection means the manifest no longer describes what is stored
+    if not vector_db.exists():
+        logger.info(f"Collection {collection} does not exist, re-ingesting everything")
+        manifest.clear(collection)
+    vector_db.create()
+
+    source_files = list_source_files(knowledge_base)
+    current_sources = {str(pdf) for pdf in source_files}
+
+    for pdf in source_files:
+        source_path = str(pdf)
+        file_hash = hash_file(source_path)
+        if not force and manifest.get_file_hash(collection, source_path) == file_hash:
+            logger.info(f"Skipping unchanged document: {source_path}")
+            stats["files_skipped"] += 1
+            continue
+
+        previous_hashes = manifest.get_chunk_hashes(collection, source_path)
+        chunk_hashes: Dict[str, str] = {}
+        pages_before = pipeline.pages
+
+        def changed_chunks():
+            for document in pipeline.iter_chunks(pdf, knowledge_base.reader):
+                chunk_hashes[document.id] = hash_chunk(document.content)
+                if force or previous_hashes.get(document.id) != chunk_hashes[document.id]:
+                    yield document
+
+        # Chunks are written while later pages are still being parsed
+        changed = pipeline.write(vector_db, changed_chunks())
+        stale = [chunk_id for chunk_id in previous_hashes if chunk_id not in chunk_hashes]
+        delete_chunks(vector_db, stale)
+        manifest.record_document(collection, source_path, file_hash, chunk_hashes)
+
+        logger.info(
+            f"Ingested {source_path}: {changed} chunks embedded, "
+            f"{len(chunk_hashes) - changed} unchanged, {len(stale)} deleted"
+        )
+        stats["files_ingested"] += 1
+        stats["chunks_embedded"] += changed
+        stats["chunks_deleted"] += len(stale)
+        stats["pages_parsed"] += pipeline.pages - pages_before
+
+    # Sources that disappeared from disk take all their chunks with them
+    for source_path in manifest.list_sources(collection):
+        if source_path in current_sources:
+            continue
+        stale = list(manifest.get_chunk_hashes(collection, source_path))
+        delete_chunks(vector_db, stale)
+        manifest.remove_document(collection, source_path)
+        logger.info(f"Removed {source_path}: {len(stale)} chunks deleted")
+        stats["chunks_deleted"] += len(stale)
+
+    return stats
+
+
+def ingest_all(
+    settings: dict,
+    knowledge_bases: dict,
+    force: bool = False,
+    pipeline: Optional[IngestionPipeline] = None,
+) -> Dict[str, Dict[str, int]]:
+    """Sync every knowledge base against the manifest configured in settings and rebuild the structured indexes.
+
+    Embedding requests are sent in the scheduler's background lane, behind interactive chat traffic.
+    Without a `pipeline`, one is configured from `ingestion` in settings and shut down afterwards.
+    """
+    if pipeline is None:
+        with create_ingestion_pipeline(settings) as pipeline:
+            return ingest_all(settings, knowledge_bases, force=force, pipeline=pipeline)
+
+    manifest = IngestionManifest(db_path=settings["ingestion"]["manifest_path"])
+    collections = settings["database"]["collections"]
+    # Rebuilt only when the catalog PDF's hash changed
+    load_catalog_index(settings["data"]["product_catalog"], settings["data"]["catalog_index"])
+    build_review_stats(settings["data"]["product_reviews"], settings["data"]["reviews_db"], force=force)
+    with request_lane("background"):
+        results = {
+            name: sync_knowledge_base(knowledge_base, manifest, collections[name], force=force, pipeline=pipeline)
+            for name, knowledge_base in knowledge_bases.items()
+        }
+    pipeline_stats = pipeline.stats()
+    logger.info(
+        f"Ingestion pipeline: {pipeline_stats['pages']} pages, {pipeline_stats['chunks']} chunks in "
+        f"{pipeline_stats['seconds']:.1f}s ({pipeline_stats['pages_per_sec']:.1f} pages/sec, "
+        f"{pipeline_stats['chunks_per_sec']:.1f} chunks/sec)"
+    )
+    return results
+
+
+def main():
+    from src.knowledge.bases import create_knowledge_bases
+    from src.llm.scheduler import create_openai_scheduler
+
+    parser = argparse.ArgumentParser(description="Incrementally ingest the Sleep Better PDF knowledge bases.")
+    parser.add_argument("--force", action="store_true", help="Re-embed every chunk even if unchanged.")
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes (default: ingestion.workers).")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    if args.workers is not None:
+        settings["ingestion"]["workers"] = args.workers
+    knowledge_bases = create_knowledge_bases(settings, scheduler=create_openai_scheduler(settings))
+    with create_ingestion_pipeline(settings) as pipeline:
+        results = ingest_all(settings, knowledge_bases, force=args.force, pipeline=pipeline)
+        pipeline_stats = pipeline.stats()
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+    print(f"pipeline: {pipeline_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+# local_vectordb.py
+"""In-process vector store: a drop-in for PgVector when there is no Postgres to talk to.
+
+Each collection is a directory holding one contiguous float32 matrix of L2-normalized embeddings
+(`vectors.f32`, memory-mapped on load) and the chunk records (`records.json`). Vector search is a
+single matrix-vector product; keyword search uses a BM25 index built from the chunk texts; hybrid
+search mixes the two like PgVector's `SearchType.hybrid` does. Meant for a few thousand chunks
+(tests, dev boxes, small edge deployments), not for millions.
+
+A collection has a single writer (e.g. the `src.knowledge.ingest` job); any number of processes
+can read it. `records.json` is the commit point: it is replaced last on every write, and readers
+reload the collection when it changes. New chunks are appended to `vectors.f32` in place; updates
+and deletes rewrite both files.
+"""
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from hashlib import md5
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from phi.document import Document
+from phi.embedder import Embedder
+from phi.utils.log import logger
+from phi.vectordb import VectorDb
+from phi.vectordb.search import SearchType
+from src.observability.tracing import span
+
+TOKEN_PATTERN = re.compile(r"\w+")
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.json"
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts, scored for all documents at once with NumPy."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+        self.doc_lengths = np.zeros(self.size, dtype=np.float32)
+        # term -> (document indexes, term frequencies)
+        postings: Dict[str, tuple] = {}
+        for index, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths[index] = sum(counts.values())
+            for term, count in counts.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(index)
+                postings[term][1].append(count)
+        self.postings = {
+            term: (np.array(docs, dtype=np.int64), np.array(freqs, dtype=np.float32))
+            for term, (docs, freqs) in postings.items()
+        }
+        self.avg_length = float(self.doc_lengths.mean()) if self.size else 0.0
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not self.size:
+            return scores
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, freqs = self.postings[term]
+            idf = math.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + length_norm[docs])
+        return scores
+
+
+class LocalVectorDb(VectorDb):
+    """NumPy-backed VectorDb persisted under `path/collection`, with PgVector's search types."""
+
+    def __init__(
+        self,
+        collection: str,
+        path: str,
+        embedder: Embedder,
+        search_type: SearchType = SearchType.vector,
+        vector_score_weight: float = 0.5,
+    ):
+        if not 0 <= vector_score_weight <= 1:
+            raise ValueError("vector_score_weight must be between 0 and 1")
+        self.collection = collection
+        self.directory = os.path.join(path, collection)
+        self.embedder = embedder
+        self.search_type = search_type
+        self.vector_score_weight = vector_score_weight
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Identity of the records file the in-memory collection was read from
+        self._loaded_version: Optional[tuple] = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._records: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._bm25: Optional[BM25Index] = None
+
+    # Persistence
+
+    def _paths(self):
+        return os.path.join(self.directory, VECTORS_FILE), os.path.join(self.directory, RECORDS_FILE)
+
+    def _read(self) -> Optional[tuple]:
+        """(matrix, records) from disk, or None when the collection is missing or its files disagree."""
+        vectors_path, records_path = self._paths()
+        if not os.path.exists(records_path) or not os.path.exists(vectors_path):
+            return None
+        with open(records_path) as f:
+            data = json.load(f)
+        count, dimensions = data["count"], data["dimensions"]
+        # Vectors past `count` belong to an append whose records were never committed
+        if os.path.getsize(vectors_path) < count * dimensions * 4:
+            logger.warning(f"{self.directory}: vector file does not match {count} records, ignoring it")
+            return None
+        if count == 0:
+            return np.zeros((0, dimensions), dtype=np.float32), []
+        return np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, dimensions)), data["records"]
+
+    def _version(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._paths()[1])
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _ensure_loaded(self):
+        """Read the collection on first use, and again whenever another process has written it."""
+        version = self._version()
+        if self._loaded and version == self._loaded_version:
+            return
+        loaded = self._read()
+        if loaded is not None:
+            self._set(*loaded)
+            self._loaded_version = version
+        elif version is None:
+            self._set(np.zeros((0, 0), dtype=np.float32), [])
+            self._loaded_version = None
+        # Otherwise the files are mid-rewrite: keep serving the previous snapshot and retry next time
+        self._loaded = True
+
+    def _set(self, matrix: np.ndarray, records: List[Dict[str, Any]]):
+        self._matrix = matrix
+        self._records = records
+        self._positions = {record["id"]: index for index, record in enumerate(records)}
+        self._bm25 = None
+
+    def _save(self, matrix: np.ndarray, records: List[Dict[str, Any]]):
+        """Write both files via renames (vectors first, records last), then map the new vectors."""
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path, records_path = self._paths()
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        matrix.tofile(vectors_path + ".tmp")
+        os.replace(vectors_path + ".tmp", vectors_path)
+        self._commit(records, int(matrix.shape[1]))
+
+    def _append(self, vectors: np.ndarray, records: List[Dict[str, Any]]):
+        """Append new rows to the vector file in place, then commit the longer record list."""
+        vectors_path, _ = self._paths()
+        dimensions = self._matrix.shape[1]
+        committed = len(self._records) * dimensions * 4
+        with open(vectors_path, "r+b") as f:
+            # Drop the rows of an earlier append that never committed
+            f.truncate(committed)
+            f.seek(committed)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._commit(self._records + records, dimensions)
+
+    def _commit(self, records: List[Dict[str, Any]], dimensions: int):
+        vectors_path, records_path = self._paths()
+        with open(records_path + ".tmp", "w") as f:
+            json.dump({"count": len(records), "dimensions": dimensions, "records": records}, f)
+        os.replace(records_path + ".tmp", records_path)
+        if len(records):
+            matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(len(records), dimensions))
+        else:
+            matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._set(matrix, records)
+        self._loaded_version = self._version()
+
+    # Collection lifecycle
+
+    def create(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            if not self.exists():
+                self._save(np.zeros((0, self._dimensions()), dtype=np.float32), [])
+
+    def exists(self) -> bool:
+        return self._read() is not None
+
+    def drop(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._set(np.zeros((0, 0), dtype=np.float32), [])
+            self._loaded = True
+            self._loaded_version = None
+
+    def delete(self) -> bool:
+        with self._lock:
+            self._save(np.zeros((0, self._dimensions()), dtype=np.float32), [])
+        return True
+
+    def optimize(self) -> None:
+        pass
+
+    def get_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._records)
+
+    def _dimensions(self) -> int:
+        if self._matrix.shape[1]:
+            return self._matrix.shape[1]
+        return getattr(self.embedder, "dimensions", None) or 0
+
+    # Reads by key
+
+    def doc_exists(self, document: Document) -> bool:
+        content_hash = md5(document.content.encode()).hexdigest()
+        with self._lock:
+            self._ensure_loaded()
+            return any(record["content_hash"] == content_hash for record in self._records)
+
+    def name_exists(self, name: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return any(record["name"] == name for record in self._records)
+
+    def id_exists(self, id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return id in self._positions
+
+    # Writes
+
+    def upsert_available(self) -> bool:
+        return True
+
+    def insert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        self.upsert(documents, filters=filters)
+
+    def upsert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        if not documents:
+            return
+        records, vectors = [], []
+        for document in documents:
+            document.embed(embedder=self.embedder)
+            content_hash = md5(document.content.encode()).hexdigest()
+            records.append({
+                "id": document.id or content_hash,
+                "name": document.name,
+                "meta_data": document.meta_data,
+                "filters": filters,
+                "content": document.content,
+                "usage": document.usage,
+                "content_hash": content_hash,
+            })
+            vectors.append(document.embedding)
+        new_vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            self._ensure_loaded()
+            # Last write wins for ids repeated within the batch
+            latest = {record["id"]: index for index, record in enumerate(records)}
+            batch = [(records[index], new_vectors[index]) for index in latest.values()]
+            if self._records and self._matrix.shape[1] == new_vectors.shape[1] and not any(
+                record["id"] in self._positions for record, _ in batch
+            ):
+                # Only new chunks (the common ingest case): no copy of the existing matrix
+                self._append(np.stack([vector for _, vector in batch]), [record for record, _ in batch])
+            else:
+                matrix = np.array(self._matrix, dtype=np.float32) if len(self._records) else np.zeros((0, new_vectors.shape[1]), dtype=np.float32)
+                all_records = list(self._records)
+                appended = []
+                for record, vector in batch:
+                    position = self._positions.get(record["id"])
+                    if position is None:
+                        appended.append((record, vector))
+                    else:
+                        all_records[position] = record
+                        matrix[position] = vector
+                if appended:
+                    matrix = np.vstack([matrix, np.stack([vector for _, vector in appended])])
+                    all_records.extend(record for record, _ in appended)
+                self._save(matrix, all_records)
+        logger.info(f"Upserted {len(records)} documents into {self.collection}")
+
+    def delete_ids(self, ids: List[str]) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            remove = {self._positions[id] for id in ids if id in self._positions}
+            if not remove:
+                return
+            keep = [index for index in range(len(self._records)) if index not in remove]
+            self._save(np.asarray(self._matrix)[keep], [self._records[index] for index in keep])
+
+    # Search
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _snapshot(self):
+        with self._lock:
+            self._ensure_loaded()
+            if self._bm25 is None and self.search_type != SearchType.vector:
+                self._bm25 = BM25Index([record["content"] for record in self._records])
+            return self._matrix, self._records, self._bm25
+
+    def _filter_mask(self, records: List[Dict[str, Any]], filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows whose insert-time filters contain every key/value in `filters` (like JSONB @>)."""
+        if not filters:
+            return None
+        return np.array([
+            all((record["filters"] or {}).get(key) == value for key, value in filters.items())
+            for record in records
+        ], dtype=bool)
+
+    def _cosine_similarities(self, matrix: np.ndarray, query: str) -> Optional[np.ndarray]:
+        query_embedding = self.embedder.get_embedding(query)
+        if query_embedding is None:
+            logger.error(f"Error getting embedding for Query: {query}")
+            return None
+        return matrix @ self._normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    def _top_k(self, scores: np.ndarray, records: List[Dict[str, Any]], limit: int, mask: Optional[np.ndarray]) -> List[Document]:
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            Document(
+                id=records[index]["id"],
+                name=records[index]["name"],
+                meta_data=records[index]["meta_data"],
+                content=records[index]["content"],
+                embedder=self.embedder,
+                usage=records[index]["usage"],
+            )
+            for index in top
+        ]
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        with span("vector_db.search", collection=self.collection, search_type=self.search_type.value, limit=limit) as search_span:
+            if self.search_type == SearchType.vector:
+                documents = self.vector_search(query, limit=limit, filters=filters)
+            elif self.search_type == SearchType.keyword:
+                documents = self.keyword_search(query, limit=limit, filters=filters)
+            elif self.search_type == SearchType.hybrid:
+                documents = self.hybrid_search(query, limit=limit, filters=filters)
+            else:
+                logger.error(f"Invalid search type '{self.search_type}'.")
+                documents = []
+            search_span.set(results=len(documents))
+            return documents
+
+    def vector_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        matrix, records, _ = self._snapshot()
+        if not records:
+            return []
+        similarities = self._cosine_similarities(matrix, query)
+        if similarities is None:
+            return []
+        return self._top_k(similarities, records, limit, self._filter_mask(records, filters))
+
+    def keyword_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        matrix, records, bm25 = self._snapshot()
+        if not records:
+            return []
+        bm25 = bm25 or BM25Index([record["content"] for record in records])
+        scores = bm25.scores(query)
+        # Like a full-text match, only documents containing a query term are returned
+        mask = scores > 0
+        filter_mask = self._filter_mask(records, filters)
+        return self._top_k(scores, records, limit, mask if filter_mask is None else mask & filter_mask)
+
+    def hybrid_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Weighted mix of vector similarity (1 / (1 + cosine distance), as in PgVector) and max-normalized BM25."""
+        matrix, records, bm25 = self._snapshot()
+        if not records:
+            return []
+        similarities = self._cosine_similarities(matrix, query)
+        if similarities is None:
+            return []
+        bm25 = bm25 or BM25Index([record["content"] for record in records])
+        text_scores = bm25.scores(query)
+        if text_scores.max() > 0:
+            text_scores = text_scores / text_scores.max()
+        vector_scores = 1 / (1 + (1 - similarities))
+        scores = self.vector_score_weight * vector_scores + (1 - self.vector_score_weight) * text_scores
+        return self._top_k(scores, records, limit, self._filter_mask(records, filters))
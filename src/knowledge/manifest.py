@@ -0,0 +1,155 @@
+# manifest.py
+import hashlib
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """Return the sha256 hex digest of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_chunk(content: str) -> str:
+    """Return the content hash of a chunk, computed the same way PgVector fills `content_hash`."""
+    cleaned_content = content.replace("\x00", "\ufffd")
+    return hashlib.md5(cleaned_content.encode()).hexdigest()
+
+
+class IngestionManifest:
+    """Records which source documents and chunks have been embedded into each vector collection."""
+
+    def __init__(self, db_path: str = "ingest_manifest.sqlite"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Create the manifest tables."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_documents (
+                collection TEXT,
+                source_path TEXT,
+                file_hash TEXT,
+                chunk_count INTEGER,
+                ingested_at TEXT,
+                PRIMARY KEY (collection, source_path)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_chunks (
+                collection TEXT,
+                chunk_id TEXT,
+                source_path TEXT,
+                content_hash TEXT,
+                PRIMARY KEY (collection, chunk_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_ingested_chunks_source
+            ON ingested_chunks (collection, source_path)
+        """)
+        conn.commit()
+        conn.close()
+
+    def get_file_hash(self, collection: str, source_path: str) -> Optional[str]:
+        """Return the file hash recorded for a source document, or None if it was never ingested."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT file_hash FROM ingested_documents
+            WHERE collection = ? AND source_path = ?
+        """, (collection, source_path))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def get_collection_version(self, collection: str) -> str:
+        """Return a string that changes whenever any document in the collection is (re-)ingested or removed."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT source_path, file_hash FROM ingested_documents
+            WHERE collection = ?
+            ORDER BY source_path
+        """, (collection,))
+        rows = cursor.fetchall()
+        conn.close()
+        return "|".join(f"{source_path}:{file_hash}" for source_path, file_hash in rows)
+
+    def get_chunk_hashes(self, collection: str, source_path: str) -> Dict[str, str]:
+        """Return {chunk_id: content_hash} for every chunk recorded for a source document."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT chunk_id, content_hash FROM ingested_chunks
+            WHERE collection = ? AND source_path = ?
+        """, (collection, source_path))
+        rows = cursor.fetchall()
+        conn.close()
+        return dict(rows)
+
+    def list_sources(self, collection: str) -> List[str]:
+        """Return the source paths recorded for a collection."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT source_path FROM ingested_documents WHERE collection = ?",
+            (collection,)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def record_document(self, collection: str, source_path: str, file_hash: str, chunk_hashes: Dict[str, str]):
+        """Replace the recorded state of a source document with its current file and chunk hashes."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM ingested_chunks WHERE collection = ? AND source_path = ?",
+            (collection, source_path)
+        )
+        cursor.executemany("""
+            INSERT INTO ingested_chunks (collection, chunk_id, source_path, content_hash)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (collection, chunk_id, source_path, content_hash)
+            for chunk_id, content_hash in chunk_hashes.items()
+        ])
+        cursor.execute("""
+            INSERT OR REPLACE INTO ingested_documents (
+                collection, source_path, file_hash, chunk_count, ingested_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+        """, (collection, source_path, file_hash, len(chunk_hashes), datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+    def remove_document(self, collection: str, source_path: str):
+        """Forget a source document and all of its chunks."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM ingested_chunks WHERE collection = ? AND source_path = ?",
+            (collection, source_path)
+        )
+        cursor.execute(
+            "DELETE FROM ingested_documents WHERE collection = ? AND source_path = ?",
+            (collection, source_path)
+        )
+        conn.commit()
+        conn.close()
+
+    def clear(self, collection: str):
+        """Forget everything recorded for a collection."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM ingested_chunks WHERE collection = ?", (collection,))
+        cursor.execute("DELETE FROM ingested_documents WHERE collection = ?", (collection,))
+        conn.commit()
+        conn.close()
@@ -0,0 +1,203 @@
+# pipeline.py
+"""Parallel, streaming ingestion of PDF knowledge bases.
+
+`PDFReader.read` parses a whole PDF on one core before anything is embedded. The pipeline instead
+splits each PDF into page ranges parsed (and chunked, with the knowledge base's own reader) in a
+process pool, and streams the chunks in page order into batched embedding requests and large
+upsert transactions while later pages are still being parsed:
+
+    with IngestionPipeline(workers=4) as pipeline:
+        pipeline.write(vector_db, pipeline.iter_chunks(pdf, reader))
+    pipeline.stats()    # pages/sec, chunks/sec
+
+Memory stays bounded: at most `max_pending_tasks` page ranges are parsed ahead of the writer, and
+at most `upsert_batch_size` chunks are held before they are written. Chunk ids are the ones
+`PDFReader` produces, so the ingestion manifest is unaffected.
+"""
+import inspect
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from phi.document import Document
+from phi.document.reader.base import Reader
+from phi.utils.log import logger
+from phi.vectordb import VectorDb
+
+
+def document_name(pdf: Path) -> str:
+    """The name PDFReader gives documents read from `pdf` (chunk ids are built from it)."""
+    return pdf.name.split(".")[0]
+
+
+def count_pages(pdf: Path) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(pdf).pages)
+
+
+def parse_pages(pdf: Path, first_page: int, last_page: int, reader: Reader) -> List[Document]:
+    """Documents (chunked if the reader chunks) of pages `first_page`..`last_page` (1-based, inclusive).
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    from pypdf import PdfReader
+
+    name = document_name(pdf)
+    pages = PdfReader(pdf).pages
+    documents = []
+    for page_number in range(first_page, last_page + 1):
+        page = Document(
+            name=name,
+            id=f"{name}_{page_number}",
+            meta_data={"page": page_number},
+            content=pages[page_number - 1].extract_text(),
+        )
+        documents.extend(reader.chunk_document(page) if reader.chunk else [page])
+    return documents
+
+
+def _upsert(vector_db: VectorDb, documents: List[Document]):
+    """Write a batch in one transaction where the vector db supports it (PgVector commits every `batch_size`)."""
+    write = vector_db.upsert if vector_db.upsert_available() else vector_db.insert
+    if "batch_size" in inspect.signature(write).parameters:
+        write(documents=documents, batch_size=len(documents))
+    else:
+        write(documents=documents)
+
+
+class IngestionPipeline:
+    """Parses PDF pages in a process pool and writes their chunks in embedding and upsert batches."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = 8,
+        max_pending_tasks: Optional[int] = None,
+        embed_batch_size: int = 256,
+        upsert_batch_size: int = 1000,
+    ):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.max_pending_tasks = max_pending_tasks or 2 * self.workers
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self._executor: Optional[Executor] = None
+        self.pages = 0
+        self.chunks = 0
+        self.chunks_written = 0
+        self.seconds = 0.0
+
+    def __enter__(self) -> "IngestionPipeline":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            # Spawned, not forked: the parent runs exporter, batcher and DB threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def iter_chunks(self, pdf: Path, reader: Reader) -> Iterator[Document]:
+        """Chunks of `pdf` in page order, parsed ahead by at most `max_pending_tasks` page ranges."""
+        started = time.perf_counter()
+        page_count = count_pages(pdf)
+        ranges = [
+            (first_page, min(first_page + self.pages_per_task - 1, page_count))
+            for first_page in range(1, page_count + 1, self.pages_per_task)
+        ]
+        try:
+            if self.workers <= 1 or len(ranges) <= 1:
+                # Nothing to parallelise: parse in this process
+                for first_page, last_page in ranges:
+                    documents = parse_pages(pdf, first_page, last_page, reader)
+                    self._count(last_page - first_page + 1, len(documents))
+                    yield from documents
+                return
+
+            pending = deque()
+            tasks = iter(ranges)
+            for first_page, last_page in tasks:
+                pending.append((last_page - first_page + 1, self.executor.submit(parse_pages, pdf, first_page, last_page, reader)))
+                if len(pending) >= self.max_pending_tasks:
+                    break
+            while pending:
+                pages, future = pending.popleft()
+                documents = future.result()
+                next_range = next(tasks, None)
+                if next_range is not None:
+                    first_page, last_page = next_range
+                    pending.append((last_page - first_page + 1, self.executor.submit(parse_pages, pdf, first_page, last_page, reader)))
+                self._count(pages, len(documents))
+                yield from documents
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def _count(self, pages: int, chunks: int):
+        self.pages += pages
+        self.chunks += chunks
+
+    def write(self, vector_db: VectorDb, documents: Iterable[Document]) -> int:
+        """Embed `documents` in batches and upsert them `upsert_batch_size` at a time; returns the count written."""
+        embedder = getattr(vector_db, "embedder", None)
+        embed_batch = getattr(embedder, "get_embeddings", None)
+        batch: List[Document] = []
+        embedded = 0
+        written = 0
+        for document in documents:
+            batch.append(document)
+            # Warm the embedding cache in batched requests; the upsert's per-document embeds then hit it
+            if embed_batch is not None and len(batch) - embedded >= self.embed_batch_size:
+                embed_batch([item.content for item in batch[embedded:]])
+                embedded = len(batch)
+            if len(batch) >= self.upsert_batch_size:
+                written += self._flush(vector_db, batch, embed_batch, embedded)
+                batch, embedded = [], 0
+        written += self._flush(vector_db, batch, embed_batch, embedded)
+        return written
+
+    def _flush(self, vector_db: VectorDb, batch: List[Document], embed_batch, embedded: int) -> int:
+        if not batch:
+            return 0
+        if embed_batch is not None and embedded < len(batch):
+            embed_batch([item.content for item in batch[embedded:]])
+        _upsert(vector_db, batch)
+        self.chunks_written += len(batch)
+        logger.debug(f"Upserted {len(batch)} chunks")
+        return len(batch)
+
+    def stats(self) -> dict:
+        """Pages and chunks parsed so far, and the rates over the time spent streaming them."""
+        return {
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "chunks_written": self.chunks_written,
+            "seconds": self.seconds,
+            "pages_per_sec": self.pages / self.seconds if self.seconds else 0.0,
+            "chunks_per_sec": self.chunks / self.seconds if self.seconds else 0.0,
+        }
+
+
+def create_ingestion_pipeline(settings: dict) -> IngestionPipeline:
+    """Pipeline configured by the `ingestion` section of settings.json (`workers: null` uses every core)."""
+    ingestion = settings["ingestion"]
+    return IngestionPipeline(
+        workers=ingestion["workers"],
+        pages_per_task=ingestion["pages_per_task"],
+        max_pending_tasks=ingestion["max_pending_tasks"],
+        embed_batch_size=ingestion["embed_batch_size"],
+        upsert_batch_size=ingestion["upsert_batch_size"],
+    )
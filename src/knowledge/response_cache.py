@@ -0,0 +1,158 @@
+# response_cache.py
+"""Semantic cache of agent answers, keyed by the embedding of the normalized question.
+
+Paraphrases of the same product question ("how firm is the Dream Sleep?" / "Dream Sleep
+firmness?") land close together in embedding space, so an answer cached for one is served
+for the others without a model call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from phi.embedder import Embedder
+from phi.utils.log import logger
+from src.knowledge.embedding_cache import normalize_text
+
+
+@dataclass
+class CachedResponse:
+    question: str
+    answer: str
+    embedding: np.ndarray
+    created_at: float
+
+
+class SemanticResponseCache:
+    """In-process semantic answer cache with TTL, LRU eviction and version-based invalidation."""
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        similarity_threshold: float = 0.92,
+        ttl_seconds: float = 3600,
+        max_entries: int = 500,
+        version_fn: Optional[Callable[[], str]] = None,
+        version_check_seconds: float = 5.0,
+    ):
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.version_check_seconds = version_check_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._version = version_fn() if version_fn else None
+        self._version_checked_at = time.monotonic()
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        return normalize_text(question).casefold()
+
+    def _embed(self, normalized: str) -> np.ndarray:
+        embedding = np.asarray(self.embedder.get_embedding(normalized), dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def _check_version(self):
+        """Drop every entry once the backing documents have been re-ingested.
+
+        The version is read at most every `version_check_seconds` (it is a manifest query), so a
+        re-ingest can go unnoticed for that long.
+        """
+        if self.version_fn is None:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_seconds:
+            return
+        self._version_checked_at = now
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                logger.info(f"Response cache invalidated ({len(self._entries)} entries): source documents changed")
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _expire(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _best_match(self, embedding: np.ndarray) -> Optional[str]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.vstack([self._entries[key].embedding for key in self._matrix_keys])
+        scores = self._matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] >= self.similarity_threshold:
+            return self._matrix_keys[best]
+        return None
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return the cached answer for a question or a near-duplicate of it, or None."""
+        normalized = self.normalize_question(question)
+        if not normalized:
+            return None
+        with self._lock:
+            self._check_version()
+            self._expire(time.time())
+            key = normalized if normalized in self._entries else None
+        if key is None:
+            # Embed outside the lock; the embedding cache makes repeats free
+            embedding = self._embed(normalized)
+            with self._lock:
+                key = self._best_match(embedding)
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.answer
+
+    def store(self, question: str, answer: str):
+        """Cache an answer, evicting the least recently used entries beyond max_entries."""
+        normalized = self.normalize_question(question)
+        if not normalized or not answer:
+            return
+        embedding = self._embed(normalized)
+        with self._lock:
+            self._entries[normalized] = CachedResponse(normalized, answer, embedding, time.time())
+            self._entries.move_to_end(normalized)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
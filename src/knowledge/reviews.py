@@ -0,0 +1,257 @@
+# reviews.py
+"""Ingest-time review aggregation over the product reviews PDF.
+
+Per-review product, rating, verified flag and date are extracted once and rolled up into
+per-product rating histograms, averages and top positive/critical excerpts, so common
+sentiment questions are answered from an indexed table instead of vector search + summarization.
+"""
+import difflib
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional
+
+from phi.utils.log import logger
+from src.knowledge.catalog import name_key
+from src.knowledge.manifest import hash_file
+
+SECTION_PATTERN = re.compile(r"^[ \t]*([A-Z][A-Za-z \t]*?Mattress)[ \t]+Reviews[ \t]*$", re.MULTILINE)
+REVIEW_PATTERN = re.compile(r"(\d+)\.\s*(⭐+)\s*\"(.*?)\"\s*\(([^)]*)\)", re.DOTALL)
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+EXCERPT_LENGTH = 160
+TOP_EXCERPTS = 3
+
+
+@dataclass
+class Review:
+    product_name: str
+    rating: int
+    content: str
+    reviewer: Optional[str] = None
+    verified: bool = False
+    review_date: Optional[str] = None
+
+
+def parse_reviews(text: str) -> List[Review]:
+    """Parse "<Product> Mattress Reviews" sections of `N. ⭐⭐⭐ "text" (Name, Verified Buyer)` entries."""
+    sections = list(SECTION_PATTERN.finditer(text))
+    reviews = []
+    for section, next_section in zip(sections, sections[1:] + [None]):
+        product_name = " ".join(section.group(1).split())
+        block = " ".join(text[section.end(): next_section.start() if next_section else len(text)].split())
+        for _, stars, content, attribution in REVIEW_PATTERN.findall(block):
+            date = DATE_PATTERN.search(attribution)
+            reviews.append(Review(
+                product_name=product_name,
+                rating=len(stars),
+                content=content.strip(),
+                reviewer=attribution.split(",")[0].strip() or None,
+                verified="verified" in attribution.lower(),
+                review_date=date.group(0) if date else None,
+            ))
+    return reviews
+
+
+def _excerpt(content: str) -> str:
+    if len(content) <= EXCERPT_LENGTH:
+        return content
+    return content[:EXCERPT_LENGTH].rsplit(" ", 1)[0] + "..."
+
+
+class ReviewStatsDB:
+    """SQLite store for parsed reviews and their per-product aggregates."""
+
+    def __init__(self, db_path: str = "reviews.sqlite"):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """Create the reviews and review_aggregates tables."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                review_id INTEGER PRIMARY KEY,
+                product_key TEXT,
+                product_name TEXT,
+                rating INTEGER,
+                verified BOOLEAN,
+                review_date TEXT,
+                reviewer TEXT,
+                content TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reviews_product_rating
+            ON reviews (product_key, rating)
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS review_aggregates (
+                product_key TEXT PRIMARY KEY,
+                product_name TEXT,
+                review_count INTEGER,
+                verified_count INTEGER,
+                average_rating REAL,
+                rating_histogram TEXT,
+                top_positive TEXT,
+                top_critical TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS review_sources (
+                source_path TEXT PRIMARY KEY,
+                file_hash TEXT
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def get_source_hash(self, source_path: str) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT file_hash FROM review_sources WHERE source_path = ?", (source_path,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def rebuild(self, reviews: List[Review], source_path: str, file_hash: str):
+        """Replace all reviews and aggregates in one transaction."""
+        aggregates = []
+        by_product = {}
+        for review in reviews:
+            by_product.setdefault(review.product_name, []).append(review)
+        for product_name, product_reviews in by_product.items():
+            # Aggregates only count verified purchases, matching what the reviews agent may show
+            verified = [review for review in product_reviews if review.verified]
+            histogram = {str(stars): 0 for stars in range(1, 6)}
+            for review in verified:
+                histogram[str(review.rating)] += 1
+            positive = sorted(
+                (review for review in verified if review.rating >= 4),
+                key=lambda review: (-review.rating, -len(review.content))
+            )[:TOP_EXCERPTS]
+            critical = sorted(
+                (review for review in verified if review.rating <= 3),
+                key=lambda review: (review.rating, -len(review.content))
+            )[:TOP_EXCERPTS]
+            aggregates.append((
+                name_key(product_name),
+                product_name,
+                len(product_reviews),
+                len(verified),
+                sum(review.rating for review in verified) / len(verified) if verified else None,
+                json.dumps(histogram),
+                json.dumps([{"rating": r.rating, "reviewer": r.reviewer, "excerpt": _excerpt(r.content)} for r in positive]),
+                json.dumps([{"rating": r.rating, "reviewer": r.reviewer, "excerpt": _excerpt(r.content)} for r in critical]),
+            ))
+
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM reviews")
+            cursor.execute("DELETE FROM review_aggregates")
+            cursor.executemany("""
+                INSERT INTO reviews (product_key, product_name, rating, verified, review_date, reviewer, content)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (name_key(r.product_name), r.product_name, r.rating, r.verified, r.review_date, r.reviewer, r.content)
+                for r in reviews
+            ])
+            cursor.executemany("INSERT INTO review_aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)", aggregates)
+            cursor.execute("INSERT OR REPLACE INTO review_sources VALUES (?, ?)", (source_path, file_hash))
+        conn.close()
+
+    def _resolve_key(self, cursor: sqlite3.Cursor, product_name: str) -> Optional[str]:
+        key = name_key(product_name)
+        cursor.execute("SELECT product_key FROM review_aggregates")
+        keys = [row[0] for row in cursor.fetchall()]
+        if key in keys:
+            return key
+        partial = [product_key for product_key in keys if key and (key in product_key or product_key in key)]
+        if len(partial) == 1:
+            return partial[0]
+        close = difflib.get_close_matches(key, keys, n=1, cutoff=0.75)
+        return close[0] if close else None
+
+    def get_summary(self, product_name: str) -> Optional[dict]:
+        """Return the aggregate row for a (fuzzily named) product, or None."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        key = self._resolve_key(cursor, product_name)
+        if key is None:
+            conn.close()
+            return None
+        cursor.execute("""
+            SELECT product_name, review_count, verified_count, average_rating,
+                   rating_histogram, top_positive, top_critical
+            FROM review_aggregates
+            WHERE product_key = ?
+        """, (key,))
+        row = cursor.fetchone()
+        conn.close()
+        name, review_count, verified_count, average_rating, histogram, top_positive, top_critical = row
+        return {
+            "product_name": name,
+            "review_count": review_count,
+            "verified_count": verified_count,
+            "average_rating": average_rating,
+            "rating_histogram": {int(stars): count for stars, count in json.loads(histogram).items()},
+            "top_positive": json.loads(top_positive),
+            "top_critical": json.loads(top_critical),
+        }
+
+    def list_summaries(self) -> List[dict]:
+        """Return name, count and average rating for every product, best rated first."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT product_name, verified_count, average_rating
+            FROM review_aggregates
+            ORDER BY average_rating DESC
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {"product_name": name, "verified_count": count, "average_rating": average}
+            for name, count, average in rows
+        ]
+
+    def get_reviews(self, product_name: str, min_rating: int = 1, max_rating: int = 5, limit: int = 5) -> List[dict]:
+        """Return verified reviews of a product within a rating range, highest rated first."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        key = self._resolve_key(cursor, product_name)
+        if key is None:
+            conn.close()
+            return []
+        cursor.execute("""
+            SELECT rating, reviewer, review_date, content
+            FROM reviews
+            WHERE product_key = ? AND rating BETWEEN ? AND ? AND verified
+            ORDER BY rating DESC, review_id
+            LIMIT ?
+        """, (key, min_rating, max_rating, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        return [
+            {"rating": rating, "reviewer": reviewer, "review_date": review_date, "content": content}
+            for rating, reviewer, review_date, content in rows
+        ]
+
+
+def build_review_stats(reviews_pdf: str, db_path: str, force: bool = False) -> ReviewStatsDB:
+    """Parse the reviews PDF and rebuild the aggregates, skipping the work if the PDF is unchanged."""
+    from pypdf import PdfReader
+
+    stats_db = ReviewStatsDB(db_path=db_path)
+    file_hash = hash_file(reviews_pdf)
+    if not force and stats_db.get_source_hash(reviews_pdf) == file_hash:
+        return stats_db
+
+    # Layout mode keeps the word spacing that the default text extraction drops
+    text = "\n".join(page.extract_text(extraction_mode="layout") for page in PdfReader(reviews_pdf).pages)
+    reviews = parse_reviews(text)
+    stats_db.rebuild(reviews, reviews_pdf, file_hash)
+    logger.info(f"Aggregated {len(reviews)} reviews from {reviews_pdf}")
+    return stats_db
@@ -0,0 +1,411 @@
+# scheduler.py
+"""Process-wide scheduler for OpenAI requests: rate limits, priority lanes, backoff and embedding batching.
+
+Every `OpenAIChat` model and the OpenAI embedder send their HTTP requests through one
+`ScheduledTransport` (`scheduler.http_client`), so limits hold across all agents and sessions:
+- token buckets per endpoint kind ("chat", "embeddings") for requests/min and tokens/min, with
+  tokens estimated from the request body (~4 characters per token plus the completion budget);
+- priority lanes: waiting "interactive" requests (chat turns) always go before "background" ones
+  (ingestion). Code picks its lane with `with request_lane("background"): ...`;
+- connection errors, timeouts and 408/409/429/5xx responses are retried with full-jitter
+  exponential backoff (or the server's Retry-After), and the whole endpoint kind pauses for that
+  delay, so callers don't stampede back;
+- `EmbeddingBatcher` merges concurrent small embedding requests from different callers into one API
+  call.
+
+`stats()` reports queue depth per lane, wait times, retries and embedding batch sizes.
+"""
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from phi.embedder import Embedder
+from phi.utils.log import logger
+
+LANES = ("interactive", "background")
+# What the OpenAI SDK retries, since its own retries are switched off (max_retries=0)
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+DEFAULT_COMPLETION_TOKENS = 512
+WAIT_SAMPLES = 1000
+
+_lane: ContextVar[str] = ContextVar("openai_request_lane", default="interactive")
+
+
+@contextmanager
+def request_lane(lane: str):
+    """Send the OpenAI requests made inside this block in `lane` ("interactive" or "background")."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane}. Use one of {LANES}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+def request_kind(path: str) -> Optional[str]:
+    if path.endswith("/chat/completions"):
+        return "chat"
+    if path.endswith("/embeddings"):
+        return "embeddings"
+    return None
+
+
+def estimate_request_tokens(body: bytes) -> int:
+    """Tokens a request will count against tokens/min: prompt (~4 characters per token) plus completion budget."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return 0
+    if "input" in payload:
+        texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        return sum(len(text) // 4 + 1 for text in texts if isinstance(text, str))
+    prompt = sum(len(json.dumps(message.get("content"))) // 4 for message in payload.get("messages") or [])
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt + completion
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute's allowance."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+class _KindLimiter:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, now: float):
+        self.requests = TokenBucket(requests_per_minute, now)
+        self.tokens = TokenBucket(tokens_per_minute, now)
+        self.waiting: List[tuple] = []
+        self.paused_until = 0.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+
+
+class OpenAIScheduler:
+    """Admits OpenAI requests within per-kind rate limits, interactive lane first."""
+
+    def __init__(
+        self,
+        limits: Dict[str, dict],
+        max_retries: int = 5,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 20.0,
+        embedding_batch_size: int = 64,
+        embedding_batch_window_ms: float = 10.0,
+    ):
+        now = time.monotonic()
+        self._limiters = {
+            kind: _KindLimiter(limit["requests_per_minute"], limit["tokens_per_minute"], now)
+            for kind, limit in limits.items()
+        }
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_batch_window_ms = embedding_batch_window_ms
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._queue_depth = {lane: 0 for lane in LANES}
+        self._max_queue_depth = {lane: 0 for lane in LANES}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._admitted = {lane: 0 for lane in LANES}
+        self._requests = {kind: 0 for kind in self._limiters}
+        self._retries = {kind: 0 for kind in self._limiters}
+        self._rate_limited = {kind: 0 for kind in self._limiters}
+        self._batchers: List["EmbeddingBatcher"] = []
+        self._http_client: Optional[httpx.Client] = None
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """httpx client whose requests go through this scheduler; share it between all OpenAI clients."""
+        if self._http_client is None:
+            with self._condition:
+                if self._http_client is None:
+                    self._http_client = httpx.Client(transport=ScheduledTransport(self), timeout=httpx.Timeout(600.0, connect=5.0))
+        return self._http_client
+
+    def acquire(self, kind: Optional[str], tokens: int, lane: Optional[str] = None) -> float:
+        """Block until a request of `kind` costing `tokens` may be sent; returns the seconds waited."""
+        limiter = self._limiters.get(kind)
+        if limiter is None:
+            return 0.0
+        lane = lane or current_lane()
+        started = time.monotonic()
+        with self._condition:
+            ticket = (LANES.index(lane), next(self._sequence))
+            heapq.heappush(limiter.waiting, ticket)
+            self._queue_depth[lane] += 1
+            self._max_queue_depth[lane] = max(self._max_queue_depth[lane], self._queue_depth[lane])
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    if limiter.waiting[0] == ticket:
+                        timeout = limiter.wait_time(tokens, now)
+                        if timeout <= 0:
+                            limiter.requests.take(1, now)
+                            limiter.tokens.take(tokens, now)
+                            break
+                    self._condition.wait(timeout=timeout)
+            finally:
+                limiter.waiting.remove(ticket)
+                heapq.heapify(limiter.waiting)
+                self._queue_depth[lane] -= 1
+                self._condition.notify_all()
+            waited = time.monotonic() - started
+            self._waits[lane].append(waited)
+            self._admitted[lane] += 1
+            self._requests[kind] += 1
+        return waited
+
+    def backoff(self, kind: Optional[str], attempt: int, status_code: Optional[int], retry_after: Optional[float] = None) -> float:
+        """Delay before retry `attempt` (0-based); pauses the whole kind so other callers wait it out too."""
+        delay = retry_after if retry_after is not None else random.uniform(
+            0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+        )
+        limiter = self._limiters.get(kind)
+        with self._condition:
+            if limiter is not None:
+                self._retries[kind] += 1
+                if status_code == 429:
+                    self._rate_limited[kind] += 1
+                limiter.paused_until = max(limiter.paused_until, time.monotonic() + delay)
+            self._condition.notify_all()
+        outcome = f"returned {status_code}" if status_code is not None else "failed to connect or timed out"
+        logger.warning(f"OpenAI {kind or 'request'} {outcome}, retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    def create_embedding_batcher(self, embed_batch: Callable[[List[str]], List[List[float]]]) -> "EmbeddingBatcher":
+        batcher = EmbeddingBatcher(embed_batch, self.embedding_batch_size, self.embedding_batch_window_ms)
+        self._batchers.append(batcher)
+        return batcher
+
+    def stats(self) -> dict:
+        with self._condition:
+            waits = {lane: list(samples) for lane, samples in self._waits.items()}
+            stats = {
+                "queue_depth": dict(self._queue_depth),
+                "max_queue_depth": dict(self._max_queue_depth),
+                "requests": dict(self._requests),
+                "retries": dict(self._retries),
+                "rate_limited": dict(self._rate_limited),
+            }
+        stats["wait"] = {
+            lane: {
+                "admitted": self._admitted[lane],
+                "avg_ms": 1000 * sum(samples) / len(samples) if samples else 0.0,
+                "p50_ms": 1000 * _percentile(samples, 0.5),
+                "p95_ms": 1000 * _percentile(samples, 0.95),
+                "max_ms": 1000 * max(samples, default=0.0),
+            }
+            for lane, samples in waits.items()
+        }
+        stats["embedding_batches"] = [batcher.stats() for batcher in self._batchers]
+        return stats
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """httpx transport admitting each request through the scheduler and retrying failures with backoff.
+
+    Give OpenAI clients `max_retries=0` so their own retries don't stack on top of these.
+    """
+
+    def __init__(self, scheduler: OpenAIScheduler, transport: Optional[httpx.BaseTransport] = None):
+        self.scheduler = scheduler
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        kind = request_kind(request.url.path)
+        tokens = estimate_request_tokens(request.content) if kind is not None else 0
+        attempt = 0
+        while True:
+            self.scheduler.acquire(kind, tokens)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                if attempt >= self.scheduler.max_retries:
+                    raise
+                time.sleep(self.scheduler.backoff(kind, attempt, None))
+                attempt += 1
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt >= self.scheduler.max_retries:
+                return response
+            response.close()
+            time.sleep(self.scheduler.backoff(kind, attempt, response.status_code, _retry_after(response)))
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class EmbeddingBatcher:
+    """Merges embedding requests from concurrent callers into batched API calls.
+
+    The first waiting text opens a batch that collects texts for up to `window_ms` or until
+    `max_batch_size`, then one call embeds them all. A batch containing any interactive text is
+    sent in the interactive lane.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], max_batch_size: int = 64, window_ms: float = 10.0):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._pending: deque = deque()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self.batches = 0
+        self.texts = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch_size:
+            # Already a full batch: nothing to merge it with
+            self._count(len(texts))
+            return self.embed_batch(texts)
+        lane = current_lane()
+        futures = [Future() for _ in texts]
+        with self._condition:
+            self._pending.extend(zip(texts, futures, itertools.repeat(lane)))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+        return [future.result() for future in futures]
+
+    def _count(self, texts: int):
+        with self._condition:
+            self.batches += 1
+            self.texts += texts
+
+    def _next_batch(self) -> list:
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+            return [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            lane = min((item[2] for item in batch), key=LANES.index)
+            self._count(len(batch))
+            try:
+                with request_lane(lane):
+                    embeddings = self.embed_batch([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "pending": len(self._pending),
+            }
+
+
+class BatchedEmbedder(Embedder):
+    """Embedder whose calls go through an EmbeddingBatcher, merged with other callers' texts."""
+
+    embedder: Embedder
+    batcher: EmbeddingBatcher
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def model_post_init(self, __context) -> None:
+        self.dimensions = self.embedder.dimensions
+
+    @property
+    def model(self) -> str:
+        return getattr(self.embedder, "model", type(self.embedder).__name__)
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.batcher.embed([text])[0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.embed(texts)
+
+
+def batch_embedding_function(embedder: Embedder) -> Callable[[List[str]], List[List[float]]]:
+    """One API request for a list of texts (OpenAIEmbedder passes `input` straight through)."""
+    def embed_batch(texts: List[str]) -> List[List[float]]:
+        if hasattr(embedder, "response"):
+            response = embedder.response(text=texts)
+            return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+        return [embedder.get_embedding(text) for text in texts]
+
+    return embed_batch
+
+
+def create_openai_scheduler(settings: dict) -> Optional[OpenAIScheduler]:
+    """The scheduler configured by `openai_scheduler` in settings.json, or None when disabled."""
+    config = settings["openai_scheduler"]
+    if not config["enabled"]:
+        return None
+    return OpenAIScheduler(
+        limits=config["limits"],
+        max_retries=config["max_retries"],
+        backoff_base_seconds=config["backoff_base_seconds"],
+        backoff_max_seconds=config["backoff_max_seconds"],
+        embedding_batch_size=config["embedding_batch_size"],
+        embedding_batch_window_ms=config["embedding_batch_window_ms"],
+    )
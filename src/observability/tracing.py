@@ -0,0 +1,312 @@
+# tracing.py
+"""Span-based tracing of user turns: one trace per turn, with nested, timed spans for agent runs,
+reasoning, tool calls (including delegation to team members), embeddings, vector searches, cache
+lookups and orders DB statements.
+
+    tracer = create_tracer(settings)
+    with tracer.trace("turn", session=session_key) as turn:
+        agent.run(...)
+
+    with span("orders_db.create_order") as order_span:    # anywhere below the turn
+        order_span.set(rows=1)
+
+The current span lives in a ContextVar, so spans nest through generators and, when the work is
+submitted with `contextvars.copy_context().run`, through worker threads. Outside a sampled trace
+`span()` returns a shared no-op span, so instrumented code pays one ContextVar lookup. Finished
+traces are exported by a background thread, to JSONL and optionally to an OTLP/HTTP collector.
+"""
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from urllib import request as urllib_request
+from uuid import uuid4
+
+from phi.utils.log import logger
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace. Use as a context manager; attributes can be set while it runs."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start_time", "duration_ms", "error",
+                 "_started", "_token")
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = 0.0
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration_ms = 1000 * (time.perf_counter() - self._started)
+        # GeneratorExit (an abandoned stream) is not an error
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # A generator closed from another context (e.g. garbage collected elsewhere)
+            pass
+        self.trace._finish(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span outside a sampled trace."""
+
+    trace = None
+
+    def set(self, **attributes: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """The spans of one user turn, collected from every thread that worked on it."""
+
+    def __init__(self, on_finish: Callable[["Trace"], None]):
+        self.trace_id = uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._on_finish = on_finish
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+        if span.parent_id is None:
+            self._on_finish(self)
+
+    @property
+    def root(self) -> Optional[Span]:
+        return next((span for span in self.spans if span.parent_id is None), None)
+
+    def summary(self) -> dict:
+        """Turn duration, span count and the token counts of every model run in the turn."""
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": root.duration_ms if root is not None else 0.0,
+            "spans": len(self.spans),
+            "input_tokens": sum(span.attributes.get("input_tokens", 0) for span in self.spans),
+            "output_tokens": sum(span.attributes.get("output_tokens", 0) for span in self.spans),
+            "errors": sum(1 for span in self.spans if span.error),
+        }
+
+
+def span(name: str, **attributes: Any):
+    """A child of the current span, or the no-op span when no sampled trace is active."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace, parent.span_id, attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: str):
+    """Decorator running every call of a function (or generator function) in a span named `name`."""
+
+    def decorate(function: Callable) -> Callable:
+        if inspect.isgeneratorfunction(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    yield from function(*args, **kwargs)
+        else:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    return function(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorate
+
+
+def timing_rows(trace: Trace) -> List[dict]:
+    """The spans of a trace in call order, indented by depth, for a timing table."""
+    children: Dict[Optional[str], List[Span]] = {}
+    for item in sorted(trace.spans, key=lambda item: item.start_time):
+        children.setdefault(item.parent_id, []).append(item)
+
+    rows = []
+
+    def visit(parent_id: Optional[str], depth: int):
+        for item in children.get(parent_id, []):
+            details = ", ".join(f"{key}={value}" for key, value in item.attributes.items())
+            rows.append({
+                "span": f"{'  ' * depth}{item.name}",
+                "ms": round(item.duration_ms, 1),
+                "details": f"{details} ERROR {item.error}" if item.error else details,
+            })
+            visit(item.span_id, depth + 1)
+
+    visit(None, 0)
+    return rows
+
+
+class JsonlExporter:
+    """Appends one JSON line per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, trace: Trace):
+        lines = "".join(json.dumps(item.to_dict(), default=str) + "\n" for item in trace.spans)
+        with open(self.path, "a") as f:
+            f.write(lines)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Posts traces to an OTLP/HTTP collector (JSON encoding), e.g. http://localhost:4318/v1/traces."""
+
+    def __init__(self, endpoint: str, service_name: str = "sleep-better-ai", timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, trace: Trace) -> dict:
+        spans = []
+        for item in trace.spans:
+            start_ns = int(item.start_time * 1e9)
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": item.span_id,
+                "name": item.name,
+                "kind": 1,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int(item.duration_ms * 1e6)),
+                "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in item.attributes.items()],
+                "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+            }
+            if item.parent_id is not None:
+                otlp_span["parentSpanId"] = item.parent_id
+            spans.append(otlp_span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "src.observability.tracing"}, "spans": spans}],
+        }]}
+
+    def export(self, trace: Trace):
+        body = json.dumps(self.payload(trace)).encode()
+        http_request = urllib_request.Request(self.endpoint, data=body, headers={"Content-Type": "application/json"})
+        with urllib_request.urlopen(http_request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Samples turns into traces and exports finished traces on a background thread."""
+
+    def __init__(self, sample_rate: float = 1.0, exporters: Optional[list] = None, max_queued_traces: int = 1000):
+        self.sample_rate = sample_rate
+        self.exporters = exporters or []
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_traces)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def trace(self, name: str, force: bool = False, **attributes: Any):
+        """Root span of a new trace; sampled at `sample_rate` unless `force` (e.g. the timing panel is on).
+
+        Inside an active trace this is just a child span.
+        """
+        if _current_span.get() is not None:
+            return span(name, **attributes)
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return NOOP_SPAN
+        return Span(name, Trace(self._export), None, attributes)
+
+    def _export(self, trace: Trace):
+        if not self.exporters:
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._work, name="trace-export", daemon=True)
+                    self._worker.start()
+
+    def _work(self):
+        while True:
+            trace = self._queue.get()
+            for exporter in self.exporters:
+                try:
+                    exporter.export(trace)
+                except Exception as e:
+                    logger.warning(f"Could not export trace {trace.trace_id} with {type(exporter).__name__}: {e}")
+            self._queue.task_done()
+
+    def flush(self):
+        """Wait until every finished trace has been exported."""
+        self._queue.join()
+
+
+def create_tracer(settings: dict) -> Tracer:
+    """Tracer configured by the `tracing` section of settings.json (sample rate 0 when disabled)."""
+    tracing = settings["tracing"]
+    if not tracing["enabled"]:
+        return Tracer(sample_rate=0.0)
+    exporters = []
+    if tracing["jsonl_path"]:
+        exporters.append(JsonlExporter(tracing["jsonl_path"]))
+    if tracing["otlp_endpoint"]:
+        exporters.append(OtlpHttpExporter(tracing["otlp_endpoint"], service_name=tracing["service_name"]))
+    return Tracer(sample_rate=tracing["sample_rate"], exporters=exporters)
@@ -0,0 +1,54 @@
+from phi.tools import Toolkit
+from src.knowledge.catalog import CatalogIndex, format_price
+
+class CatalogToolkit(Toolkit):
+    """Instant product, size and price lookups from the parsed product catalog."""
+
+    def __init__(self, catalog: CatalogIndex):
+        super().__init__(name="catalog_toolkit")
+        self.catalog = catalog
+        self.register(self.handle_get_product_price)
+        self.register(self.handle_get_product_specs)
+
+    def handle_get_product_price(self, args: dict) -> str:
+        """Look up the catalog price of a product in a size. Args: product_name, size"""
+        product_name = args.get("product_name")
+        size = args.get("size")
+        if not product_name or not size:
+            return "Product name and size are required"
+
+        validation = self.catalog.validate_order(product_name, size)
+        if validation.price is not None:
+            return f"The {validation.size} {validation.product_name} is {format_price(validation.price)} with free delivery."
+        if validation.size is not None:
+            return (
+                f"The {validation.product_name} is available in {validation.size}, but the catalog only lists "
+                f"prices for: {', '.join(self.catalog.find(product_name).prices)}."
+            )
+        return validation.message
+
+    def handle_get_product_specs(self, args: dict) -> str:
+        """Look up sizes, prices and key specs of a product. Args: product_name"""
+        product_name = args.get("product_name")
+        if not product_name:
+            return "Product name is required"
+
+        product = self.catalog.find(product_name)
+        if product is None:
+            return f"No product found matching: {product_name}"
+
+        # The parser leaves fields it could not read as None; leave those out rather than guess
+        lines = [product.name]
+        if product.prices:
+            lines.append(f"Price: {', '.join(f'{format_price(price)} ({size})' for size, price in product.prices.items())}")
+        if product.type is not None:
+            lines.append(f"Type: {product.type}")
+        if product.height_inches is not None:
+            lines.append(f"Height: {product.height_inches:g} inches")
+        if product.sizes:
+            lines.append(f"Available sizes: {', '.join(product.sizes)}")
+        if product.warranty_years is not None:
+            lines.append(f"Warranty: {product.warranty_years} years")
+        if product.trial_nights is not None:
+            lines.append(f"Trial period: {product.trial_nights} nights")
+        return "\n".join(lines)
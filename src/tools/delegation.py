@@ -0,0 +1,149 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from phi.agent import Agent
+from phi.tools import Toolkit
+from phi.utils.log import logger
+
+
+def member_key(agent: Agent) -> str:
+    """Name used to address a team member, e.g. "Product Details Agent" -> "product_details_agent"."""
+    return (agent.name or agent.agent_id or "").lower().replace(" ", "_").replace("-", "_")
+
+
+class MemberBusyError(Exception):
+    """The member is still running a task from an earlier, timed out delegation."""
+
+
+class _MemberRun:
+    """One member's share of a delegation: when it started running, and whether it was abandoned."""
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.cancelled = threading.Event()
+
+
+class ParallelDelegationToolkit(Toolkit):
+    """Dispatch independent tasks to several team members at once and merge their answers."""
+
+    def __init__(
+        self,
+        members: List[Agent],
+        member_timeout_seconds: float = 60,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        super().__init__(name="parallel_delegation_toolkit")
+        self.members: Dict[str, Agent] = {member_key(member): member for member in members}
+        self.member_timeout_seconds = member_timeout_seconds
+        # A member that timed out may still be running; it must not be run again until it finishes
+        self._member_locks = {key: threading.Lock() for key in self.members}
+        # Pass a shared executor when many teams exist (one per chat session) to bound the thread count
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(len(members), 1), thread_name_prefix="delegation")
+        self.time_saved_seconds = 0.0
+        self.register(self.handle_delegate_parallel)
+
+    def _run_member_tasks(self, agent: str, tasks: List[dict], run: _MemberRun) -> List[tuple]:
+        # Tasks for the same member run one after another: a member's memory is not thread-safe
+        lock = self._member_locks[agent]
+        if not lock.acquire(blocking=False):
+            raise MemberBusyError(agent)
+        try:
+            run.started = time.perf_counter()
+            results = []
+            for task in tasks:
+                if run.cancelled.is_set():
+                    break
+                message = task["task"]
+                if task.get("expected_output"):
+                    message += f"\n\nThe expected output is: {task['expected_output']}"
+                started = time.perf_counter()
+                response = self.members[agent].run(message, stream=False)
+                content = response.content if isinstance(response.content, str) else str(response.content)
+                results.append((task, content, time.perf_counter() - started))
+            return results
+        finally:
+            lock.release()
+
+    def _wait(self, futures: Dict[Future, str], runs: Dict[str, _MemberRun], dispatched: float) -> set:
+        """Wait for every member and return the futures that timed out (those still queued are cancelled).
+
+        A member's timeout starts when it starts running, not while it is queued behind other
+        sessions on the shared executor; a member still queued after the timeout is cancelled.
+        """
+        pending = set(futures)
+        timed_out = set()
+        while True:
+            pending = {future for future in pending if not future.done()}
+            if not pending:
+                return timed_out
+            now = time.perf_counter()
+            deadlines = {}
+            for future in pending:
+                run = runs[futures[future]]
+                deadline = (run.started or dispatched) + self.member_timeout_seconds
+                if deadline > now:
+                    deadlines[future] = deadline
+                elif future.cancel() or run.started is not None:
+                    # A running member can't be interrupted: it stops before its next task
+                    run.cancelled.set()
+                    timed_out.add(future)
+                else:
+                    # Picked up just now and about to record its start: check again shortly
+                    deadlines[future] = now + 0.001
+            pending = set(deadlines)
+            if pending:
+                wait(pending, timeout=min(deadlines.values()) - now, return_when=FIRST_COMPLETED)
+
+    def handle_delegate_parallel(self, args: dict) -> str:
+        """Send independent tasks to several agents concurrently and get all their answers. Args: tasks (list of {"agent": one of product_details_agent, product_reviews_agent, orders_agent, "task": full task description, "expected_output": optional})"""
+        tasks = args.get("tasks")
+        if not tasks or not isinstance(tasks, list):
+            return "A list of tasks is required"
+
+        by_member: Dict[str, List[dict]] = {}
+        for task in tasks:
+            if not isinstance(task, dict) or not task.get("agent") or not task.get("task"):
+                return "Each task needs an agent and a task description"
+            agent = task["agent"]
+            if agent not in self.members:
+                return f"Unknown agent: {agent}. Available agents: {', '.join(self.members)}"
+            by_member.setdefault(agent, []).append(task)
+
+        started = time.perf_counter()
+        runs = {agent: _MemberRun() for agent in by_member}
+        # Each member runs in a copy of this context, so its spans nest under this tool call's span
+        futures = {
+            self.executor.submit(contextvars.copy_context().run, self._run_member_tasks, agent, member_tasks, runs[agent]): agent
+            for agent, member_tasks in by_member.items()
+        }
+        timed_out = self._wait(futures, runs, started)
+        wall_clock = time.perf_counter() - started
+
+        sections = []
+        sequential = 0.0
+        for future, agent in futures.items():
+            if future in timed_out:
+                logger.warning(f"{agent} timed out after {self.member_timeout_seconds}s")
+                sections.append(f"### {agent}\nNo answer: the agent timed out.")
+                continue
+            try:
+                for task, content, duration in future.result():
+                    sequential += duration
+                    sections.append(f"### {agent}\n{content}")
+            except MemberBusyError:
+                logger.warning(f"{agent} is still running a timed out task")
+                sections.append(f"### {agent}\nNo answer: the agent is still busy with an earlier task.")
+            except Exception as e:
+                logger.error(f"{agent} failed: {e}")
+                sections.append(f"### {agent}\nNo answer: the agent failed.")
+
+        saved = max(sequential - wall_clock, 0.0)
+        self.time_saved_seconds += saved
+        logger.info(
+            f"Parallel delegation to {len(by_member)} agents: {wall_clock:.2f}s wall clock, "
+            f"{sequential:.2f}s sequential, {saved:.2f}s saved"
+        )
+        return "\n\n".join(sections)
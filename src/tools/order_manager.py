@@ -1,42 +1,74 @@
 import json
 import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from typing import List, Optional
 from phi.tools import Toolkit
 from phi.utils.log import logger
-from src.db.orders import SQLiteOrdersDB
+from src.db.orders import MAX_PAGE_SIZE, SQLiteOrdersDB
+from src.knowledge.catalog import CatalogIndex, format_price
 
 class OrdersToolkit(Toolkit):
-    def __init__(self, db_path: str = "orders.db"):
+    def __init__(self, db_path: str = "orders.db", db: Optional[SQLiteOrdersDB] = None, catalog: Optional[CatalogIndex] = None):
         super().__init__(name="sqlite_orders_toolkit")
-        self.db = SQLiteOrdersDB(db_path=db_path)
+        # Reuse a shared SQLiteOrdersDB (and its connections) when one is provided
+        self.db = db if db is not None else SQLiteOrdersDB(db_path=db_path)
+        # Product/size/price table used to check order details instead of trusting the LLM
+        self.catalog = catalog
         self.register(self.handle_create_order)
         self.register(self.handle_get_status)
         self.register(self.handle_update_status)
         self.register(self.handle_summarize_order_details)
+        self.register(self.handle_list_customer_orders)
+        self.register(self.handle_list_orders_by_status)
+        self.register(self.handle_list_orders_since)
+        self.register(self.handle_list_overdue_orders)
 
     def generate_customer_id(self) -> str:
         return f"CUST{uuid.uuid4().hex[:8].upper()}"
 
+    def _apply_catalog(self, args: dict) -> Optional[str]:
+        """Replace product name, size and price in args with catalog values; return an error message if invalid."""
+        if self.catalog is None:
+            return None
+        validation = self.catalog.validate_order(args["product_name"], args["size"], args.get("price"))
+        if not validation.ok:
+            return validation.message
+        args["product_name"] = validation.product_name
+        args["size"] = validation.size
+        args["price"] = validation.price
+        return None
+
     def handle_summarize_order_details(self, args: dict) -> str:
         """Initial summary for order - only requires basic product details"""
-        required = ["product_name", "size", "price"]
+        # The catalog knows prices, so the price is only required without it
+        required = ["product_name", "size"] if self.catalog is not None else ["product_name", "size", "price"]
         missing = [field for field in required if field not in args]
         if missing:
             return f"Missing fields for summary: {', '.join(missing)}"
+
+        error = self._apply_catalog(args)
+        if error:
+            return error
+        price = format_price(args["price"]) if isinstance(args["price"], (int, float)) else args["price"]
         
         return (
             f"Great choice! The {args['size']} {args['product_name']} is "
-            f"{args['price']} with free delivery. Would you like "
+            f"{price} with free delivery. Would you like "
             f"to proceed? I'll need your shipping address to continue."
         )
 
     def handle_create_order(self, args: dict) -> str:
         """Create final order with shipping details"""
         logger.info(f"Creating order with args: {args}")
-        required = ["product_name", "size", "price", "shipping_address"]
+        required = ["product_name", "size", "shipping_address"] if self.catalog is not None else ["product_name", "size", "price", "shipping_address"]
         missing = [field for field in required if field not in args]
         if missing:
             return f"Missing fields: {', '.join(missing)}"
 
+        error = self._apply_catalog(args)
+        if error:
+            return error
         price = float(args["price"])
         # Add customer ID and default payment method
         customer_id = self.generate_customer_id()
@@ -87,4 +119,79 @@ class OrdersToolkit(Toolkit):
         
         if self.db.update_order_status(order_id, new_status):
             return f"Order {order_id} updated to {new_status}"
-        return f"Failed to update order {order_id}"
\ No newline at end of file
+        return f"Failed to update order {order_id}"
+
+    @staticmethod
+    def _format_order_page(orders: List[dict], next_cursor: Optional[str], empty_message: str) -> str:
+        if not orders:
+            return empty_message
+        lines = [
+            f"{order['order_id']}: {order['product_name']} ({order['size']}) - {order['status']}, "
+            f"ordered {order['order_date'][:10]}"
+            for order in orders
+        ]
+        if next_cursor:
+            lines.append(f"More orders available. Pass cursor={next_cursor} for the next page.")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _page_limit(args: dict, default: int) -> Optional[int]:
+        """The LLM-supplied page size clamped to 1..MAX_PAGE_SIZE, or None if it is not a number."""
+        try:
+            limit = int(args.get("limit", default))
+        except (TypeError, ValueError):
+            return None
+        return max(1, min(limit, MAX_PAGE_SIZE))
+
+    def _list_page(self, args: dict, default_limit: int, query, empty_message: str) -> str:
+        """Run a listing query with the args' limit and cursor, reporting bad values as a tool error."""
+        limit = self._page_limit(args, default_limit)
+        if limit is None:
+            return f"Invalid limit: {args.get('limit')}. Use a number from 1 to {MAX_PAGE_SIZE}."
+        try:
+            orders, next_cursor = query(limit=limit, after=args.get("cursor"))
+        except ValueError:
+            return f"Invalid cursor: {args.get('cursor')}. Pass the cursor returned with the previous page."
+        return self._format_order_page(orders, next_cursor, empty_message)
+
+    def handle_list_customer_orders(self, args: dict) -> str:
+        """List a customer's orders, one page at a time. Args: customer_id, optional limit and cursor."""
+        customer_id = args.get("customer_id")
+        if not customer_id:
+            return "Customer ID is required"
+
+        return self._list_page(
+            args, 20, partial(self.db.list_orders_by_customer, customer_id), f"No orders found for customer {customer_id}"
+        )
+
+    def handle_list_orders_by_status(self, args: dict) -> str:
+        """List orders in a status, oldest first. Args: status, optional older_than_days, limit and cursor."""
+        status = args.get("status")
+        if not status:
+            return "Status is required"
+
+        older_than = None
+        if args.get("older_than_days") is not None:
+            try:
+                older_than = datetime.now() - timedelta(days=float(args["older_than_days"]))
+            except (TypeError, ValueError, OverflowError):
+                return f"Invalid older_than_days: {args['older_than_days']}. Use a number of days."
+        return self._list_page(
+            args, 20, partial(self.db.list_orders_by_status, status, older_than=older_than), f"No {status} orders found"
+        )
+
+    def handle_list_orders_since(self, args: dict) -> str:
+        """List orders placed on or after a date. Args: since (ISO date), optional limit and cursor."""
+        since = args.get("since")
+        if not since:
+            return "A since date is required"
+
+        try:
+            since_date = datetime.fromisoformat(since)
+        except ValueError:
+            return f"Invalid date: {since}. Use YYYY-MM-DD."
+        return self._list_page(args, 20, partial(self.db.list_orders_since, since_date), f"No orders placed since {since}")
+
+    def handle_list_overdue_orders(self, args: dict) -> str:
+        """List open orders past their estimated delivery date, most overdue first. Args: optional limit and cursor."""
+        return self._list_page(args, 20, partial(self.db.list_overdue_orders, datetime.now()), "No overdue orders")
@@ -0,0 +1,64 @@
+from phi.tools import Toolkit
+from src.knowledge.reviews import ReviewStatsDB
+
+class ReviewsToolkit(Toolkit):
+    """Precomputed rating histograms, averages and review excerpts per product."""
+
+    def __init__(self, stats_db: ReviewStatsDB):
+        super().__init__(name="reviews_toolkit")
+        self.stats_db = stats_db
+        self.register(self.handle_get_review_summary)
+        self.register(self.handle_compare_product_ratings)
+        self.register(self.handle_get_reviews)
+
+    def handle_get_review_summary(self, args: dict) -> str:
+        """Get the average rating, rating breakdown and top positive/critical reviews of a product. Args: product_name"""
+        product_name = args.get("product_name")
+        if not product_name:
+            return "Product name is required"
+
+        summary = self.stats_db.get_summary(product_name)
+        if summary is None:
+            return f"No reviews found for: {product_name}"
+        if not summary["verified_count"]:
+            return f"No verified reviews yet for the {summary['product_name']}"
+
+        histogram = ", ".join(
+            f"{stars} stars: {summary['rating_histogram'][stars]}" for stars in range(5, 0, -1)
+        )
+        lines = [
+            f"{summary['product_name']}: {summary['average_rating']:.1f}/5 from {summary['verified_count']} verified reviews",
+            f"Breakdown: {histogram}",
+            "Top positive:"
+        ]
+        lines += [f"- {review['rating']}/5 {review['reviewer']}: \"{review['excerpt']}\"" for review in summary["top_positive"]] or ["- None"]
+        lines.append("Top critical:")
+        lines += [f"- {review['rating']}/5 {review['reviewer']}: \"{review['excerpt']}\"" for review in summary["top_critical"]] or ["- None"]
+        return "\n".join(lines)
+
+    def handle_compare_product_ratings(self, args: dict) -> str:
+        """List every product's average rating, best rated first. Args: none"""
+        summaries = self.stats_db.list_summaries()
+        if not summaries:
+            return "No review statistics available"
+        return "\n".join(
+            f"{summary['product_name']}: {summary['average_rating']:.1f}/5 ({summary['verified_count']} verified reviews)"
+            for summary in summaries if summary["verified_count"]
+        )
+
+    def handle_get_reviews(self, args: dict) -> str:
+        """Get verified reviews of a product in a rating range. Args: product_name, min_rating (optional), max_rating (optional), limit (optional, default 5)"""
+        product_name = args.get("product_name")
+        if not product_name:
+            return "Product name is required"
+        try:
+            min_rating = int(args.get("min_rating") or 1)
+            max_rating = int(args.get("max_rating") or 5)
+            limit = int(args.get("limit") or 5)
+        except (TypeError, ValueError):
+            return "Ratings and limit must be whole numbers"
+
+        reviews = self.stats_db.get_reviews(product_name, min_rating=min_rating, max_rating=max_rating, limit=limit)
+        if not reviews:
+            return f"No verified reviews rated {min_rating}-{max_rating} found for: {product_name}"
+        return "\n".join(f"- {review['rating']}/5 {review['reviewer']}: \"{review['content']}\"" for review in reviews)
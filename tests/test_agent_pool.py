@@ -0,0 +1,66 @@
+# tests/test_agent_pool.py
+import threading
+import time
+from phi.agent import Agent
+from src.agents.pool import AgentPool
+
+
+def make_pool(**kwargs):
+    return AgentPool(lambda: Agent(name="Reasoning Agent"), **kwargs)
+
+
+def test_each_session_gets_its_own_agent():
+    pool = make_pool()
+    first = pool.acquire("session-a")
+    assert pool.acquire("session-a") is first
+    second = pool.acquire("session-b")
+    assert second is not first
+    assert second.memory is not first.memory
+    assert pool.stats()["created"] == 2
+
+
+def test_least_recently_used_session_is_evicted_when_full():
+    pool = make_pool(max_size=2)
+    a = pool.acquire("a")
+    pool.acquire("b")
+    pool.acquire("a")
+    pool.acquire("c")
+    assert pool.get("b") is None
+    assert pool.get("a") is a
+    assert pool.stats() == {"active": 2, "max_size": 2, "created": 3, "evictions": 1}
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    pool = make_pool(idle_timeout_seconds=60)
+    a = pool.acquire("a")
+    now = time.time()
+    monkeypatch.setattr("src.agents.pool.time.time", lambda: now + 61)
+    assert pool.acquire("a") is not a
+    assert pool.stats()["evictions"] == 1
+
+
+def test_release_drops_the_session():
+    pool = make_pool()
+    a = pool.acquire("a")
+    pool.release("a")
+    assert pool.get("a") is None
+    assert pool.acquire("a") is not a
+
+
+def test_concurrent_acquire_returns_one_agent_per_session():
+    pool = make_pool()
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(pool.acquire("shared"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(agent) for agent in results}) == 1
+    assert pool.stats()["active"] == 1
@@ -0,0 +1,148 @@
+# tests/test_api.py
+import asyncio
+import httpx
+import json
+import pytest
+import time
+from fastapi.testclient import TestClient
+from phi.agent import Agent, RunResponse
+from phi.storage.agent.sqlite import SqlAgentStorage
+from src.agents.async_runner import AsyncAgentRunner
+from src.agents.pool import AgentPool
+from src.db.async_orders import AsyncOrdersDB
+from src.db.orders import SQLiteOrdersDB
+from src.interface.api import create_app
+
+
+class EchoAgent(Agent):
+    """Agent that streams the prompt back word by word and remembers nothing else."""
+
+    def run(self, message=None, *, stream=False, **kwargs):
+        words = [RunResponse(content=word + " ") for word in f"You said: {message}".split()]
+        return iter(words) if stream else RunResponse(content="".join(w.content for w in words).strip())
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+@pytest.fixture
+def orders_db():
+    db = SQLiteOrdersDB(db_path=":memory:")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def client(orders_db):
+    pool = AgentPool(lambda: EchoAgent(name="Reasoning Agent"))
+    app = create_app(pool, AsyncAgentRunner(), orders_db=orders_db, async_orders_db=AsyncOrdersDB(orders_db))
+    with TestClient(app) as client:
+        yield client
+
+
+def test_chat_streams_tokens_as_server_sent_events(client):
+    session_id = client.post("/sessions").json()["session_id"]
+    response = client.post(f"/sessions/{session_id}/messages", json={"message": "hello there"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[-1] == ("done", {})
+    assert "".join(data["content"] for event, data in events if event == "token") == "You said: hello there "
+
+
+def test_chat_without_streaming_returns_json(client):
+    response = client.post("/sessions/abc/messages", json={"message": "hi", "stream": False})
+    assert response.json() == {"session_id": "abc", "content": "You said: hi"}
+
+
+def test_order_status_uses_the_fast_path(client, orders_db):
+    order_id = orders_db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 1199.0, "1 Main St", "cash")
+    response = client.post("/sessions/abc/messages", json={"message": f"Where is my order {order_id}?", "stream": False})
+    assert order_id in response.json()["content"]
+    assert "You said" not in response.json()["content"]
+
+
+def test_order_endpoints(client):
+    created = client.post("/orders/commands/handle_create_order", json={"args": {
+        "product_name": "Dream Sleep Mattress", "size": "Queen", "price": 1199, "shipping_address": "1 Main St"
+    }}).json()["result"]
+    order_id = next(word.strip(".,") for word in created.split() if word.startswith("ORD"))
+
+    assert client.get(f"/orders/{order_id}").json()["status"] == "processing"
+    assert client.get("/orders/ORD999999").status_code == 404
+    assert client.post("/orders/commands/drop_tables", json={}).status_code == 404
+    update = client.post("/orders/commands/handle_update_status", json={"args": {"order_id": order_id, "new_status": "Shipped"}})
+    assert update.status_code == 200
+    assert client.get(f"/orders/{order_id}").json()["status"] == "Shipped"
+
+
+def test_health_reports_pool_stats(client):
+    client.post("/sessions")
+    assert client.get("/health").json()["agent_pool"]["active"] == 1
+
+
+class SlowAgent(Agent):
+    """Agent whose runs take a while and that records whether two turns ever overlapped."""
+
+    active: int = 0
+    overlapped: bool = False
+
+    def run(self, message=None, *, stream=False, **kwargs):
+        self.active += 1
+        self.overlapped = self.overlapped or self.active > 1
+        time.sleep(0.2)
+        self.active -= 1
+        return RunResponse(content="done")
+
+
+def test_turns_of_one_session_do_not_overlap(orders_db, monkeypatch):
+    agent = SlowAgent(name="Reasoning Agent")
+
+    def record_turn(agent, prompt, answer):
+        agent.overlapped = agent.overlapped or agent.active > 0
+
+    monkeypatch.setattr("src.interface.api.record_turn", record_turn)
+    app = create_app(AgentPool(lambda: agent), AsyncAgentRunner(), orders_db=orders_db)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(
+                client.post("/sessions/abc/messages", json={"message": "Recommend a mattress", "stream": False}),
+                client.post("/sessions/abc/messages", json={"message": "Where is ORD000001?"}),
+            )
+
+    responses = asyncio.run(main())
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert not agent.overlapped
+
+
+def test_messages_are_read_from_storage_on_every_request(orders_db, tmp_path):
+    storage = SqlAgentStorage(table_name="sessions", db_file=str(tmp_path / "sessions.sqlite"))
+    workers = [
+        TestClient(create_app(AgentPool(lambda: Agent(name="Reasoning Agent", storage=storage)), AsyncAgentRunner(), orders_db=orders_db))
+        for _ in range(2)
+    ]
+    session_id = workers[0].post("/sessions").json()["session_id"]
+    assert workers[0].get(f"/sessions/{session_id}/messages").json()["messages"] == []
+
+    # The second worker answers a turn of the same session
+    workers[1].post(f"/sessions/{session_id}/messages", json={"message": "Where is ORD000001?", "stream": False})
+
+    messages = workers[0].get(f"/sessions/{session_id}/messages").json()["messages"]
+    assert [message["content"] for message in messages][0] == "Where is ORD000001?"
+    assert workers[0].get("/sessions/unknown/messages").status_code == 404
+    assert storage.read(session_id="unknown") is None
+
+
+def test_order_endpoints_work_with_only_the_sync_db(orders_db):
+    order_id = orders_db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 1199.0, "1 Main St", "cash")
+    app = create_app(AgentPool(lambda: EchoAgent(name="Reasoning Agent")), AsyncAgentRunner(), orders_db=orders_db)
+    with TestClient(app) as client:
+        assert client.get(f"/orders/{order_id}").json()["order_id"] == order_id
+        assert client.get("/customers/CUST1/orders").json()["orders"][0]["order_id"] == order_id
+        assert client.get("/customers/CUST1/orders?limit=100000").status_code == 422
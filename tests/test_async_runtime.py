@@ -0,0 +1,126 @@
+# tests/test_async_runtime.py
+import asyncio
+import time
+import pytest
+from phi.agent import Agent, RunResponse
+from src.agents.async_runner import AsyncAgentRunner
+from src.agents.pool import AgentPool
+from src.db.async_orders import AsyncOrdersDB
+from src.db.orders import SQLiteOrdersDB
+
+
+class SleepyAgent(Agent):
+    """Agent whose run blocks like a real model call."""
+
+    delay: float = 0.2
+
+    def run(self, message=None, *, stream=False, **kwargs):
+        time.sleep(self.delay)
+        if stream:
+            return iter([RunResponse(content=word + " ") for word in message.split()])
+        return RunResponse(content=message.upper())
+
+
+class FailingAgent(Agent):
+    def run(self, message=None, *, stream=False, **kwargs):
+        def chunks():
+            yield RunResponse(content="partial")
+            raise RuntimeError("model unavailable")
+        return chunks()
+
+
+@pytest.fixture
+def orders_db():
+    db = AsyncOrdersDB(SQLiteOrdersDB(db_path=":memory:"))
+    yield db
+    db.close()
+    db.db.close()
+
+
+def test_concurrent_runs_do_not_block_the_event_loop():
+    runner = AsyncAgentRunner(max_concurrent_runs=16)
+    agents = [SleepyAgent(name=f"Agent {i}") for i in range(10)]
+
+    async def main():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(runner.arun(agent, f"hello {i}") for i, agent in enumerate(agents)))
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return responses, elapsed, ticks
+
+    responses, elapsed, ticks = asyncio.run(main())
+    assert [response.content for response in responses] == [f"HELLO {i}" for i in range(10)]
+    assert elapsed < 1.0
+    assert ticks > 5
+    runner.shutdown()
+
+
+def test_runs_of_the_same_agent_are_serialized():
+    runner = AsyncAgentRunner()
+    agent = SleepyAgent(name="Reasoning Agent", delay=0.1)
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(runner.arun(agent, "a"), runner.arun(agent, "b"))
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) >= 0.2
+    runner.shutdown()
+
+
+def test_stream_yields_chunks_and_propagates_errors():
+    runner = AsyncAgentRunner()
+
+    async def collect(agent, message):
+        return [chunk.content async for chunk in runner.arun_stream(agent, message)]
+
+    assert asyncio.run(collect(SleepyAgent(name="Reasoning Agent", delay=0), "how firm")) == ["how ", "firm "]
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(collect(FailingAgent(name="Reasoning Agent"), "hi"))
+    runner.shutdown()
+
+
+def test_pool_acquire_from_a_coroutine():
+    runner = AsyncAgentRunner()
+    pool = AgentPool(lambda: SleepyAgent(name="Reasoning Agent"))
+
+    async def main():
+        return await asyncio.gather(runner.acquire(pool, "a"), runner.acquire(pool, "a"))
+
+    first, second = asyncio.run(main())
+    assert first is second
+    runner.shutdown()
+
+
+def test_async_orders_db_round_trip(orders_db):
+    async def main():
+        order_id = await orders_db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 1199.0, "1 Main St", "cash")
+        assert await orders_db.update_order_status(order_id, "Shipped")
+        status = await orders_db.get_order_status(order_id)
+        orders, cursor = await orders_db.list_orders_by_customer("CUST1")
+        return order_id, status, orders, cursor
+
+    order_id, status, orders, cursor = asyncio.run(main())
+    assert status["status"] == "Shipped"
+    assert [order["order_id"] for order in orders] == [order_id]
+    assert cursor is None
+
+
+def test_closing_the_async_facade_leaves_the_shared_db_open():
+    db = SQLiteOrdersDB(db_path=":memory:")
+    async_db = AsyncOrdersDB(db)
+    order_id = asyncio.run(async_db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 1199.0, "1 Main St", "cash"))
+
+    async_db.close()
+
+    assert db.get_order_status(order_id)["status"]
+    db.close()
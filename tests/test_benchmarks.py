@@ -0,0 +1,38 @@
+# tests/test_benchmarks.py
+from benchmarks.common import latency_summary, percentile
+from benchmarks.fakes import FakeEmbedder
+from benchmarks.suite import bench_concurrent_writers, bench_orders, compare
+
+
+def test_fake_embedder_is_deterministic_and_similarity_preserving():
+    embedder = FakeEmbedder(dimensions=64)
+    first = embedder.get_embedding("cooling gel memory foam")
+    assert first == FakeEmbedder(dimensions=64).get_embedding("cooling gel memory foam")
+    assert len(first) == 64
+    assert embedder.get_embedding("gel foam") != embedder.get_embedding("king size")
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001 * i for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert round(summary["p50_ms"]) == 50
+    assert round(summary["p99_ms"]) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_orders_benchmarks_run_on_small_tables():
+    result = bench_orders(rows=300, operations=50)
+    assert result["rows"] == 300
+    assert result["lookup"]["count"] == 50 and result["lookup"]["ops_per_sec"] > 0
+
+    concurrent = bench_concurrent_writers(writers=3, orders_per_writer=20)
+    assert concurrent["orders"] == 60
+    assert concurrent["lock_errors"] == 0
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = {"results": {"orders": [{"rows": 10, "create": {"ops_per_sec": 100.0, "p95_ms": 1.0}}]}}
+    current = {"results": {"orders": [{"rows": 10, "create": {"ops_per_sec": 80.0, "p95_ms": 0.5}}]}}
+    regressions = compare(baseline, current, threshold=0.1)
+    assert [r["metric"] for r in regressions] == ["orders[rows=10].create.ops_per_sec"]
+    assert compare(current, baseline, threshold=0.1)[0]["metric"] == "orders[rows=10].create.p95_ms"
@@ -0,0 +1,122 @@
+# tests/test_catalog.py
+import pytest
+from src.db.orders import SQLiteOrdersDB
+from src.knowledge.catalog import CatalogIndex, Product, load_catalog_index
+from src.tools.catalog_lookup import CatalogToolkit
+from src.tools.order_manager import OrdersToolkit
+
+CATALOG_PATH = "data/SWE-GenAI_Take_Home/Sleep_Better_Product_Catalog.pdf"
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return CatalogIndex.from_pdf(CATALOG_PATH)
+
+
+def test_catalog_pdf_is_parsed_into_products(catalog):
+    assert [product.name for product in catalog.products] == [
+        "Ultra Comfort Mattress",
+        "Dream Sleep Mattress",
+        "Luxury Cloud Mattress",
+        "Essential Plus Mattress",
+        "Performance Sport Mattress",
+    ]
+    luxury = catalog.find("Luxury Cloud Mattress")
+    assert luxury.prices == {"Queen": 1899.0}
+    assert luxury.sizes == ["Twin XL", "Full", "Queen", "King", "California King", "Split King"]
+    assert (luxury.height_inches, luxury.warranty_years, luxury.trial_nights) == (14.0, 25, 180)
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("dream sleep", "Dream Sleep Mattress"),
+    ("Ultra-Comfort mattress", "Ultra Comfort Mattress"),
+    ("Essentail Plus", "Essential Plus Mattress"),
+    ("performance", "Performance Sport Mattress"),
+])
+def test_fuzzy_name_matching(catalog, name, expected):
+    assert catalog.find(name).name == expected
+
+
+def test_unknown_product_does_not_match(catalog):
+    assert catalog.find("waterbed deluxe") is None
+
+
+def test_validate_order_replaces_llm_price(catalog):
+    validation = catalog.validate_order("ultra comfort", "queen", "$1,199")
+
+    assert validation.ok
+    assert (validation.product_name, validation.size, validation.price) == ("Ultra Comfort Mattress", "Queen", 1299.0)
+
+
+def test_validate_order_rejects_unavailable_size(catalog):
+    validation = catalog.validate_order("Dream Sleep", "California King", 899)
+
+    assert not validation.ok
+    assert validation.message == "The Dream Sleep Mattress is available in: Twin, Full, Queen, King."
+
+
+def test_size_aliases_resolve(catalog):
+    assert catalog.validate_order("luxury cloud", "cal king", 2500).size == "California King"
+    assert catalog.validate_order("dream sleep", "Queen size", None).size == "Queen"
+    assert catalog.validate_order("dream sleep", "a king-sized bed", None).size == "King"
+
+
+def test_llm_price_is_not_accepted_for_sizes_without_a_catalog_price(catalog):
+    validation = catalog.validate_order("Dream Sleep", "King", 5)
+
+    assert not validation.ok
+    assert validation.price is None
+    assert validation.message == (
+        "Our catalog only lists prices for the Dream Sleep Mattress in: Queen. "
+        "The King needs a quote from our sales team before I can place the order."
+    )
+
+
+def test_index_round_trips_and_rebuilds_when_pdf_changes(catalog, tmp_path):
+    index_path = str(tmp_path / "catalog_index.json")
+    catalog.save(index_path)
+    assert load_catalog_index(CATALOG_PATH, index_path).products == catalog.products
+
+    stale = CatalogIndex([], source_hash="outdated")
+    stale.save(index_path)
+    assert len(load_catalog_index(CATALOG_PATH, index_path).products) == 5
+
+
+def test_orders_toolkit_uses_catalog_price(catalog):
+    toolkit = OrdersToolkit(db=SQLiteOrdersDB(db_path=":memory:"), catalog=catalog)
+
+    summary = toolkit.handle_summarize_order_details({"product_name": "dream sleep", "size": "queen", "price": "$799"})
+    rejected = toolkit.handle_create_order({"product_name": "Dream Sleep", "size": "Split King", "shipping_address": "1 Test St"})
+
+    assert summary.startswith("Great choice! The Queen Dream Sleep Mattress is $899 with free delivery.")
+    assert rejected == "The Dream Sleep Mattress is available in: Twin, Full, Queen, King."
+    toolkit.db.close()
+
+
+def test_catalog_toolkit_lookups(catalog):
+    toolkit = CatalogToolkit(catalog)
+
+    assert toolkit.handle_get_product_price({"product_name": "essential plus", "size": "Queen"}) == (
+        "The Queen Essential Plus Mattress is $699 with free delivery."
+    )
+    assert "Trial period: 120 nights" in toolkit.handle_get_product_specs({"product_name": "sport"})
+
+
+def test_product_specs_leave_out_fields_the_parser_missed():
+    product = Product(name="Dream Sleep Mattress", sizes=["Queen"], prices={"Queen": 899.0})
+    specs = CatalogToolkit(CatalogIndex([product])).handle_get_product_specs({"product_name": "dream sleep"})
+
+    assert specs == "Dream Sleep Mattress\nPrice: $899 (Queen)\nAvailable sizes: Queen"
+
+
+def test_orders_toolkit_reports_bad_page_arguments():
+    db = SQLiteOrdersDB(db_path=":memory:")
+    toolkit = OrdersToolkit(db=db)
+    for i in range(3):
+        db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+
+    assert toolkit.handle_list_customer_orders({"customer_id": "CUST1", "limit": "ten"}) == "Invalid limit: ten. Use a number from 1 to 100."
+    assert toolkit.handle_list_orders_by_status({"status": "processing", "cursor": "ORD000001"}).startswith("Invalid cursor: ORD000001.")
+    assert len(toolkit.handle_list_orders_since({"since": "2020-01-01", "limit": 10**9}).splitlines()) == 3
+    assert toolkit.handle_list_overdue_orders({}) == "No overdue orders"
+    db.close()
@@ -0,0 +1,110 @@
+# tests/test_delegation.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from phi.agent import Agent, RunResponse
+from src.agents.reasoning_agent import get_reasoning_agent
+from src.tools.delegation import ParallelDelegationToolkit
+
+
+class SlowAgent(Agent):
+    """Team member that answers after a fixed delay."""
+
+    delay: float = 0.2
+    calls: int = 0
+
+    def run(self, message=None, *, stream=False, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return RunResponse(content=f"{self.name} answered: {message.splitlines()[0]}")
+
+
+def make_team():
+    return [
+        SlowAgent(name="Product Details Agent"),
+        SlowAgent(name="Product Reviews Agent"),
+        SlowAgent(name="Orders Agent", delay=2.0),
+    ]
+
+
+def test_members_run_concurrently_and_results_are_merged():
+    toolkit = ParallelDelegationToolkit(make_team()[:2])
+    started = time.perf_counter()
+    result = toolkit.handle_delegate_parallel({"tasks": [
+        {"agent": "product_details_agent", "task": "Compare Dream Sleep and Luxury Cloud"},
+        {"agent": "product_reviews_agent", "task": "Summarize reviews", "expected_output": "Sentiment"},
+    ]})
+    assert time.perf_counter() - started < 0.35
+    assert "### product_details_agent\nProduct Details Agent answered: Compare Dream Sleep and Luxury Cloud" in result
+    assert "### product_reviews_agent\nProduct Reviews Agent answered: Summarize reviews" in result
+    assert toolkit.time_saved_seconds > 0.1
+
+
+def test_slow_member_times_out_without_blocking_the_others():
+    toolkit = ParallelDelegationToolkit(make_team(), member_timeout_seconds=0.5)
+    started = time.perf_counter()
+    result = toolkit.handle_delegate_parallel({"tasks": [
+        {"agent": "product_details_agent", "task": "Specs"},
+        {"agent": "orders_agent", "task": "Status of ORD000001"},
+    ]})
+    assert time.perf_counter() - started < 1.0
+    assert "Product Details Agent answered: Specs" in result
+    assert "### orders_agent\nNo answer: the agent timed out." in result
+
+
+def test_timeout_starts_when_the_member_starts_running():
+    # One shared worker: the second member queues behind the first for longer than the timeout
+    executor = ThreadPoolExecutor(max_workers=1)
+    team = [SlowAgent(name="Product Details Agent", delay=0.3), SlowAgent(name="Product Reviews Agent", delay=0.3)]
+    toolkit = ParallelDelegationToolkit(team, member_timeout_seconds=0.5, executor=executor)
+    result = toolkit.handle_delegate_parallel({"tasks": [
+        {"agent": "product_details_agent", "task": "Specs"},
+        {"agent": "product_reviews_agent", "task": "Reviews"},
+    ]})
+    assert "Product Details Agent answered: Specs" in result
+    assert "Product Reviews Agent answered: Reviews" in result
+    executor.shutdown()
+
+
+def test_queued_member_past_the_timeout_is_cancelled():
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(time.sleep, 0.5)
+    team = make_team()
+    toolkit = ParallelDelegationToolkit(team, member_timeout_seconds=0.2, executor=executor)
+    result = toolkit.handle_delegate_parallel({"tasks": [{"agent": "product_details_agent", "task": "Specs"}]})
+    executor.shutdown()
+    assert "### product_details_agent\nNo answer: the agent timed out." in result
+    assert team[0].calls == 0
+
+
+def test_member_still_running_a_timed_out_task_is_not_run_again():
+    team = make_team()
+    toolkit = ParallelDelegationToolkit(team, member_timeout_seconds=0.2)
+    first = toolkit.handle_delegate_parallel({"tasks": [
+        {"agent": "orders_agent", "task": "Status of ORD000001"},
+        {"agent": "orders_agent", "task": "Status of ORD000002"},
+    ]})
+    second = toolkit.handle_delegate_parallel({"tasks": [{"agent": "orders_agent", "task": "Status of ORD000003"}]})
+    assert "No answer: the agent timed out." in first
+    assert "No answer: the agent is still busy with an earlier task." in second
+    # The abandoned run stops before its second task
+    time.sleep(2.1)
+    assert team[2].calls == 1
+
+
+def test_tasks_are_validated():
+    toolkit = ParallelDelegationToolkit(make_team())
+    assert toolkit.handle_delegate_parallel({}) == "A list of tasks is required"
+    assert toolkit.handle_delegate_parallel({"tasks": [{"agent": "product_details_agent"}]}) == (
+        "Each task needs an agent and a task description"
+    )
+    assert toolkit.handle_delegate_parallel({"tasks": [{"agent": "billing_agent", "task": "Refund"}]}).startswith(
+        "Unknown agent: billing_agent"
+    )
+
+
+def test_parallel_delegation_is_switchable():
+    team = make_team()
+    enabled = get_reasoning_agent(team, delegation={"parallel": True, "member_timeout_seconds": 30})
+    disabled = get_reasoning_agent(team, delegation={"parallel": False, "member_timeout_seconds": 30})
+    assert any(isinstance(tool, ParallelDelegationToolkit) for tool in enabled.tools)
+    assert not disabled.tools
@@ -0,0 +1,123 @@
+# tests/test_embedding_cache.py
+import pytest
+from typing import List
+from phi.embedder import Embedder
+from src.knowledge.embedding_cache import CachedEmbedder, EmbeddingCache
+
+
+class CountingEmbedder(Embedder):
+    """Deterministic embedder that counts how many texts it was asked to embed."""
+
+    model: str = "fake-embedding"
+    dimensions: int = 3
+    calls: int = 0
+
+    def get_embedding(self, text: str) -> List[float]:
+        self.calls += 1
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+    def get_embedding_and_usage(self, text: str):
+        return self.get_embedding(text), {"total_tokens": 1}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(db_path=str(tmp_path / "embeddings.sqlite"), max_entries=3, touch_interval=0)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def embedder(cache):
+    return CachedEmbedder(embedder=CountingEmbedder(), cache=cache)
+
+
+def test_repeated_text_is_served_from_cache(embedder, cache):
+    first = embedder.get_embedding("What sizes does the Dream Sleep come in?")
+    second = embedder.get_embedding("  What sizes does the   Dream Sleep come in? ")
+
+    assert first == second
+    assert embedder.embedder.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_is_keyed_by_model(cache):
+    cache.put("model-a", "hello", [1.0, 2.0])
+
+    assert cache.get("model-a", "hello") == [1.0, 2.0]
+    assert cache.get("model-b", "hello") is None
+
+
+def test_batched_lookup_only_embeds_misses(embedder):
+    embedder.get_embedding("queen")
+
+    embeddings = embedder.get_embeddings(["queen", "king", "king"])
+
+    assert embeddings[1] == embeddings[2]
+    assert embeddings[0] == embedder.get_embedding("queen")
+    assert embedder.embedder.calls == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for text in ["a", "b", "c"]:
+        cache.put("m", text, [1.0])
+    cache.get("m", "a")
+    cache.put("m", "d", [1.0])
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+
+
+def test_recent_hits_are_served_without_a_write(tmp_path):
+    cache = EmbeddingCache(db_path=str(tmp_path / "embeddings.sqlite"), touch_interval=60)
+    cache.put("m", "hot", [1.0])
+    before = cache._conn.total_changes
+
+    for _ in range(5):
+        assert cache.get("m", "hot") == [1.0]
+
+    assert cache._conn.total_changes == before
+    cache.close()
+
+
+def test_eviction_counts_entries_written_by_other_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    first = EmbeddingCache(db_path=path, max_entries=3, recount_every=1)
+    second = EmbeddingCache(db_path=path, max_entries=3, recount_every=1)
+
+    for text in ["a", "b"]:
+        first.put("m", text, [1.0])
+    for text in ["c", "d"]:
+        second.put("m", text, [1.0])
+
+    assert first.stats()["entries"] == 3
+    assert first.get("m", "a") is None
+    assert first._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    first.close()
+    second.close()
+
+
+def test_inserts_do_not_count_the_table_every_time(tmp_path):
+    cache = EmbeddingCache(db_path=str(tmp_path / "embeddings.sqlite"), max_entries=5, recount_every=10)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    for i in range(8):
+        cache.put("m", f"text {i}", [1.0])
+    cache._conn.set_trace_callback(None)
+
+    assert not [statement for statement in statements if "COUNT(*)" in statement]
+    assert cache.stats()["entries"] == 5
+    cache.close()
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(db_path=path)
+    cache.put("m", "persisted", [0.5, 0.25])
+    cache.close()
+
+    reopened = EmbeddingCache(db_path=path)
+    assert reopened.get("m", "persisted") == [0.5, 0.25]
+    reopened.close()
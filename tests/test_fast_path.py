@@ -0,0 +1,95 @@
+# tests/test_fast_path.py
+import pytest
+from phi.agent import Agent
+from phi.storage.agent.sqlite import SqlAgentStorage
+from src.db.orders import SQLiteOrdersDB
+from src.agents.turns import record_turn
+from src.interface.fast_path import OrderStatusFastPath
+
+
+@pytest.fixture
+def orders_db():
+    db = SQLiteOrdersDB(db_path=":memory:")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def fast_path(orders_db):
+    return OrderStatusFastPath(orders_db)
+
+
+@pytest.mark.parametrize("message", [
+    "Where is my order ORD000042?",
+    "what's the status of ord42",
+    "Can you track ORD-000042 for me",
+    "ORD000042?",
+    "When will ORD000042 arrive?",
+    "Hi, where is my order ORD000042?",
+    "What's the status of my order, ORD000042? Thanks!",
+    "Is ORD000042 shipped yet?",
+    "Any update on ORD000042 please?",
+])
+def test_status_queries_are_matched(fast_path, message):
+    assert fast_path.match(message) == "ORD000042"
+
+
+@pytest.mark.parametrize("message", [
+    "I want to cancel ORD000042",
+    "Please change the address on ORD000042",
+    "Where are ORD000042 and ORD000043?",
+    "Where is my order?",
+    "I loved the mattress from ORD000042, tell me about pillows",
+    "Where is ORD000042? Also, which mattress is best for back pain?",
+    "Where is ORD000042 and how firm is the Dream Sleep?",
+    "status of ORD000042, and what pillows do you recommend?",
+    "Where is ORD000042? Is the Luxury Cloud cooling?",
+    "Track ORD000042, which pillow goes with it",
+    "I did not receive ORD000042, it says delivered but nothing is here",
+    "ORD000042 arrived damaged",
+    "Where is my order ORD000042? Please add a pillow to it.",
+    "Is ORD000042 shipped yet? I want to buy another one for my son.",
+])
+def test_ambiguous_or_other_requests_fall_back(fast_path, message):
+    assert fast_path.match(message) is None
+    assert fast_path.answer(message) is None
+
+
+def test_answer_renders_order_details(fast_path, orders_db):
+    order_id = orders_db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+    orders_db.update_order_status(order_id, "shipped")
+
+    answer = fast_path.answer(f"where is {order_id}?")
+
+    assert answer.startswith(f"Your order {order_id} for the Queen Dream Sleep Mattress is on its way!")
+    assert orders_db.get_order_status(order_id)["estimated_delivery"] in answer
+
+
+def test_unknown_order_is_answered_without_agent(fast_path):
+    assert "couldn't find an order with ID ORD000999" in fast_path.answer("status of ORD000999")
+
+
+def test_record_turn_adds_history_for_the_next_run():
+    agent = Agent(name="Test Agent")
+
+    record_turn(agent, "where is ORD000001?", "Your order ORD000001 is on its way!")
+
+    assert [message["role"] for message in agent.memory.get_messages()] == ["user", "assistant"]
+    history = agent.memory.get_messages_from_last_n_runs(last_n=1)
+    assert history[-1].content == "Your order ORD000001 is on its way!"
+
+
+def test_record_turn_keeps_the_stored_conversation(tmp_path):
+    storage = SqlAgentStorage(table_name="sessions", db_file=str(tmp_path / "sessions.sqlite"))
+    first_worker = Agent(name="Test Agent", storage=storage, session_id="s1")
+    record_turn(first_worker, "hi", "Hello!")
+    record_turn(first_worker, "do you sell pillows?", "We do.")
+
+    # Another worker's fresh agent for the same session answers on the fast path
+    second_worker = Agent(name="Test Agent", storage=storage, session_id="s1")
+    record_turn(second_worker, "where is ORD000001?", "on its way")
+
+    stored = storage.read(session_id="s1")
+    assert [message["content"] for message in stored.memory["messages"]] == [
+        "hi", "Hello!", "do you sell pillows?", "We do.", "where is ORD000001?", "on its way"
+    ]
@@ -0,0 +1,164 @@
+# tests/test_history.py
+import json
+from phi.agent import RunResponse
+from phi.memory.agent import AgentRun
+from phi.model.message import Message
+from src.agents.history import (
+    SESSION_DATA_KEY,
+    HistoryCompactingAgent,
+    HistoryCompactor,
+    count_tokens,
+    create_history_compactors,
+    extract_pinned_facts,
+    split_turns,
+)
+from src.knowledge.catalog import CatalogIndex, Product
+
+CATALOG = CatalogIndex([
+    Product(name="Ultra Comfort Mattress", sizes=["Twin", "Queen", "King"], prices={"Queen": 1299.0}),
+    Product(name="Dream Sleep Mattress", sizes=["Full", "Queen"]),
+])
+
+
+def turn(question, answer, tool_calls=None):
+    messages = [Message(role="user", content=question)]
+    if tool_calls:
+        messages.append(Message(role="assistant", tool_calls=tool_calls))
+        messages.append(Message(role="tool", content="ok", tool_call_id=tool_calls[0]["id"]))
+    messages.append(Message(role="assistant", content=answer))
+    return messages
+
+
+def long_conversation(turns=12):
+    history = turn("Tell me about the Dream Sleep mattress", "It is a memory foam mattress. " * 20)
+    history += turn("What about the Ultra Comfort mattress in Queen?", "The Queen Ultra Comfort is $1,299. " * 5)
+    history += turn(
+        "Please ship it to 42 Elm Street, Springfield, IL 62704",
+        "Your order number is ORD000017.",
+        tool_calls=[{"id": "call_1", "type": "function", "function": {
+            "name": "transfer_task_to_orders_agent",
+            "arguments": json.dumps({"product_name": "ultra comfort", "size": "queen", "price": "1299"}),
+        }}],
+    )
+    for i in range(turns - 3):
+        history += turn(f"Question {i} about pillows and sheets " * 10, f"Answer {i} " * 40)
+    return history
+
+
+def test_split_turns_keeps_tool_messages_with_their_turn():
+    turns = split_turns(long_conversation(turns=3))
+    assert len(turns) == 3
+    assert [m.role for m in turns[2]] == ["user", "assistant", "tool", "assistant"]
+
+
+def test_extract_pinned_facts():
+    facts = extract_pinned_facts(long_conversation(turns=3), CATALOG)
+    assert facts.product_name == "Ultra Comfort Mattress"
+    assert facts.size == "Queen"
+    assert facts.price == "$1299"
+    assert facts.shipping_address == "42 Elm Street, Springfield, IL 62704"
+    assert facts.order_ids == ["ORD000017"]
+
+
+def test_history_within_budget_is_unchanged():
+    history = long_conversation(turns=3)
+    result = HistoryCompactor(token_budget=100_000).compact(history)
+    assert result.messages is history
+    assert result.tokens_saved == 0
+
+
+def test_compaction_keeps_recent_turns_and_pins_facts():
+    history = long_conversation()
+    compactor = HistoryCompactor(token_budget=1500, keep_recent_turns=3, catalog=CATALOG)
+    result = compactor.compact(history)
+
+    assert result.compacted_tokens <= 1500 < result.original_tokens
+    assert result.summarized_turns == 9
+    context, recent = result.messages[0], result.messages[1:]
+    assert context.role == "system"
+    assert "Selected product: Ultra Comfort Mattress" in context.content
+    assert "Shipping address: 42 Elm Street, Springfield, IL 62704" in context.content
+    assert "Order IDs: ORD000017" in context.content
+    assert "Tools: transfer_task_to_orders_agent" in context.content
+    assert recent == [m for t in split_turns(history)[-3:] for m in t]
+    assert compactor.stats()["total_tokens_saved"] == result.tokens_saved
+
+
+def test_tight_budget_drops_oldest_summary_lines_first():
+    result = HistoryCompactor(token_budget=600, keep_recent_turns=1).compact(long_conversation())
+    context = result.messages[0].content
+    assert "earlier turns omitted" in context
+    assert "Tell me about the Dream Sleep" not in context
+    assert result.messages[-1].content.startswith("Answer 8")
+
+
+def test_agent_sends_compacted_history_to_the_model():
+    compactor = HistoryCompactor(token_budget=800, keep_recent_turns=2, catalog=CATALOG)
+    agent = HistoryCompactingAgent(
+        name="Test Agent", system_prompt="You sell mattresses.", history_compactor=compactor,
+        add_history_to_messages=True, num_history_responses=20
+    )
+    history = long_conversation()
+    for t in split_turns(history):
+        agent.memory.add_run(AgentRun(response=RunResponse(messages=t)))
+    agent.memory.add_messages(messages=history)
+
+    agent.run_response = RunResponse()
+    _, _, messages = agent.get_messages_for_run(message="Where is my order?")
+    assert messages[-1].content == "Where is my order?"
+    assert messages[0].content == "You sell mattresses."
+    assert messages[1].role == "system" and "ORD000017" in messages[1].content
+    assert agent.run_response.extra_data.history == messages[1:-1]
+    assert compactor.total_tokens_saved > 0
+
+    chats = json.loads(agent.get_chat_history())
+    assert chats[0]["role"] == "system" and "ORD000017" in chats[0]["content"]
+
+
+def test_facts_from_turns_before_the_replayed_window_stay_pinned():
+    agent = HistoryCompactingAgent(
+        name="Orders Agent", system_prompt="You take orders.",
+        history_compactor=HistoryCompactor(token_budget=100_000, catalog=CATALOG),
+        add_history_to_messages=True, num_history_responses=3
+    )
+    history = long_conversation(turns=8)
+    for t in split_turns(history):
+        agent.memory.add_run(AgentRun(response=RunResponse(messages=t)))
+    agent.memory.add_messages(messages=history)
+
+    agent.run_response = RunResponse()
+    _, _, messages = agent.get_messages_for_run(message="Ship it please")
+
+    # Only the last 3 runs are replayed; the address and order id come from the stored context
+    context = messages[1]
+    assert context.role == "system"
+    assert "Shipping address: 42 Elm Street, Springfield, IL 62704" in context.content
+    assert "Order IDs: ORD000017" in context.content
+    assert messages[2:-1] == [m for t in split_turns(history)[-3:] for m in t]
+    assert agent.session_data[SESSION_DATA_KEY]["folded_messages"] == len(history)
+
+    # The next turn only folds in the new messages
+    agent.memory.add_messages(messages=turn("Thanks", "You're welcome!"))
+    agent.run_response = RunResponse()
+    agent.get_messages_for_run(message="Bye")
+    stored = agent.session_data[SESSION_DATA_KEY]
+    assert stored["folded_messages"] == len(history) + 2
+    assert len(stored["summary"]) == 9 and stored["summary"][-1].startswith("- User: Thanks")
+
+
+def test_create_history_compactors():
+    settings = {"history_compaction": {"enabled": True, "keep_recent_turns": 2, "token_budgets": {"reasoning": 900}}}
+    compactors = create_history_compactors(settings)
+    assert compactors["reasoning"].token_budget == 900
+    settings["history_compaction"]["enabled"] = False
+    assert create_history_compactors(settings) == {}
+
+
+def test_tokens_are_counted_for_the_agents_model():
+    settings = {
+        "history_compaction": {"enabled": True, "keep_recent_turns": 2, "token_budgets": {"orders": 900}},
+        "agents": {"orders": {"model": "gpt-4o-mini"}},
+    }
+    assert create_history_compactors(settings)["orders"].model == "gpt-4o-mini"
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("Where is my order ORD000042?", "gpt-4o-mini") <= 10
@@ -0,0 +1,163 @@
+# tests/test_ingest.py
+import pytest
+from pathlib import Path
+from typing import List
+from phi.document import Document
+from phi.knowledge.pdf import PDFKnowledgeBase, PDFReader
+from phi.vectordb import VectorDb
+from src.knowledge import ingest
+from src.knowledge.ingest import ingest_all, sync_knowledge_base
+from src.knowledge.manifest import IngestionManifest
+from src.knowledge.pipeline import IngestionPipeline
+
+CATALOG_PATH = "data/SWE-GenAI_Take_Home/Sleep_Better_Product_Catalog.pdf"
+
+
+class FakeVectorDb(VectorDb):
+    """In-memory vector db that records what was written instead of embedding it."""
+
+    def __init__(self):
+        self.rows = {}
+        self.written: List[str] = []
+        self.deleted: List[str] = []
+        self.batches: List[int] = []
+
+    def create(self) -> None:
+        pass
+
+    def doc_exists(self, document: Document) -> bool:
+        return document.id in self.rows
+
+    def name_exists(self, name: str) -> bool:
+        return any(doc.name == name for doc in self.rows.values())
+
+    def insert(self, documents, filters=None) -> None:
+        self.upsert(documents, filters)
+
+    def upsert_available(self) -> bool:
+        return True
+
+    def upsert(self, documents, filters=None) -> None:
+        self.batches.append(len(documents))
+        for document in documents:
+            self.rows[document.id] = document
+            self.written.append(document.id)
+
+    def delete_ids(self, ids):
+        for _id in ids:
+            self.rows.pop(_id, None)
+            self.deleted.append(_id)
+
+    def search(self, query, limit=5, filters=None):
+        return []
+
+    def drop(self) -> None:
+        self.rows = {}
+
+    def exists(self) -> bool:
+        return True
+
+    def delete(self) -> bool:
+        self.rows = {}
+        return True
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return IngestionManifest(db_path=str(tmp_path / "manifest.sqlite"))
+
+
+@pytest.fixture
+def knowledge_base():
+    return PDFKnowledgeBase(path=CATALOG_PATH, vector_db=FakeVectorDb(), reader=PDFReader(chunk=True))
+
+
+def test_first_sync_embeds_every_chunk(knowledge_base, manifest):
+    stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+
+    assert stats["files_ingested"] == 1
+    assert stats["chunks_embedded"] == len(knowledge_base.vector_db.rows) > 0
+    assert stats["chunks_deleted"] == 0
+
+
+def test_unchanged_file_is_skipped(knowledge_base, manifest):
+    sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+    knowledge_base.vector_db.written.clear()
+
+    stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+
+    assert stats["files_skipped"] == 1
+    assert stats["chunks_embedded"] == 0
+    assert knowledge_base.vector_db.written == []
+
+
+def test_only_changed_chunks_are_embedded_and_stale_ones_deleted(knowledge_base, manifest):
+    sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+    vector_db = knowledge_base.vector_db
+    vector_db.written.clear()
+
+    # Pretend the previous ingest saw a different first chunk plus one that no longer exists
+    source_path = CATALOG_PATH
+    chunk_hashes = manifest.get_chunk_hashes("product_details_vectors", source_path)
+    first_chunk_id = sorted(chunk_hashes)[0]
+    chunk_hashes[first_chunk_id] = "outdated"
+    chunk_hashes["Sleep_Better_Product_Catalog_99_1"] = "gone"
+    manifest.record_document("product_details_vectors", source_path, "old-file-hash", chunk_hashes)
+
+    stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+
+    assert vector_db.written == [first_chunk_id]
+    assert vector_db.deleted == ["Sleep_Better_Product_Catalog_99_1"]
+    assert stats["chunks_embedded"] == 1
+    assert stats["chunks_deleted"] == 1
+
+
+def test_removed_source_deletes_its_chunks(knowledge_base, manifest):
+    manifest.record_document("product_details_vectors", "data/missing.pdf", "hash", {"missing_1_1": "abc"})
+
+    stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+
+    assert "missing_1_1" in knowledge_base.vector_db.deleted
+    assert manifest.list_sources("product_details_vectors") == [CATALOG_PATH]
+    assert stats["chunks_deleted"] == 1
+
+
+def test_parallel_pipeline_matches_the_serial_reader():
+    reader = PDFReader(chunk=True)
+    expected = [(document.id, document.content) for document in reader.read(pdf=Path(CATALOG_PATH))]
+
+    with IngestionPipeline(workers=2, pages_per_task=1, max_pending_tasks=2) as pipeline:
+        chunks = [(document.id, document.content) for document in pipeline.iter_chunks(Path(CATALOG_PATH), reader)]
+        stats = pipeline.stats()
+
+    assert chunks == expected
+    assert stats["pages"] == 4 and stats["chunks"] == len(expected)
+    assert stats["pages_per_sec"] > 0 and stats["chunks_per_sec"] > 0
+
+
+def test_sync_streams_chunks_into_bounded_upsert_batches(knowledge_base, manifest):
+    with IngestionPipeline(workers=2, pages_per_task=1, upsert_batch_size=3) as pipeline:
+        stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors", pipeline=pipeline)
+
+    vector_db = knowledge_base.vector_db
+    assert stats["pages_parsed"] == 4
+    assert stats["chunks_embedded"] == len(vector_db.rows) == sum(vector_db.batches)
+    assert max(vector_db.batches) <= 3
+    assert set(manifest.get_chunk_hashes("product_details_vectors", CATALOG_PATH)) == set(vector_db.rows)
+
+
+def test_ingest_all_builds_the_structured_indexes_once(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ingest, "load_catalog_index", lambda *args, **kwargs: calls.append("catalog"))
+    monkeypatch.setattr(ingest, "build_review_stats", lambda *args, **kwargs: calls.append("reviews"))
+    settings = {
+        "ingestion": {
+            "manifest_path": str(tmp_path / "manifest.sqlite"), "workers": 1, "pages_per_task": 8,
+            "max_pending_tasks": None, "embed_batch_size": 256, "upsert_batch_size": 1000
+        },
+        "database": {"collections": {}},
+        "data": {"product_catalog": CATALOG_PATH, "catalog_index": "", "product_reviews": "", "reviews_db": ""},
+    }
+
+    assert ingest_all(settings, {}) == {}
+    assert calls == ["catalog", "reviews"]
@@ -0,0 +1,78 @@
+# tests/test_loadgen.py
+import json
+
+from openai import OpenAI
+
+from benchmarks.fake_openai import FakeChatPolicy, FakeOpenAIServer
+from benchmarks.loadgen import LoadTestApp, loadtest_settings, run_load
+from src.config import load_settings
+
+
+def _tool(name, properties):
+    return {"type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": properties}}}
+
+
+def test_policy_picks_the_tool_matching_the_intent():
+    policy = FakeChatPolicy()
+    tools = [
+        _tool("handle_get_status", {"args": {"type": "object"}}),
+        _tool("transfer_task_to_product_reviews_agent", {"task_description": {"type": "string"}}),
+    ]
+    status = policy.reply({"messages": [{"role": "user", "content": "Where is order ORD000042?"}], "tools": tools})
+    call = status["tool_calls"][0]["function"]
+    assert call["name"] == "handle_get_status"
+    assert json.loads(call["arguments"]) == {"args": {"order_id": "ORD000042"}}
+
+    reviews = policy.reply({"messages": [{"role": "user", "content": "Reviews of the Luxury Cloud Mattress?"}], "tools": tools})
+    assert reviews["tool_calls"][0]["function"]["name"] == "transfer_task_to_product_reviews_agent"
+
+    answered = policy.reply({
+        "messages": [
+            {"role": "user", "content": "Where is order ORD000042?"},
+            {"role": "assistant", "content": None, "tool_calls": status["tool_calls"]},
+            {"role": "tool", "content": "Shipped"},
+        ],
+        "tools": tools,
+        "response_format": {"type": "json_object"},
+    })
+    assert answered["tool_calls"] == []
+    assert "Shipped" in json.loads(answered["content"])["answer"]
+
+
+def test_fake_server_speaks_the_openai_protocol():
+    with FakeOpenAIServer(latency_ms=0, jitter_ms=0, embedding_latency_ms=0) as server:
+        client = OpenAI(base_url=server.base_url, api_key="fake")
+        completion = client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "Hi there"}])
+        assert completion.choices[0].message.content
+        assert completion.usage.total_tokens > 0
+
+        chunks = list(client.chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "Hi there"}], stream=True,
+            stream_options={"include_usage": True}
+        ))
+        assert "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+        assert chunks[-1].usage is not None
+
+        embeddings = client.embeddings.create(model="text-embedding-3-small", input=["a", "b"], dimensions=32)
+        assert [len(e.embedding) for e in embeddings.data] == [32, 32]
+        assert server.app.state.stats.snapshot()["chat_completions"] == 2
+
+
+def test_small_load_run_replays_every_script(tmp_path, monkeypatch):
+    with FakeOpenAIServer(latency_ms=5, jitter_ms=0, embedding_latency_ms=0) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "fake")
+        settings = loadtest_settings(load_settings(), str(tmp_path), sessions=4)
+        frodo = LoadTestApp(settings, session_db_file=str(tmp_path / "sessions.sqlite"))
+        results = run_load(frodo, sessions=4, turn_workers=2)
+
+    assert results["errors"] == 0
+    assert results["db_lock_errors"] == 0
+    assert set(results["by_script"]) == {"product", "reviews", "order_placement", "status_check"}
+    assert results["turns"] == 10
+    assert results["fast_path_turns"] >= 1
+    assert results["turn_latency"]["p99_ms"] >= results["turn_latency"]["p50_ms"] > 0
+    assert results["traced_turns"] == 10
+    assert {"turn", "agent Reasoning Agent", "orders_db.get_order_status"} <= set(results["spans"])
+    assert results["openai_scheduler"]["requests"]["chat"] > 0
+    assert results["openai_scheduler"]["requests"]["embeddings"] > 0
@@ -0,0 +1,152 @@
+# tests/test_local_vectordb.py
+import os
+import re
+import numpy as np
+import pytest
+from typing import List
+from phi.document import Document
+from phi.embedder import Embedder
+from phi.knowledge.pdf import PDFKnowledgeBase, PDFReader
+from phi.vectordb.search import SearchType
+from src.knowledge.bases import create_vector_db
+from src.knowledge.ingest import sync_knowledge_base
+from src.knowledge.local_vectordb import BM25Index, LocalVectorDb
+from src.knowledge.manifest import IngestionManifest
+
+VOCABULARY = ["dream", "sleep", "ultra", "comfort", "cooling", "gel", "trial", "warranty", "king", "queen"]
+
+
+class KeywordEmbedder(Embedder):
+    dimensions: int = len(VOCABULARY)
+
+    def get_embedding(self, text: str) -> List[float]:
+        words = re.findall(r"[a-z]+", text.lower())
+        return [float(words.count(word)) for word in VOCABULARY]
+
+    def get_embedding_and_usage(self, text: str):
+        return self.get_embedding(text), None
+
+
+DOCUMENTS = [
+    Document(id="dream", name="catalog", content="Dream Sleep mattress with a 100 night trial"),
+    Document(id="ultra", name="catalog", content="Ultra Comfort mattress with cooling gel foam"),
+    Document(id="warranty", name="policies", content="Every mattress has a 10 year warranty"),
+]
+
+
+@pytest.fixture
+def vector_db(tmp_path):
+    db = LocalVectorDb("products", str(tmp_path), KeywordEmbedder(), search_type=SearchType.hybrid)
+    db.create()
+    db.upsert([doc.model_copy() for doc in DOCUMENTS])
+    return db
+
+
+def test_vector_search_ranks_by_cosine_similarity(vector_db):
+    results = vector_db.vector_search("cooling gel", limit=2)
+    assert len(results) == 2
+    assert results[0].id == "ultra"
+
+
+def test_keyword_search_only_returns_matching_documents(vector_db):
+    assert [doc.id for doc in vector_db.keyword_search("warranty years")] == ["warranty"]
+    assert vector_db.keyword_search("pillow") == []
+
+
+def test_hybrid_search_combines_vector_and_bm25(vector_db):
+    # "year" is not in the embedding vocabulary, so only BM25 can find the warranty chunk
+    assert vector_db.search("10 year", limit=1)[0].id == "warranty"
+    assert vector_db.search("dream sleep trial", limit=1)[0].id == "dream"
+
+
+def test_upsert_replaces_by_id_and_delete_ids(vector_db):
+    vector_db.upsert([Document(id="dream", name="catalog", content="Dream Sleep mattress in king and queen")])
+    assert vector_db.get_count() == 3
+    assert vector_db.vector_search("king queen", limit=1)[0].id == "dream"
+
+    vector_db.delete_ids(["ultra", "missing"])
+    assert vector_db.get_count() == 2
+    assert not vector_db.id_exists("ultra")
+    assert vector_db.keyword_search("cooling") == []
+
+
+def test_collection_is_memory_mapped_from_disk(vector_db, tmp_path):
+    reopened = LocalVectorDb("products", str(tmp_path), KeywordEmbedder(), search_type=SearchType.hybrid)
+    assert reopened.exists()
+    assert reopened.get_count() == 3
+    assert isinstance(reopened._matrix, np.memmap)
+    assert reopened._matrix.dtype == np.float32 and reopened._matrix.flags["C_CONTIGUOUS"]
+    assert reopened.search("cooling gel", limit=1)[0].id == "ultra"
+    assert reopened.doc_exists(DOCUMENTS[2]) and reopened.name_exists("policies")
+
+
+def test_other_processes_see_new_writes(tmp_path):
+    writer = LocalVectorDb("products", str(tmp_path), KeywordEmbedder(), search_type=SearchType.hybrid)
+    writer.create()
+    writer.upsert([DOCUMENTS[0].model_copy()])
+    reader = LocalVectorDb("products", str(tmp_path), KeywordEmbedder(), search_type=SearchType.hybrid)
+    assert reader.get_count() == 1
+
+    writer.upsert([doc.model_copy() for doc in DOCUMENTS[1:]])
+    assert reader.get_count() == 3
+    assert reader.search("cooling gel", limit=1)[0].id == "ultra"
+
+    writer.delete_ids(["dream"])
+    assert reader.get_count() == 2
+
+
+def test_appends_are_written_in_place_and_survive_an_uncommitted_append(tmp_path):
+    db = LocalVectorDb("products", str(tmp_path), KeywordEmbedder())
+    db.create()
+    for doc in DOCUMENTS:
+        db.upsert([doc.model_copy()])
+    vectors_path, _ = db._paths()
+    assert os.path.getsize(vectors_path) == 3 * len(VOCABULARY) * 4
+
+    # A writer that died after appending vectors but before committing their records
+    with open(vectors_path, "ab") as f:
+        f.write(b"\0" * len(VOCABULARY) * 4)
+    reopened = LocalVectorDb("products", str(tmp_path), KeywordEmbedder())
+    assert reopened.get_count() == 3
+    reopened.upsert([Document(id="king", name="catalog", content="King size")])
+    assert os.path.getsize(vectors_path) == 4 * len(VOCABULARY) * 4
+    assert reopened.vector_search("king", limit=1)[0].id == "king"
+
+
+def test_filters_and_drop(tmp_path):
+    db = LocalVectorDb("filtered", str(tmp_path), KeywordEmbedder())
+    db.upsert([DOCUMENTS[0].model_copy()], filters={"source": "catalog"})
+    db.upsert([DOCUMENTS[2].model_copy()], filters={"source": "policies"})
+    assert [doc.id for doc in db.search("mattress", filters={"source": "policies"})] == ["warranty"]
+
+    db.drop()
+    assert not db.exists()
+    assert db.search("mattress") == []
+
+
+def test_bm25_prefers_rare_terms():
+    index = BM25Index(["mattress foam", "mattress gel", "mattress"])
+    scores = index.scores("mattress gel")
+    assert scores.argmax() == 1
+
+
+def test_settings_select_local_backend_and_ingest_into_it(tmp_path):
+    settings = {
+        "vector_store": {"backend": "local", "local_path": str(tmp_path / "vectors")},
+        "database": {"url": "unused"},
+    }
+    vector_db = create_vector_db(settings, "product_details_vectors", KeywordEmbedder())
+    assert isinstance(vector_db, LocalVectorDb)
+
+    knowledge_base = PDFKnowledgeBase(
+        path="data/SWE-GenAI_Take_Home/Sleep_Better_Product_Catalog.pdf",
+        vector_db=vector_db,
+        reader=PDFReader(chunk=True),
+    )
+    manifest = IngestionManifest(db_path=str(tmp_path / "manifest.sqlite"))
+    stats = sync_knowledge_base(knowledge_base, manifest, "product_details_vectors")
+    assert stats["chunks_embedded"] == vector_db.get_count() > 0
+    assert "Copper" in knowledge_base.search("copper infused foam", num_documents=1)[0].content
+
+    with pytest.raises(ValueError):
+        create_vector_db({"vector_store": {"backend": "faiss"}}, "x", KeywordEmbedder())
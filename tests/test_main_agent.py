@@ -0,0 +1,57 @@
+# tests/test_main_agent.py
+import copy
+import subprocess
+import sys
+import pytest
+from benchmarks.startup_profile import parse_importtime
+from src.agents.main_agent import build_app
+from src.config import load_settings
+
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = copy.deepcopy(load_settings())
+    settings["data"]["catalog_index"] = str(tmp_path / "catalog_index.json")
+    settings["data"]["reviews_db"] = str(tmp_path / "reviews.sqlite")
+    settings["database"]["orders_path"] = str(tmp_path / "orders.sqlite")
+    return settings
+
+
+def test_importing_main_agent_loads_no_heavy_dependencies():
+    code = (
+        "import sys, src.agents.main_agent; "
+        "print(','.join(m for m in ('phi.agent', 'phi.vectordb.pgvector', 'sqlalchemy', 'openai', 'pypdf') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+    assert result.stderr == ""
+
+
+def test_components_are_built_on_first_use_only(settings):
+    frodo = build_app(settings)
+    assert frodo.built() == []
+
+    toolkit = frodo.catalog_toolkit
+    assert frodo.built() == ["catalog", "catalog_toolkit"]
+    assert frodo.catalog_toolkit is toolkit
+    assert "Dream Sleep Mattress" in toolkit.handle_get_product_specs({"product_name": "dream sleep"})
+
+
+def test_disabled_orders_agent_builds_no_orders_db(settings):
+    settings["agents"]["orders"]["enabled"] = False
+    frodo = build_app(settings)
+    assert frodo.orders_db is None
+    assert frodo.order_status_fast_path is None
+    assert frodo.async_orders_db is None
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:       300 |        420 | src.config\n"
+    )
+    assert parse_importtime(output) == [
+        {"module": "_io", "self_us": 120, "cumulative_us": 120, "depth": 1},
+        {"module": "src.config", "self_us": 300, "cumulative_us": 420, "depth": 0},
+    ]
@@ -92,4 +92,282 @@ def test_nonexistent_order(orders_db):
     
     # Try to update non-existent order
     updated = orders_db.update_order_status("NONEXISTENT", "processing")
-    assert updated is False
\ No newline at end of file
+    assert updated is False
+
+def test_connection_is_reused_and_tuned(orders_db):
+    """Test that each thread keeps one WAL-mode connection"""
+    conn = orders_db._connect()
+    assert orders_db._connect() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == orders_db.busy_timeout_ms
+
+
+def test_concurrent_sessions_share_one_db(orders_db):
+    """Test status reads and updates from many threads at once"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    order_ids = [
+        orders_db.create_order("CUST123", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+        for _ in range(10)
+    ]
+
+    def ship(order_id):
+        assert orders_db.update_order_status(order_id, "shipped") is True
+        return orders_db.get_order_status(order_id)["status"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(ship, order_ids * 5))
+
+    assert statuses == ["shipped"] * len(order_ids) * 5
+
+
+def test_close_and_context_manager(tmp_path):
+    """Test that close() releases connections and the db can be used as a context manager"""
+    with SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite")) as db:
+        order_id = db.create_order("CUST123", "Essential Plus Mattress", "Full", 699.00, "9 Test Rd", "cash")
+        assert db.get_order_status(order_id)["status"] == "processing"
+        conn = db._connect()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_connections_of_finished_threads_are_closed(tmp_path):
+    """Test that a new thread per request (like Streamlit reruns) doesn't leak connections"""
+    import gc
+    import threading
+
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+    order_id = db.create_order("CUST123", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+    connections = []
+    for _ in range(20):
+        thread = threading.Thread(target=lambda: connections.append(db._connect()) or db.get_order_status(order_id))
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(db._connections) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute("SELECT 1")
+    assert db.get_order_status(order_id)["status"] == "processing"
+    db.close()
+
+
+def test_in_memory_db_is_shared_across_threads():
+    """Test that ':memory:' is one database for every thread"""
+    import threading
+
+    db = SQLiteOrdersDB(db_path=":memory:")
+    order_id = db.create_order("CUST123", "Luxury Cloud Mattress", "King", 1899.00, "5 Test Ln", "cash")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(db.get_order_status(order_id)))
+    thread.start()
+    thread.join()
+
+    assert results[0]["product_name"] == "Luxury Cloud Mattress"
+    db.close()
+
+
+def test_order_ids_are_sequential(orders_db):
+    """Test that order ids keep the ORD000123 format and increase by one"""
+    first = orders_db.create_order_draft("CUST123", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St")
+    second = orders_db.create_order("CUST123", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+
+    assert len(first) == 9 and first[3:].isdigit()
+    assert int(second[3:]) == int(first[3:]) + 1
+
+
+def test_concurrent_order_creation_has_unique_ids(tmp_path):
+    """Test that concurrent sessions never receive the same order id"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+
+    def place(i):
+        return db.create_order(f"CUST{i}", "Ultra Comfort Mattress", "Queen", 1299.00, "1 Test St", "cash")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        order_ids = list(pool.map(place, range(200)))
+
+    assert len(set(order_ids)) == 200
+    assert sorted(order_ids) == [f"ORD{i:06d}" for i in range(1, 201)]
+    db.close()
+
+
+def test_sequence_is_seeded_from_existing_orders(tmp_path):
+    """Test that the id counter continues after orders created before it existed"""
+    path = str(tmp_path / "orders.sqlite")
+    db = SQLiteOrdersDB(db_path=path)
+    db.create_order("CUST1", "Ultra Comfort Mattress", "Queen", 1299.00, "1 Test St", "cash")
+    db._connect().execute("DROP TABLE order_sequence")
+    db.close()
+
+    reopened = SQLiteOrdersDB(db_path=path)
+    assert reopened.create_order("CUST2", "Ultra Comfort Mattress", "Queen", 1299.00, "1 Test St", "cash") == "ORD000002"
+    reopened.close()
+
+
+@pytest.fixture
+def listing_db(tmp_path):
+    """A fresh database with orders for two customers spread over several days"""
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+    for i in range(25):
+        customer_id = "CUSTA" if i % 2 == 0 else "CUSTB"
+        order_id = db.create_order(customer_id, "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+        order_date = (datetime(2026, 1, 1) + timedelta(days=i)).isoformat()
+        db._connect().execute("UPDATE orders SET order_date = ? WHERE order_id = ?", (order_date, order_id))
+    db._connect().commit()
+    yield db
+    db.close()
+
+
+def test_list_orders_by_customer_pages_through_everything(listing_db):
+    """Test keyset pagination over a customer's orders"""
+    seen, cursor = [], None
+    while True:
+        orders, cursor = listing_db.list_orders_by_customer("CUSTA", limit=5, after=cursor)
+        seen.extend(order["order_id"] for order in orders)
+        if cursor is None:
+            break
+
+    assert len(seen) == 13
+    assert seen == sorted(seen)
+    assert all(order["customer_id"] == "CUSTA" for order in orders)
+
+
+def test_list_orders_by_status_older_than(listing_db):
+    """Test finding orders still processing that were placed before a cutoff"""
+    listing_db.update_order_status("ORD000001", "shipped")
+
+    orders, cursor = listing_db.list_orders_by_status("processing", older_than=datetime(2026, 1, 6), limit=10)
+
+    assert [order["order_id"] for order in orders] == ["ORD000002", "ORD000003", "ORD000004", "ORD000005"]
+    assert cursor is None
+
+
+def test_iter_orders_since_streams_in_order(listing_db):
+    """Test iterating orders placed on or after a date across several pages"""
+    orders = list(listing_db.iter_orders_since(datetime(2026, 1, 20), batch_size=2))
+
+    assert [order["order_id"] for order in orders] == [f"ORD{i:06d}" for i in range(20, 26)]
+
+
+def test_list_overdue_orders_skips_closed_orders(listing_db):
+    """Test listing open orders past their estimated delivery, most overdue first, across pages"""
+    conn = listing_db._connect()
+    for i, order_id in enumerate(["ORD000004", "ORD000001", "ORD000002", "ORD000003"]):
+        conn.execute("UPDATE orders SET estimated_delivery = ? WHERE order_id = ?", (f"2026-01-0{i + 1}T00:00:00", order_id))
+    conn.commit()
+    listing_db.update_order_status("ORD000002", "Delivered")
+
+    first, cursor = listing_db.list_overdue_orders(datetime(2026, 1, 10), limit=2)
+    rest, last_cursor = listing_db.list_overdue_orders(datetime(2026, 1, 10), limit=2, after=cursor)
+
+    assert [order["order_id"] for order in first + rest] == ["ORD000004", "ORD000001", "ORD000003"]
+    assert last_cursor is None
+
+
+def test_listing_queries_use_indexes(listing_db):
+    """Test that none of the listing queries scan the orders table"""
+    conn = listing_db._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    listing_db.list_orders_by_customer("CUSTA", limit=5, after="ORD000003")
+    listing_db.list_orders_by_status("processing", older_than=datetime(2026, 1, 6), after="2026-01-02|ORD000002")
+    listing_db.list_orders_since(datetime(2026, 1, 20), after="2026-01-21|ORD000021")
+    listing_db.list_overdue_orders(datetime(2026, 2, 1), after="2026-01-02T00:00:00|ORD000002")
+    conn.set_trace_callback(None)
+
+    selects = [statement for statement in statements if statement.lstrip().startswith("SELECT")]
+    assert len(selects) == 4
+    for statement in selects:
+        plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}"))
+        assert "INDEX" in plan, plan
+        assert "SCAN orders" not in plan, plan
+
+
+def test_bulk_create_orders_reports_failed_rows(tmp_path):
+    """Test bulk creation with a mix of valid and invalid rows"""
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+    rows = [
+        {"customer_id": "CUST1", "product_name": "Dream Sleep Mattress", "size": "Queen", "price": "899", "shipping_address": "1 Test St"},
+        {"customer_id": "CUST2", "product_name": "Dream Sleep Mattress", "size": "Queen", "shipping_address": "2 Test St"},
+        {"customer_id": "CUST3", "product_name": "Dream Sleep Mattress", "size": "Queen", "price": "abc", "shipping_address": "3 Test St"},
+        {"customer_id": "CUST4", "product_name": "Luxury Cloud Mattress", "size": "King", "price": 1899, "shipping_address": "4 Test St", "payment_method": "card"},
+    ]
+
+    result = db.bulk_create_orders(rows)
+
+    assert result["created"] == ["ORD000001", "ORD000002"]
+    assert [failure["row"] for failure in result["failed"]] == [1, 2]
+    assert db.get_order_status("ORD000002")["product_name"] == "Luxury Cloud Mattress"
+    assert db.create_order("CUST5", "Dream Sleep Mattress", "Queen", 899.00, "5 Test St", "cash") == "ORD000003"
+    db.close()
+
+
+def test_bulk_update_status_reports_unknown_orders(tmp_path):
+    """Test bulk status transitions with unknown order ids"""
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+    order_id = db.create_order("CUST1", "Dream Sleep Mattress", "Queen", 899.00, "1 Test St", "cash")
+
+    result = db.bulk_update_status([(order_id, "shipped"), ("ORD999999", "shipped"), (order_id, "")])
+
+    assert result["updated"] == 1
+    assert [(failure["row"], failure["order_id"]) for failure in result["failed"]] == [(1, "ORD999999"), (2, order_id)]
+    assert db.get_order_status(order_id)["status"] == "shipped"
+    db.close()
+
+
+def test_import_orders_streams_csv_and_jsonl(tmp_path):
+    """Test the chunked CSV/JSONL import entry point"""
+    import json
+    from src.db.import_orders import import_orders
+
+    csv_path = tmp_path / "orders.csv"
+    csv_path.write_text(
+        "customer_id,product_name,size,price,shipping_address\n"
+        + "".join(f"CUST{i},Dream Sleep Mattress,Queen,899,{i} Test St\n" for i in range(7))
+        + "CUST7,Dream Sleep Mattress,Queen,,7 Test St\n"
+    )
+    jsonl_path = tmp_path / "updates.jsonl"
+    jsonl_path.write_text("\n".join(
+        json.dumps({"order_id": f"ORD{i:06d}", "status": "delivered"}) for i in range(1, 10)
+    ))
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+
+    created = import_orders(db, str(csv_path), kind="create", chunk_size=3)
+    updated = import_orders(db, str(jsonl_path), kind="status", chunk_size=4)
+
+    assert (created["processed"], created["succeeded"]) == (8, 7)
+    assert [failure["row"] for failure in created["failed"]] == [8]
+    assert (updated["processed"], updated["succeeded"]) == (9, 7)
+    assert [failure["row"] for failure in updated["failed"]] == [8, 9]
+    assert db.get_order_status("ORD000007")["status"] == "delivered"
+    db.close()
+
+
+def test_import_orders_reports_malformed_jsonl_lines(tmp_path):
+    """Test that a bad JSONL line is a failed row, not an aborted import"""
+    import json
+    from src.db.import_orders import import_orders
+
+    path = tmp_path / "orders.jsonl"
+    order = {"customer_id": "CUST1", "product_name": "Dream Sleep Mattress", "size": "Queen", "price": 899,
+             "shipping_address": "1 Test St"}
+    path.write_text("\n".join([json.dumps(order), "{not json", json.dumps(order), "[1, 2]", json.dumps(order)]))
+    db = SQLiteOrdersDB(db_path=str(tmp_path / "orders.sqlite"))
+
+    result = import_orders(db, str(path), kind="create", chunk_size=2)
+
+    assert (result["processed"], result["succeeded"]) == (5, 3)
+    assert [failure["row"] for failure in result["failed"]] == [2, 4]
+    assert result["failed"][0]["error"].startswith("Invalid JSON")
+    assert result["failed"][1]["error"] == "Expected a JSON object, got list"
+    db.close()
+
+
+def test_malformed_page_cursor_is_rejected():
+    db = SQLiteOrdersDB(db_path=":memory:")
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        db.list_orders_by_status("processing", after="ORD000001")
+    db.close()
@@ -0,0 +1,143 @@
+# tests/test_response_cache.py
+import re
+import time
+import pytest
+from typing import List
+from phi.agent import Agent, RunResponse
+from phi.embedder import Embedder
+from src.agents.cached_agent import CachedResponseAgent
+from src.knowledge.manifest import IngestionManifest
+from src.knowledge.response_cache import SemanticResponseCache
+
+VOCABULARY = ["dream", "sleep", "firm", "firmness", "cooling", "trial", "sizes", "king", "price"]
+SYNONYMS = {"firmness": "firm"}
+
+
+class BagOfWordsEmbedder(Embedder):
+    """Embeds text as keyword counts so paraphrases sharing keywords score as similar."""
+
+    dimensions: int = len(VOCABULARY)
+    calls: int = 0
+
+    def get_embedding(self, text: str) -> List[float]:
+        self.calls += 1
+        words = [SYNONYMS.get(word, word) for word in re.findall(r"[a-z]+", text.lower())]
+        return [float(words.count(word)) for word in VOCABULARY]
+
+
+@pytest.fixture
+def cache():
+    return SemanticResponseCache(BagOfWordsEmbedder(), similarity_threshold=0.95, ttl_seconds=60, max_entries=2)
+
+
+def test_paraphrase_hits_cached_answer(cache):
+    cache.store("How firm is the Dream Sleep?", "Medium-firm.")
+    assert cache.lookup("dream sleep firmness") == "Medium-firm."
+    assert cache.lookup("What is the trial period?") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_exact_normalized_question_skips_embedding(cache):
+    cache.store("What sizes?", "Twin to King.")
+    calls = cache.embedder.calls
+    assert cache.lookup("  what   SIZES? ") == "Twin to King."
+    assert cache.embedder.calls == calls
+
+
+def test_lru_eviction(cache):
+    cache.store("dream sleep price", "$999")
+    cache.store("cooling", "Gel foam.")
+    cache.lookup("dream sleep price")
+    cache.store("trial", "100 nights.")
+    assert cache.lookup("cooling") is None
+    assert cache.lookup("dream sleep price") == "$999"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    cache.store("cooling", "Gel foam.")
+    now = time.time()
+    monkeypatch.setattr("src.knowledge.response_cache.time.time", lambda: now + 61)
+    assert cache.lookup("cooling") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidated_when_collection_is_reingested(tmp_path):
+    manifest = IngestionManifest(db_path=str(tmp_path / "manifest.sqlite"))
+    manifest.record_document("product_details", "catalog.pdf", "v1", {})
+    cache = SemanticResponseCache(
+        BagOfWordsEmbedder(),
+        version_fn=lambda: manifest.get_collection_version("product_details"),
+        version_check_seconds=0
+    )
+    cache.store("cooling", "Gel foam.")
+    assert cache.lookup("cooling") == "Gel foam."
+
+    manifest.record_document("product_details", "catalog.pdf", "v2", {})
+    assert cache.lookup("cooling") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_collection_version_is_read_at_most_once_per_interval(monkeypatch):
+    reads = []
+    cache = SemanticResponseCache(BagOfWordsEmbedder(), version_fn=lambda: reads.append(1) or "v1", version_check_seconds=5)
+    now = time.monotonic()
+    monkeypatch.setattr("src.knowledge.response_cache.time.monotonic", lambda: now + 1)
+    for _ in range(10):
+        cache.lookup("cooling")
+    assert len(reads) == 1
+
+    monkeypatch.setattr("src.knowledge.response_cache.time.monotonic", lambda: now + 6)
+    cache.lookup("cooling")
+    assert len(reads) == 2
+
+
+def test_cached_agent_serves_repeat_questions_without_a_model_call(cache, monkeypatch):
+    model_calls = []
+
+    def fake_run(self, message=None, *, stream=False, **kwargs):
+        model_calls.append(message)
+        if stream:
+            return iter([RunResponse(content="Gel "), RunResponse(content="foam.")])
+        return RunResponse(content="Medium-firm.")
+
+    monkeypatch.setattr(Agent, "run", fake_run)
+
+    def new_session():
+        return CachedResponseAgent(name="Product Details Agent", response_cache=cache)
+
+    assert new_session().run("How firm is the Dream Sleep?").content == "Medium-firm."
+    assert new_session().run("dream sleep firmness").content == "Medium-firm."
+    assert "".join(chunk.content for chunk in new_session().run("cooling", stream=True)) == "Gel foam."
+    assert [chunk.content for chunk in new_session().run("Cooling?", stream=True)] == ["Gel foam."]
+    assert model_calls == ["How firm is the Dream Sleep?", "cooling"]
+
+    # Runs with images are never cached
+    new_session().run("dream sleep firmness", images=["photo.png"])
+    assert len(model_calls) == 3
+
+
+def test_cached_answers_are_only_used_to_open_a_conversation(cache, monkeypatch):
+    model_calls = []
+
+    def fake_run(self, message=None, *, stream=False, **kwargs):
+        model_calls.append(message)
+        return RunResponse(content="King is $1,299.")
+
+    monkeypatch.setattr(Agent, "run", fake_run)
+    cache.store("What is the price in King?", "The Dream Sleep King is $999.")
+    agent = CachedResponseAgent(name="Product Details Agent", response_cache=cache)
+
+    # A cache hit is recorded, so the follow-up is answered by the model with that context
+    assert agent.run("price in King?").content == "The Dream Sleep King is $999."
+    assert [message.role for message in agent.memory.messages] == ["user", "assistant"]
+    assert agent.run("What is the price in King?").content == "King is $1,299."
+    assert model_calls == ["What is the price in King?"]
+
+
+def test_agent_without_cache_passes_through(monkeypatch):
+    monkeypatch.setattr(Agent, "run", lambda self, message=None, *, stream=False, **kwargs: RunResponse(content=message))
+    agent = CachedResponseAgent(name="Product Reviews Agent")
+    assert agent.run("hello").content == "hello"
@@ -0,0 +1,86 @@
+# tests/test_reviews.py
+import pytest
+from src.knowledge.reviews import ReviewStatsDB, build_review_stats, parse_reviews
+from src.tools.review_stats import ReviewsToolkit
+
+REVIEWS_PATH = "data/SWE-GenAI_Take_Home/Sleep_Better_Product_Reviews.pdf"
+
+SAMPLE_TEXT = """Product   Reviews   Database
+
+Ultra   Comfort   Mattress   Reviews
+
+    1.  ⭐⭐⭐⭐⭐     "Best  sleep  in years!  Perfect  balance
+        of soft and firm."(John D., Verified Buyer)
+    2.  ⭐⭐     "Too  firm."(Carlos H., 2024-05-02)
+
+Dream   Sleep   Mattress   Reviews
+
+    1.  ⭐⭐⭐⭐     "Great value."(Jenny R., Verified Buyer)
+"""
+
+
+@pytest.fixture(scope="module")
+def stats_db(tmp_path_factory):
+    return build_review_stats(REVIEWS_PATH, str(tmp_path_factory.mktemp("reviews") / "reviews.sqlite"))
+
+
+def test_parse_reviews_extracts_product_rating_and_verified_flag():
+    reviews = parse_reviews(SAMPLE_TEXT)
+    assert [(r.product_name, r.rating, r.verified) for r in reviews] == [
+        ("Ultra Comfort Mattress", 5, True),
+        ("Ultra Comfort Mattress", 2, False),
+        ("Dream Sleep Mattress", 4, True),
+    ]
+    assert reviews[0].content == "Best sleep in years! Perfect balance of soft and firm."
+    assert reviews[0].reviewer == "John D."
+    assert reviews[1].review_date == "2024-05-02"
+
+
+def test_aggregates_only_count_verified_reviews(tmp_path):
+    db = ReviewStatsDB(db_path=str(tmp_path / "reviews.sqlite"))
+    db.rebuild(parse_reviews(SAMPLE_TEXT), "sample.pdf", "hash")
+    summary = db.get_summary("ultra comfort")
+    assert summary["review_count"] == 2
+    assert summary["verified_count"] == 1
+    assert summary["average_rating"] == 5.0
+    assert summary["rating_histogram"] == {1: 0, 2: 0, 3: 0, 4: 0, 5: 1}
+    assert summary["top_critical"] == []
+    assert db.get_reviews("ultra comfort", max_rating=2) == []
+
+
+def test_reviews_pdf_is_aggregated_per_product(stats_db):
+    summaries = stats_db.list_summaries()
+    assert sorted(s["product_name"] for s in summaries) == [
+        "Dream Sleep Mattress",
+        "Essential Plus Mattress",
+        "Luxury Cloud Mattress",
+        "Performance Sport Mattress",
+        "Ultra Comfort Mattress",
+    ]
+    dream = stats_db.get_summary("Dream Sleep")
+    assert sum(dream["rating_histogram"].values()) == dream["verified_count"] == 10
+    assert dream["average_rating"] == pytest.approx(3.6)
+    assert all(review["rating"] >= 4 for review in dream["top_positive"])
+    assert all(review["rating"] <= 3 for review in dream["top_critical"])
+
+
+def test_rebuild_is_skipped_when_pdf_is_unchanged(stats_db, monkeypatch):
+    monkeypatch.setattr(ReviewStatsDB, "rebuild", lambda *args: pytest.fail("rebuilt unchanged reviews"))
+    build_review_stats(REVIEWS_PATH, stats_db.db_path)
+
+
+def test_get_reviews_filters_by_rating(stats_db):
+    reviews = stats_db.get_reviews("Essential Plus", min_rating=1, max_rating=2, limit=10)
+    assert reviews and all(review["rating"] <= 2 for review in reviews)
+    assert len(stats_db.get_reviews("Essential Plus", limit=3)) == 3
+
+
+def test_reviews_toolkit_formats_summary(stats_db):
+    toolkit = ReviewsToolkit(stats_db)
+    summary = toolkit.handle_get_review_summary({"product_name": "dream sleep mattress"})
+    assert summary.startswith("Dream Sleep Mattress: 3.6/5 from 10 verified reviews")
+    assert "Top critical:" in summary
+    assert toolkit.handle_get_review_summary({"product_name": "Sofa Bed"}) == "No reviews found for: Sofa Bed"
+    assert toolkit.handle_get_review_summary({}) == "Product name is required"
+    assert toolkit.handle_compare_product_ratings({}).count("/5") == 5
+    assert toolkit.handle_get_reviews({"product_name": "dream", "min_rating": "x"}) == "Ratings and limit must be whole numbers"
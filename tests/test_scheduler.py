@@ -0,0 +1,152 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import httpx
+import pytest
+from openai import OpenAI
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from src.llm.scheduler import (
+    EmbeddingBatcher,
+    OpenAIScheduler,
+    ScheduledTransport,
+    TokenBucket,
+    create_openai_scheduler,
+    estimate_request_tokens,
+    request_lane,
+)
+
+
+def _scheduler(chat_rpm=600, chat_tpm=1_000_000, **kwargs):
+    limits = {
+        "chat": {"requests_per_minute": chat_rpm, "tokens_per_minute": chat_tpm},
+        "embeddings": {"requests_per_minute": 3000, "tokens_per_minute": 1_000_000},
+    }
+    return OpenAIScheduler(limits, **kwargs)
+
+
+def test_token_bucket_refills_continuously_up_to_one_minute():
+    bucket = TokenBucket(per_minute=60, now=0.0)
+    bucket.take(60, now=0.0)
+    assert bucket.wait_time(1, now=0.0) == 1.0
+    assert bucket.wait_time(1, now=0.5) == 0.5
+    assert bucket.wait_time(1, now=1.0) == 0.0
+    assert bucket.wait_time(1000, now=3600.0) == 0.0
+    assert estimate_request_tokens(b'{"input": ["abcdefgh", "abcd"]}') == 5
+    assert estimate_request_tokens(b'{"messages": [], "max_tokens": 100}') == 100
+
+
+def test_interactive_requests_go_before_waiting_background_requests():
+    scheduler = _scheduler(chat_rpm=600)
+    for _ in range(600):
+        scheduler.acquire("chat", 1)
+
+    order = []
+
+    def request(lane, name):
+        with request_lane(lane):
+            scheduler.acquire("chat", 1)
+        order.append(name)
+
+    background = [threading.Thread(target=request, args=("background", f"b{i}")) for i in range(2)]
+    for thread in background:
+        thread.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=request, args=("interactive", "i0"))
+    interactive.start()
+    for thread in background + [interactive]:
+        thread.join()
+
+    # One request refills every 0.1s: the interactive one, queued last, overtakes the waiting background one
+    assert order.index("i0") < order.index("b1")
+    stats = scheduler.stats()
+    assert stats["max_queue_depth"]["background"] == 2
+    assert stats["wait"]["interactive"]["max_ms"] > 0
+    assert stats["queue_depth"] == {"interactive": 0, "background": 0}
+
+
+def test_transport_retries_rate_limited_requests_with_backoff():
+    responses = [httpx.Response(429, headers={"retry-after": "0"}), httpx.Response(200, json={"ok": True})]
+    mock = httpx.MockTransport(lambda request: responses.pop(0))
+    scheduler = _scheduler()
+    client = httpx.Client(transport=ScheduledTransport(scheduler, transport=mock))
+
+    response = client.post("https://api.openai.com/v1/chat/completions", json={"messages": []})
+
+    assert response.json() == {"ok": True}
+    stats = scheduler.stats()
+    assert stats["requests"]["chat"] == 2
+    assert stats["retries"]["chat"] == 1 and stats["rate_limited"]["chat"] == 1
+
+
+def test_transport_retries_connection_errors_and_timeouts():
+    outcomes = [httpx.ConnectError("refused"), httpx.ReadTimeout("slow"), httpx.Response(408), httpx.Response(200, json={"ok": True})]
+
+    def handler(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler = _scheduler(backoff_base_seconds=0.001)
+    client = httpx.Client(transport=ScheduledTransport(scheduler, transport=httpx.MockTransport(handler)))
+
+    assert client.post("https://api.openai.com/v1/embeddings", json={"input": "a"}).json() == {"ok": True}
+    assert scheduler.stats()["retries"]["embeddings"] == 3
+
+    scheduler.max_retries = 0
+    outcomes.append(httpx.ConnectError("refused"))
+    with pytest.raises(httpx.ConnectError):
+        client.post("https://api.openai.com/v1/embeddings", json={"input": "a"})
+
+
+def test_batcher_merges_concurrent_callers_into_one_request():
+    calls = []
+
+    def embed_batch(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch_size=64, window_ms=100)
+    results = {}
+
+    def embed(text):
+        results[text] = batcher.embed([text])[0]
+
+    threads = [threading.Thread(target=embed, args=("x" * i,)) for i in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"x" * i: [float(i)] for i in range(1, 9)}
+    assert len(calls) < 8 and sum(len(call) for call in calls) == 8
+    assert batcher.stats()["texts"] == 8
+
+
+def test_openai_client_requests_go_through_the_scheduler():
+    scheduler = _scheduler()
+    with FakeOpenAIServer(latency_ms=0, jitter_ms=0, embedding_latency_ms=0) as server:
+        client = OpenAI(base_url=server.base_url, api_key="fake", http_client=scheduler.http_client, max_retries=0)
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "Hi"}])
+        with request_lane("background"):
+            client.embeddings.create(model="text-embedding-3-small", input=["a", "b"], dimensions=8)
+
+    stats = scheduler.stats()
+    assert stats["requests"] == {"chat": 1, "embeddings": 1}
+    assert stats["wait"]["interactive"]["admitted"] == 1 and stats["wait"]["background"]["admitted"] == 1
+
+
+def test_create_openai_scheduler_from_settings():
+    settings = {"openai_scheduler": {
+        "enabled": True,
+        "limits": {"chat": {"requests_per_minute": 500, "tokens_per_minute": 200000}},
+        "max_retries": 3, "backoff_base_seconds": 0.5, "backoff_max_seconds": 20,
+        "embedding_batch_size": 32, "embedding_batch_window_ms": 5
+    }}
+    scheduler = create_openai_scheduler(settings)
+    assert scheduler.max_retries == 3 and scheduler.embedding_batch_size == 32
+
+    settings["openai_scheduler"]["enabled"] = False
+    assert create_openai_scheduler(settings) is None
@@ -0,0 +1,111 @@
+# tests/test_session_index.py
+import pytest
+from typing import List
+from phi.agent import Agent
+from phi.model.base import Model
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+from phi.storage.agent.sqlite import SqlAgentStorage
+from sqlalchemy import JSON, BigInteger, Column, MetaData, String, Table, create_engine, insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+from src.db.session_index import SessionIndex
+from src.interface.history import ChatHistoryView
+
+
+class EchoModel(Model):
+    def response(self, messages: List[Message]) -> ModelResponse:
+        reply = f"You said: {messages[-1].content}"
+        messages.append(Message(role="assistant", content=reply))
+        return ModelResponse(content=reply)
+
+
+class SQLiteSessionStorage:
+    """Stand-in for PgAgentStorage with the same sessions table layout, on SQLite."""
+
+    def __init__(self):
+        self.db_engine = create_engine("sqlite://")
+        self.table = Table(
+            "reasoning_sessions",
+            MetaData(),
+            Column("session_id", String, primary_key=True),
+            Column("agent_id", String),
+            Column("session_data", JSON),
+            Column("created_at", BigInteger),
+        )
+        self.table.metadata.create_all(self.db_engine)
+        self.Session = scoped_session(sessionmaker(bind=self.db_engine))
+
+    def table_exists(self):
+        return True
+
+
+@pytest.fixture
+def storage():
+    storage = SQLiteSessionStorage()
+    rows = [
+        {"session_id": f"s{i:03d}", "agent_id": "reasoning-agent", "created_at": 1000 + i // 2,
+         "session_data": {"session_name": "King size question" if i == 7 else None}}
+        for i in range(45)
+    ] + [{"session_id": "other", "agent_id": "orders-agent", "created_at": 5000, "session_data": None}]
+    with storage.db_engine.begin() as conn:
+        conn.execute(insert(storage.table), rows)
+    return storage
+
+
+def test_pages_are_newest_first_and_cover_every_session_once(storage):
+    index = SessionIndex(storage, agent_id="reasoning-agent")
+    seen, cursor = [], None
+    while True:
+        sessions, cursor = index.page(limit=20, after=cursor)
+        seen += [session["session_id"] for session in sessions]
+        if cursor is None:
+            break
+    assert seen == [f"s{i:03d}" for i in range(44, -1, -1)]
+
+
+def test_search_matches_id_prefix_or_session_name(storage):
+    index = SessionIndex(storage, agent_id="reasoning-agent")
+    assert [s["session_id"] for s in index.page(search="s00")[0]] == [f"s00{i}" for i in range(9, -1, -1)]
+    assert index.page(search="king")[0] == [{"session_id": "s007", "created_at": 1003, "session_name": "King size question"}]
+    assert index.page(search="100%")[0] == []
+
+
+def test_listing_index_is_created(storage):
+    SessionIndex(storage).ensure_index()
+    with storage.db_engine.connect() as conn:
+        indexes = [row[1] for row in conn.exec_driver_sql("PRAGMA index_list('reasoning_sessions')")]
+    assert "idx_reasoning_sessions_agent_created" in indexes
+
+
+def test_history_view_converts_only_new_messages():
+    agent = Agent(name="Reasoning Agent")
+    view = ChatHistoryView(format_assistant=lambda content: f"Frodo: {content}")
+    agent.memory.add_message(Message(role="system", content="You are Frodo"))
+    agent.memory.add_message(Message(role="user", content="Hi"))
+    agent.memory.add_message(Message(role="assistant", content="Hello!"))
+    assert view.sync(agent) == [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Frodo: Hello!"}]
+
+    first = view.messages[0]
+    agent.memory.add_message(Message(role="user", content="Prices?"))
+    assert view.sync(agent)[-1] == {"role": "user", "content": "Prices?"}
+    assert view.messages[0] is first
+
+    # Loading another session replaces the message list, so the view starts over
+    agent.memory.clear()
+    assert view.sync(agent) == []
+
+
+def test_history_view_appends_after_a_run_reloads_the_session(tmp_path):
+    storage = SqlAgentStorage(table_name="sessions", db_file=str(tmp_path / "sessions.sqlite"))
+    agent = Agent(name="Reasoning Agent", model=EchoModel(id="echo"), storage=storage, session_id="s1")
+    formatted = []
+    view = ChatHistoryView(format_assistant=lambda content: formatted.append(content) or content)
+    agent.run("Hi")
+    view.sync(agent)
+
+    # Each run reads the session back from storage, which replaces memory.messages
+    agent.run("Prices?")
+    messages = view.sync(agent)
+
+    assert [message["content"] for message in messages] == ["Hi", "You said: Hi", "Prices?", "You said: Prices?"]
+    assert formatted == ["You said: Hi", "You said: Prices?"]
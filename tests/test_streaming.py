@@ -0,0 +1,70 @@
+# tests/test_streaming.py
+from src.interface.streaming import BufferedStreamRenderer
+
+
+class FakePlaceholder:
+    def __init__(self):
+        self.renders = []
+
+    def markdown(self, text):
+        self.renders.append(text)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_renders_are_batched_and_prefix_added_once():
+    placeholder, clock = FakePlaceholder(), FakeClock()
+    renderer = BufferedStreamRenderer(placeholder, flush_interval=0.1, flush_chars=1000, clock=clock)
+    for i in range(100):
+        clock.now += 0.01
+        renderer.write(f"word{i} ")
+    final = renderer.finish()
+
+    assert final == "Frodo: " + "".join(f"word{i} " for i in range(100))
+    assert placeholder.renders[-1] == final
+    assert 5 <= len(placeholder.renders) <= 12
+    assert all(render.startswith("Frodo: word0") for render in placeholder.renders)
+
+
+def test_existing_prefix_is_not_duplicated():
+    placeholder = FakePlaceholder()
+    renderer = BufferedStreamRenderer(placeholder, flush_chars=1)
+    for chunk in ["Fro", "do", ": Hi", " there"]:
+        renderer.write(chunk)
+    assert renderer.finish() == "Frodo: Hi there"
+    assert all(render.startswith("Frodo: Hi") for render in placeholder.renders)
+
+
+def test_short_response_gets_prefix():
+    renderer = BufferedStreamRenderer(FakePlaceholder())
+    renderer.write("Fro")
+    assert renderer.finish() == "Frodo: Fro"
+
+
+def test_flushes_on_size():
+    placeholder = FakePlaceholder()
+    renderer = BufferedStreamRenderer(placeholder, flush_interval=60, flush_chars=10, clock=FakeClock())
+    renderer.write("0123456789")
+    assert placeholder.renders == ["Frodo: 0123456789"]
+
+
+def test_reports_time_to_first_token_and_throughput():
+    clock = FakeClock()
+    renderer = BufferedStreamRenderer(FakePlaceholder(), clock=clock)
+    clock.now = 0.5
+    renderer.write("a")
+    for _ in range(20):
+        clock.now += 0.1
+        renderer.write("b")
+    renderer.finish()
+    stats = renderer.stats()
+    assert stats["tokens"] == 21
+    assert stats["time_to_first_token"] == 0.5
+    assert round(stats["tokens_per_second"], 1) == 10.5
+    assert round(stats["total_seconds"], 1) == 2.5
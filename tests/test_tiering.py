@@ -0,0 +1,131 @@
+# tests/test_tiering.py
+import pytest
+from typing import List
+from phi.model.base import Model
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+from src.agents.tiering import ModelMetrics, ModelTier, TieredModelAgent, json_response_check
+
+
+class ScriptedModel(Model):
+    """Answers with the next scripted reply (or raises it), reporting fixed token counts."""
+    replies: List = []
+
+    def response(self, messages: List[Message]) -> ModelResponse:
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        messages.append(Message(role="assistant", content=reply, metrics={"input_tokens": 10, "output_tokens": 4}))
+        return ModelResponse(content=reply)
+
+    def response_stream(self, messages: List[Message]):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        for word in reply.split(" "):
+            yield ModelResponse(content=word + " ")
+        messages.append(Message(role="assistant", content=reply, metrics={"input_tokens": 10, "output_tokens": 4}))
+
+
+class ToolThenFailModel(Model):
+    """Calls a tool (as OpenAIChat would, appending the call and its result), then fails the follow-up completion."""
+
+    def _call_tool(self, messages: List[Message]):
+        messages.append(Message(role="assistant", tool_calls=[{
+            "id": "call_1", "type": "function", "function": {"name": "handle_create_order", "arguments": "{}"}
+        }]))
+        messages.append(Message(role="tool", tool_call_id="call_1", content="Order ORD000001 created"))
+        raise RuntimeError("502 Bad Gateway")
+
+    def response(self, messages: List[Message]) -> ModelResponse:
+        self._call_tool(messages)
+
+    def response_stream(self, messages: List[Message]):
+        self._call_tool(messages)
+        yield
+
+
+def make_agent(primary, fallback=None, check=None, metrics=None):
+    return TieredModelAgent(
+        name="Orders Agent",
+        system_prompt="Answer in JSON.",
+        model=ScriptedModel(id="small", replies=primary),
+        fallback_model=ScriptedModel(id="large", replies=fallback or []) if fallback is not None else None,
+        response_check=check,
+        model_metrics=metrics,
+    )
+
+
+def test_model_tier_from_settings():
+    tier = ModelTier.from_settings({"enabled": True, "model": "gpt-4o-mini", "fallback_model": "gpt-4o"})
+    assert tier.create_model().id == "gpt-4o-mini"
+    assert tier.create_fallback_model().id == "gpt-4o"
+    assert tier.escalate_on_schema_failure is False
+    assert ModelTier("gpt-4o").create_fallback_model() is None
+
+
+def test_json_response_check():
+    check = json_response_check("answer")
+    assert check('{"answer": "ok", "command": "x"}')
+    assert not check('{"command": "x"}')
+    assert not check("Sure! Here is your order.")
+    assert not check(None)
+
+
+def test_valid_answer_stays_on_the_small_model():
+    metrics = ModelMetrics()
+    agent = make_agent(['{"answer": "ok"}'], fallback=[], check=json_response_check("answer"), metrics=metrics)
+    assert agent.run("Order status?").content == '{"answer": "ok"}'
+
+    stats = metrics.stats()["Orders Agent"]
+    assert stats["runs"] == 1
+    assert stats["models"] == {"small": 1}
+    assert stats["input_tokens"] == 10 and stats["output_tokens"] == 4
+    assert stats["p95_latency"] >= 0
+
+
+def test_schema_failure_escalates_without_keeping_the_failed_attempt():
+    metrics = ModelMetrics()
+    agent = make_agent(["not json"], fallback=['{"answer": "ok"}'], check=json_response_check("answer"), metrics=metrics)
+    response = agent.run("Order status?")
+
+    assert response.content == '{"answer": "ok"}'
+    assert agent.model.id == "small"
+    assert len(agent.memory.runs) == 1
+    assert [m.content for m in agent.memory.messages if m.role == "assistant"] == ['{"answer": "ok"}']
+    stats = metrics.stats()["Orders Agent"]
+    assert stats["outcomes"] == {"schema_failure": 1, "escalated": 1}
+    assert stats["models"] == {"small": 1, "large": 1}
+
+
+def test_schema_failure_without_fallback_is_returned_as_is():
+    agent = make_agent(["not json"], check=json_response_check("answer"))
+    assert agent.run("Order status?").content == "not json"
+
+
+def test_model_error_falls_back():
+    agent = make_agent([RuntimeError("rate limited")], fallback=["fine"])
+    assert agent.run("Hello").content == "fine"
+
+
+def test_stream_falls_back_before_the_first_chunk():
+    metrics = ModelMetrics()
+    agent = make_agent([RuntimeError("rate limited")], fallback=["hello there"], metrics=metrics)
+    chunks = [chunk.content for chunk in agent.run("Hello", stream=True)]
+    assert "".join(chunks).strip() == "hello there"
+    assert metrics.stats()["Orders Agent"]["outcomes"] == {"escalated": 1}
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_model_error_after_a_tool_call_is_not_rerun_on_the_fallback(stream):
+    metrics = ModelMetrics()
+    fallback = ScriptedModel(id="large", replies=["created another order"])
+    agent = TieredModelAgent(name="Orders Agent", model=ToolThenFailModel(id="small"), fallback_model=fallback, model_metrics=metrics)
+
+    with pytest.raises(RuntimeError, match="502"):
+        response = agent.run("Order a Queen Dream Sleep", stream=stream)
+        if stream:
+            list(response)
+
+    assert fallback.replies == ["created another order"]
+    assert metrics.stats()["Orders Agent"]["outcomes"] == {"error": 1}
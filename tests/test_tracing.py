@@ -0,0 +1,122 @@
+# tests/test_tracing.py
+import contextvars
+import json
+import threading
+
+from src.observability.tracing import (
+    NOOP_SPAN,
+    JsonlExporter,
+    OtlpHttpExporter,
+    Tracer,
+    create_tracer,
+    span,
+    timing_rows,
+    traced,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def test_spans_nest_under_the_turn_and_are_exported_once():
+    exporter = ListExporter()
+    tracer = Tracer(sample_rate=1.0, exporters=[exporter])
+    with tracer.trace("turn", session="s1") as turn:
+        with span("agent Reasoning Agent") as agent_span:
+            agent_span.set(input_tokens=100, output_tokens=20)
+            with span("tool handle_get_status"):
+                pass
+    tracer.flush()
+
+    assert [trace.trace_id for trace in exporter.traces] == [turn.trace.trace_id]
+    spans = {item.name: item for item in exporter.traces[0].spans}
+    assert spans["turn"].parent_id is None
+    assert spans["agent Reasoning Agent"].parent_id == spans["turn"].span_id
+    assert spans["tool handle_get_status"].parent_id == spans["agent Reasoning Agent"].span_id
+    summary = exporter.traces[0].summary()
+    assert summary["spans"] == 3 and summary["input_tokens"] == 100 and summary["output_tokens"] == 20
+    assert [row["span"] for row in timing_rows(exporter.traces[0])] == [
+        "turn", "  agent Reasoning Agent", "    tool handle_get_status"
+    ]
+
+
+def test_unsampled_turns_and_code_outside_a_turn_get_the_noop_span():
+    tracer = Tracer(sample_rate=0.0, exporters=[ListExporter()])
+    assert span("orders_db.create_order") is NOOP_SPAN
+    with tracer.trace("turn") as turn:
+        assert turn is NOOP_SPAN
+        assert span("embed") is NOOP_SPAN
+    with tracer.trace("turn", force=True) as forced:
+        assert forced.trace is not None
+
+
+def test_traced_functions_generators_errors_and_worker_threads():
+    @traced("orders_db.get_order_status")
+    def lookup(order_id):
+        if order_id is None:
+            raise ValueError("no order id")
+        return order_id
+
+    @traced("tool transfer_task_to_orders_agent")
+    def transfer():
+        with span("agent Orders Agent"):
+            yield "answer"
+
+    tracer = Tracer()
+    with tracer.trace("turn") as turn:
+        assert lookup("ORD000001") == "ORD000001"
+        try:
+            lookup(None)
+        except ValueError:
+            pass
+        assert list(transfer()) == ["answer"]
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(lookup, "ORD000002"))
+        worker.start()
+        worker.join()
+
+    spans = turn.trace.spans
+    root_id = turn.span_id
+    lookups = [item for item in spans if item.name == "orders_db.get_order_status"]
+    assert len(lookups) == 3 and all(item.parent_id == root_id for item in lookups)
+    assert sum(1 for item in lookups if item.error == "ValueError: no order id") == 1
+    member = next(item for item in spans if item.name == "agent Orders Agent")
+    tool = next(item for item in spans if item.name == "tool transfer_task_to_orders_agent")
+    assert member.parent_id == tool.span_id
+
+
+def test_jsonl_and_otlp_exports(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(exporters=[JsonlExporter(str(path))])
+    with tracer.trace("turn") as turn:
+        with span("embed", cache_hit=True):
+            pass
+    tracer.flush()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert {line["name"] for line in lines} == {"turn", "embed"}
+    assert all(line["trace_id"] == turn.trace.trace_id for line in lines)
+
+    payload = OtlpHttpExporter("http://localhost:4318/v1/traces").payload(turn.trace)
+    otlp_spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    embed = next(item for item in otlp_spans if item["name"] == "embed")
+    assert embed["parentSpanId"] == turn.span_id
+    assert embed["attributes"] == [{"key": "cache_hit", "value": {"boolValue": True}}]
+    assert int(embed["endTimeUnixNano"]) >= int(embed["startTimeUnixNano"])
+
+
+def test_create_tracer_from_settings(tmp_path):
+    settings = {"tracing": {
+        "enabled": True, "sample_rate": 0.25, "jsonl_path": str(tmp_path / "t.jsonl"),
+        "otlp_endpoint": "http://collector:4318/v1/traces", "service_name": "sleep-better-ai"
+    }}
+    tracer = create_tracer(settings)
+    assert tracer.sample_rate == 0.25
+    assert [type(exporter) for exporter in tracer.exporters] == [JsonlExporter, OtlpHttpExporter]
+
+    settings["tracing"]["enabled"] = False
+    assert create_tracer(settings).sample_rate == 0.0